@@ -0,0 +1,193 @@
+"""
+Database round trips per auth endpoint
+Boots the FastAPI app from main.py in-process against a local mongod, calls
+each /api/auth endpoint and counts the MongoDB commands it issues with a
+pymongo CommandListener, next to the mean latency. Needs a real mongod:
+mongomock never reaches the driver's command monitoring, so it would report
+zero round trips. Benchmark users are deleted afterwards.
+
+Usage (from backend/, after `pip install -r benchmarks/requirements.txt`):
+    python -m benchmarks.auth_roundtrips
+    python -m benchmarks.auth_roundtrips --mongo-uri mongodb://localhost:27017 --iterations 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import monitoring
+
+from benchmarks.load_test import git_commit, percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+ENDPOINTS = ("register", "login", "me", "profile", "validate-password", "change-password")
+EMAIL_PREFIX = "roundtrip-bench-"
+PASSWORD = "benchmark-password"
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to the server, by "collection.command" """
+
+    def __init__(self):
+        self.commands: Counter = Counter()
+
+    def reset(self) -> Counter:
+        commands, self.commands = self.commands, Counter()
+        return commands
+
+    def started(self, event):
+        command = event.command
+        collection = command.get(event.command_name)
+        target = collection if isinstance(collection, str) else event.database_name
+        self.commands[f"{target}.{event.command_name}"] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def configure_environment(args):
+    """Settings are read at import time, so this must run before importing main"""
+    os.environ.setdefault("JWT_SECRET", "benchmark")
+    os.environ.setdefault("HUGGINGFACE_API_KEY", "benchmark")
+    os.environ["MONGO_URI"] = args.mongo_uri
+    os.environ["ROLLUP_COMPACTION_INTERVAL"] = "0"
+    os.environ["RATE_LIMIT_BACKEND"] = "memory"
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def install_counter(counter: CommandCounter):
+    """Add `counter` to the listeners of the client the app creates at startup"""
+    import core.database
+
+    client_class = core.database.AsyncIOMotorClient
+
+    def client_with_counter(uri, **options):
+        options["event_listeners"] = [*options.get("event_listeners", []), counter]
+        return client_class(uri, **options)
+
+    core.database.AsyncIOMotorClient = client_with_counter
+
+
+def build_request(endpoint: str, email: str, headers: Dict[str, str]):
+    if endpoint == "register":
+        return "POST", "/api/auth/register", {"json": {
+            "email": email, "password": PASSWORD, "full_name": "Benchmark User"
+        }}
+    if endpoint == "login":
+        return "POST", "/api/auth/login", {"data": {"username": email, "password": PASSWORD}}
+    if endpoint == "me":
+        return "GET", "/api/auth/me", {"headers": headers}
+    if endpoint == "profile":
+        return "PUT", "/api/auth/profile", {"headers": headers, "json": {"full_name": "Renamed User"}}
+    if endpoint == "validate-password":
+        return "POST", "/api/auth/validate-password", {"headers": headers, "json": {"current_password": PASSWORD}}
+    return "POST", "/api/auth/change-password", {"headers": headers, "json": {
+        "current_password": PASSWORD, "new_password": PASSWORD
+    }}
+
+
+async def measure_user(client, counter: CommandCounter, samples: Dict[str, Dict]):
+    """Run every endpoint once for a fresh user, in ENDPOINTS order"""
+    email = f"{EMAIL_PREFIX}{random.randrange(10**12)}@example.com"
+    headers: Dict[str, str] = {}
+    for endpoint in ENDPOINTS:
+        method, path, kwargs = build_request(endpoint, email, headers)
+        counter.reset()
+        start = time.perf_counter()
+        response = await client.request(method, path, **kwargs)
+        elapsed = time.perf_counter() - start
+        commands = counter.reset()
+        response.raise_for_status()
+        if endpoint == "login":
+            headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        sample = samples[endpoint]
+        sample["latencies"].append(elapsed)
+        sample["round_trips"].append(sum(commands.values()))
+        sample["commands"].update(commands)
+
+
+async def run_benchmark(args) -> Dict:
+    import httpx
+    from main import app
+    from core.database import get_database
+
+    counter = CommandCounter()
+    install_counter(counter)
+    samples = {
+        endpoint: {"latencies": [], "round_trips": [], "commands": Counter()}
+        for endpoint in ENDPOINTS
+    }
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for _ in range(args.iterations):
+                    await measure_user(client, counter, samples)
+        finally:
+            await get_database()["users"].delete_many({"email": {"$regex": f"^{EMAIL_PREFIX}"}})
+
+    report = {}
+    for endpoint, sample in samples.items():
+        latencies: List[float] = sorted(sample["latencies"])
+        calls = len(latencies)
+        report[endpoint] = {
+            "calls": calls,
+            "round_trips_per_call": round(sum(sample["round_trips"]) / calls, 2) if calls else 0.0,
+            "max_round_trips": max(sample["round_trips"], default=0),
+            "commands_per_call": {
+                name: round(count / calls, 2) for name, count in sorted(sample["commands"].items())
+            },
+            "mean_ms": round(sum(latencies) / calls * 1000, 2) if calls else 0.0,
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        }
+        print_row(endpoint, report[endpoint])
+    return report
+
+
+def print_row(endpoint: str, stats: Dict):
+    commands = ", ".join(f"{name} x{count:g}" for name, count in stats["commands_per_call"].items())
+    print(f"{endpoint:<18} {stats['round_trips_per_call']:>5.2f} round trips  "
+          f"mean {stats['mean_ms']:>7.2f} ms  p95 {stats['p95_ms']:>7.2f} ms  ({commands})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MongoDB round trips per auth endpoint")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017",
+                        help="A real mongod; mongomock does not emit command events")
+    parser.add_argument("--iterations", type=int, default=20, help="Users taken through every endpoint")
+    parser.add_argument("--output", default=None,
+                        help="Defaults to benchmarks/results/auth-roundtrips-<commit>.json")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    endpoints = asyncio.run(run_benchmark(args))
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "mongo_uri")},
+        "endpoints": endpoints,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"auth-roundtrips-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
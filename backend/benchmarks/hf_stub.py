@@ -0,0 +1,142 @@
+"""
+Local stand-in for the Hugging Face inference API
+Serves POST /models/{model} with configurable latency, 503 cold starts,
+hanging requests (to trigger client timeouts) and response label formats.
+
+Run standalone (from backend/):
+    python -m benchmarks.hf_stub --port 8100 --latency-ms 150 --cold-start-rate 0.05
+and point the API at it with HUGGINGFACE_API_URL=http://127.0.0.1:8100/models
+"""
+from dataclasses import dataclass, asdict
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+LABEL_FORMATS = ("nested", "flat", "dict", "opaque")
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 150.0
+    jitter_ms: float = 50.0
+    cold_start_rate: float = 0.0  # Probability of answering 503 "model loading"
+    cold_start_retry_after: int = 1  # Retry-After header on 503s, seconds
+    timeout_rate: float = 0.0  # Probability of hanging for hang_seconds
+    hang_seconds: float = 30.0
+    label_format: str = "nested"
+    ai_probability: float = 0.5  # Mean AI score returned
+
+
+def _predictions(config: StubConfig):
+    ai_score = min(1.0, max(0.0, random.gauss(config.ai_probability, 0.2)))
+    if config.label_format == "dict":
+        return {"label": "artificial", "score": ai_score}
+    if config.label_format == "opaque":
+        # Labels the detectors can't map; exercises the fallback chain
+        return [[{"label": "LABEL_1", "score": ai_score}, {"label": "LABEL_0", "score": 1 - ai_score}]]
+    predictions = [{"label": "Fake", "score": ai_score}, {"label": "Real", "score": 1 - ai_score}]
+    return predictions if config.label_format == "flat" else [predictions]
+
+
+def create_stub_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="HF inference stub")
+    app.state.config = config
+    app.state.calls = 0
+
+    @app.post("/models/{model_name:path}")
+    async def infer(model_name: str, request: Request):
+        await request.body()
+        app.state.calls += 1
+        config = app.state.config
+
+        if random.random() < config.cold_start_rate:
+            return JSONResponse(
+                {"error": f"Model {model_name} is currently loading", "estimated_time": 20.0},
+                status_code=503,
+                headers={"Retry-After": str(config.cold_start_retry_after)},
+            )
+        if random.random() < config.timeout_rate:
+            await asyncio.sleep(config.hang_seconds)
+
+        delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        return _predictions(config)
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls": app.state.calls, "config": asdict(app.state.config)}
+
+    return app
+
+
+class StubServer:
+    """Runs the stub on a background thread so a benchmark can share the process"""
+
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 8100):
+        self.app = create_stub_app(config)
+        self.url = f"http://{host}:{port}/models"
+        self._server = uvicorn.Server(uvicorn.Config(
+            self.app, host=host, port=port, log_level="warning", lifespan="off"
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def calls(self) -> int:
+        return self.app.state.calls
+
+    def __enter__(self):
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("HF stub failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    defaults = StubConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument("--cold-start-rate", type=float, default=defaults.cold_start_rate)
+    parser.add_argument("--cold-start-retry-after", type=int, default=defaults.cold_start_retry_after)
+    parser.add_argument("--timeout-rate", type=float, default=defaults.timeout_rate)
+    parser.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds)
+    parser.add_argument("--label-format", choices=LABEL_FORMATS, default=defaults.label_format)
+    parser.add_argument("--ai-probability", type=float, default=defaults.ai_probability)
+
+
+def stub_config_from_args(args) -> StubConfig:
+    return StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        cold_start_rate=args.cold_start_rate,
+        cold_start_retry_after=args.cold_start_retry_after,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        label_format=args.label_format,
+        ai_probability=args.ai_probability,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Hugging Face inference API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(stub_config_from_args(args)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Offline load test for the API
+Boots the FastAPI app from main.py in-process against a local Hugging Face
+stub (benchmarks/hf_stub.py) and either an in-memory MongoDB
+(mongomock-motor) or a local mongod, then drives each endpoint at a fixed
+concurrency. Reports throughput, latency percentiles and memory per scenario
+and saves them as JSON so runs can be compared between commits.
+
+Usage (from backend/, after `pip install -r benchmarks/requirements.txt`):
+    python -m benchmarks.load_test --scenarios text,image,results,stats
+    python -m benchmarks.load_test --concurrency 32 --cold-start-rate 0.05 \\
+        --compare benchmarks/results/<previous-commit>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from benchmarks.hf_stub import StubServer, add_stub_arguments, stub_config_from_args
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+SCENARIOS = ("text", "image", "video", "results", "stats")
+
+SAMPLE_TEXT = (
+    "Artificial intelligence has transformed the way organizations approach content "
+    "creation. By leveraging large language models, teams can draft articles, summarize "
+    "research and respond to customers at a scale that was previously impossible. "
+)
+
+
+def rss_mb() -> float:
+    """Current resident set size (falls back to peak RSS off Linux)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def make_image(width: int = 1600, height: int = 1200) -> bytes:
+    from io import BytesIO
+    import numpy as np
+    from PIL import Image
+
+    pixels = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    output = BytesIO()
+    Image.fromarray(pixels).save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def make_video(seconds: int = 4, fps: int = 24, width: int = 640, height: int = 360) -> bytes:
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as f:
+        path = f.name
+    try:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+        for _ in range(seconds * fps):
+            writer.write(rng.integers(0, 255, (height, width, 3), dtype=np.uint8))
+        writer.release()
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
+
+def configure_environment(args, stub_url: str):
+    """Settings are read at import time, so this must run before importing main"""
+    os.environ.setdefault("JWT_SECRET", "benchmark")
+    os.environ.setdefault("HUGGINGFACE_API_KEY", "benchmark")
+    os.environ["HUGGINGFACE_API_URL"] = stub_url
+    os.environ["MONGO_URI"] = args.mongo_uri or "mongodb://localhost:27017"
+    os.environ["ROLLUP_COMPACTION_INTERVAL"] = "0"
+    # One user sends identical payloads: without these, scenarios would measure
+    # 429s and cache hits instead of the detection path (export them to opt back in)
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("TEXT_DEDUP_ENABLED", "false")
+    os.environ.setdefault("IMAGE_HASH_INDEX_ENABLED", "false")
+    os.environ.setdefault("VIDEO_FRAME_STORE_ENABLED", "false")
+    if args.inference_timeout:
+        os.environ["TEXT_INFERENCE_TIMEOUT"] = str(args.inference_timeout)
+        os.environ["IMAGE_INFERENCE_TIMEOUT"] = str(args.inference_timeout)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def use_mock_mongo():
+    from mongomock_motor import AsyncMongoMockClient
+    import core.database
+
+    core.database.AsyncIOMotorClient = lambda uri, **options: AsyncMongoMockClient()
+
+
+async def authenticate(client) -> Dict[str, str]:
+    email = f"bench-{random.randrange(10**9)}@example.com"
+    password = "benchmark-password"
+    response = await client.post("/api/auth/register", json={
+        "email": email, "password": password, "full_name": "Benchmark User"
+    })
+    response.raise_for_status()
+    response = await client.post("/api/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def seed_results(count: int):
+    """Insert historical results for the benchmark user so history/stats have data"""
+    from bson import ObjectId
+    from core.database import get_database
+    from core.config import settings
+    from models.result_model import to_storage
+    from services.result_store import store_contents
+
+    db = get_database()
+    user = await db["users"].find_one(sort=[("_id", -1)])
+    now = datetime.utcnow()
+    docs = [
+        {
+            "_id": ObjectId(),
+            "user_id": user["_id"],
+            "type": random.choice(["text", "image", "video"]),
+            "result": random.random() < 0.5,
+            "confidence": random.uniform(0.5, 1.0),
+            "content": SAMPLE_TEXT if i % 3 == 0 else None,
+            "timestamp": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+    if docs:
+        if settings.RESULTS_COMPACT_SCHEMA:
+            await store_contents(docs)
+        await db["results"].insert_many([to_storage(doc) for doc in docs])
+
+
+def build_request(scenario: str, payloads: Dict):
+    if scenario == "text":
+        return "POST", "/api/detect/text", {"json": {"text": payloads["text"]}}
+    if scenario == "image":
+        return "POST", "/api/detect/image", {"files": {"file": ("bench.jpg", payloads["image"], "image/jpeg")}}
+    if scenario == "video":
+        return "POST", "/api/detect/video", {"files": {"file": ("bench.mp4", payloads["video"], "video/mp4")}}
+    if scenario == "results":
+        return "GET", "/api/results/", {"params": {"limit": 50}}
+    return "GET", "/api/results/stats", {}
+
+
+async def run_scenario(client, headers, scenario: str, payloads: Dict, args, stub: StubServer) -> Dict:
+    method, path, kwargs = build_request(scenario, payloads)
+    total = args.video_requests if scenario == "video" else args.requests
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    status_counts: Dict[str, int] = {}
+
+    async def one_request():
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, **kwargs)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            status_counts[status] = status_counts.get(status, 0) + 1
+
+    rss_before = rss_mb()
+    calls_before = stub.calls
+    if args.tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(total)))
+    duration = time.perf_counter() - started
+    traced_peak = None
+    if args.tracemalloc:
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    latencies.sort()
+    errors = sum(count for status, count in status_counts.items() if not status.startswith("2"))
+    return {
+        "requests": total,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "status_counts": status_counts,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(total / duration, 2) if duration else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+        "tracemalloc_peak_mb": round(traced_peak, 2) if traced_peak is not None else None,
+        "upstream_calls": stub.calls - calls_before,
+    }
+
+
+async def run_benchmark(args, stub: StubServer) -> Dict:
+    import httpx
+    from main import app
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    payloads = {"text": SAMPLE_TEXT * 4}
+    if "image" in scenarios:
+        payloads["image"] = make_image()
+    if "video" in scenarios:
+        payloads["video"] = make_video()
+
+    report = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            headers = await authenticate(client)
+            await seed_results(args.seed_results)
+            for scenario in scenarios:
+                report[scenario] = await run_scenario(client, headers, scenario, payloads, args, stub)
+                print_row(scenario, report[scenario])
+    return report
+
+
+def print_row(scenario: str, stats: Dict):
+    print(f"{scenario:<8} {stats['throughput_rps']:>9.1f} rps  p50 {stats['p50_ms']:>8.1f} ms  "
+          f"p95 {stats['p95_ms']:>8.1f} ms  p99 {stats['p99_ms']:>8.1f} ms  "
+          f"errors {stats['errors']:>4}  rss {stats['rss_mb']:>7.1f} MB")
+
+
+def compare(current: Dict, baseline_path: str, threshold: float) -> bool:
+    """Print deltas against a previous run; returns True if any scenario regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline.get('commit')} ({baseline_path}):")
+    regressed = False
+    for scenario, stats in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        throughput = (stats["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100 \
+            if before["throughput_rps"] else 0.0
+        p95 = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        flag = ""
+        if throughput < -threshold or p95 > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{scenario:<8} throughput {throughput:+6.1f}%  p95 {p95:+6.1f}%{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline API load test")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--video-requests", type=int, default=20)
+    parser.add_argument("--seed-results", type=int, default=500, help="History rows for results/stats")
+    parser.add_argument("--mongo-uri", default=None, help="Use a real mongod instead of mongomock")
+    parser.add_argument("--inference-timeout", type=float, default=None, help="Override client timeouts (s)")
+    parser.add_argument("--stub-port", type=int, default=8100)
+    parser.add_argument("--tracemalloc", action="store_true", help="Record Python heap peak per scenario")
+    parser.add_argument("--output", default=None, help="Defaults to benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to diff against")
+    parser.add_argument("--fail-threshold", type=float, default=10.0, help="Regression threshold in percent")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    with StubServer(stub_config_from_args(args), port=args.stub_port) as stub:
+        configure_environment(args, stub.url)
+        if not args.mongo_uri:
+            use_mock_mongo()
+        scenarios = asyncio.run(run_benchmark(args, stub))
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "mongo": "local" if args.mongo_uri else "mongomock",
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "scenarios": scenarios,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare and compare(report, args.compare, args.fail_threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
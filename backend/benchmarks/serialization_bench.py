@@ -0,0 +1,165 @@
+"""
+Serialization benchmark for result history pages
+Times the ways a page of results can be turned into a response body:
+  models_json    ResultResponse per row, jsonable_encoder, json.dumps
+                 (the old /api/results path with the default JSONResponse)
+  models_orjson  the same with orjson (other routes under ORJSONResponse)
+  dicts_orjson   plain dicts straight into orjson (the /api/results path)
+plus gzip/brotli size and time for one page.
+
+Usage (from backend/):
+    python -m benchmarks.serialization_bench
+    python -m benchmarks.serialization_bench --rows 200 --iterations 500
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+# Settings are required at import time; the values are never used
+DUMMY_ENV = {
+    "MONGO_URI": "mongodb://localhost:27017",
+    "JWT_SECRET": "benchmark",
+    "HUGGINGFACE_API_KEY": "benchmark",
+}
+
+SAMPLE_TEXT = (
+    "Artificial intelligence has transformed the way organizations approach content "
+    "creation. By leveraging large language models, teams can draft articles, summarize "
+    "research and respond to customers at a scale that was previously impossible. "
+) * 4
+
+
+def make_rows(count: int) -> List[Dict]:
+    from bson import ObjectId
+
+    user_id = ObjectId()
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "type": ("text", "image", "video")[i % 3],
+            "result": i % 2 == 0,
+            "confidence": 0.5 + (i % 50) / 100,
+            "content": SAMPLE_TEXT[:1000] if i % 3 == 0 else None,
+            "timestamp": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def bench(fn: Callable[[], bytes], iterations: int) -> Dict:
+    fn()  # Warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return {
+        "median_us": round(timings[len(timings) // 2], 1),
+        "p95_us": round(timings[int(len(timings) * 0.95) - 1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Result page serialization and compression benchmark")
+    parser.add_argument("--rows", type=int, default=50, help="Results per page")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", default=None, help="Defaults to benchmarks/results/serialization-<commit>.json")
+    args = parser.parse_args()
+
+    for key, value in DUMMY_ENV.items():
+        os.environ.setdefault(key, value)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from benchmarks.load_test import git_commit
+    from models.result_model import ResultResponse
+
+    rows = make_rows(args.rows)
+
+    def as_models():
+        return [
+            ResultResponse(
+                id=str(row["_id"]),
+                user_id=str(row["user_id"]),
+                type=row["type"],
+                result=row["result"],
+                confidence=row["confidence"],
+                content=row.get("content"),
+                timestamp=row["timestamp"]
+            )
+            for row in rows
+        ]
+
+    def as_dicts():
+        return [
+            {
+                "id": str(row["_id"]),
+                "user_id": str(row["user_id"]),
+                "type": row["type"],
+                "result": row["result"],
+                "confidence": row["confidence"],
+                "content": row.get("content"),
+                "timestamp": row["timestamp"],
+                "models": None,
+            }
+            for row in rows
+        ]
+
+    variants = {
+        "models_json": lambda: json.dumps(
+            jsonable_encoder(as_models()), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode(),
+        "models_orjson": lambda: orjson.dumps(jsonable_encoder(as_models())),
+        "dicts_orjson": lambda: orjson.dumps(as_dicts()),
+    }
+    serialization = {name: bench(fn, args.iterations) for name, fn in variants.items()}
+
+    body = variants["dicts_orjson"]()
+    compressors = {"gzip": lambda: gzip.compress(body, compresslevel=9)}
+    try:
+        import brotli
+        compressors["brotli"] = lambda: brotli.compress(body, quality=4)
+    except ImportError:
+        pass
+    compression = {
+        name: {**bench(fn, args.iterations), "bytes": len(fn()), "ratio": round(len(body) / len(fn()), 2)}
+        for name, fn in compressors.items()
+    }
+
+    baseline = serialization["models_json"]["median_us"]
+    for name, stats in serialization.items():
+        print(f"{name:<14} median {stats['median_us']:9.1f} us  p95 {stats['p95_us']:9.1f} us  "
+              f"({baseline / stats['median_us']:.1f}x)")
+    print(f"\npage body {len(body)} bytes")
+    for name, stats in compression.items():
+        print(f"{name:<14} median {stats['median_us']:9.1f} us  {stats['bytes']} bytes ({stats['ratio']}x smaller)")
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "body_bytes": len(body),
+        "serialization": serialization,
+        "compression": compression,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"serialization-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Startup benchmark for the API worker
+Imports main.py in a fresh interpreter with -X importtime and reports the
+total import time, the slowest modules and peak RSS. Fails (exit code 1) when
+a heavy detection dependency is imported eagerly or a threshold is exceeded.
+
+Usage (from backend/):
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --max-ms 1500 --output startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load on first detection request
+LAZY_MODULES = ["cv2", "numpy", "PIL", "services.video_detector", "services.image_detector"]
+
+# Settings are required at import time; the values are never used
+DUMMY_ENV = {
+    "MONGO_URI": "mongodb://localhost:27017",
+    "JWT_SECRET": "benchmark",
+    "HUGGINGFACE_API_KEY": "benchmark",
+}
+
+PROBE = (
+    "import resource, main; "
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+
+def run_probe() -> Dict:
+    env = {**os.environ, **DUMMY_ENV}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing main failed:\n{proc.stderr[-2000:]}")
+    return {"importtime": proc.stderr, "max_rss_kb": int(proc.stdout.strip().splitlines()[-1])}
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """Parse '-X importtime' lines into {module, self_us, cumulative_us}"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API worker import time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to sample")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if median import of main exceeds this")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        probe = run_probe()
+        modules = parse_importtime(probe["importtime"])
+        total = next(m["cumulative_us"] for m in modules if m["module"] == "main")
+        samples.append({"total_us": total, "max_rss_kb": probe["max_rss_kb"], "modules": modules})
+
+    samples.sort(key=lambda sample: sample["total_us"])
+    median = samples[len(samples) // 2]
+    imported = {m["module"] for m in median["modules"]}
+    eager = [name for name in LAZY_MODULES if name in imported]
+    slowest = sorted(median["modules"], key=lambda m: m["self_us"], reverse=True)[:args.top]
+
+    report = {
+        "runs": args.runs,
+        "import_main_ms": round(median["total_us"] / 1000, 2),
+        "max_rss_mb": round(median["max_rss_kb"] / 1024, 1),
+        "modules_imported": len(imported),
+        "eager_heavy_modules": eager,
+        "slowest": [
+            {"module": m["module"], "self_ms": round(m["self_us"] / 1000, 2),
+             "cumulative_ms": round(m["cumulative_us"] / 1000, 2)}
+            for m in slowest
+        ],
+    }
+
+    print(f"import main: {report['import_main_ms']} ms (median of {args.runs}), "
+          f"peak RSS {report['max_rss_mb']} MB, {report['modules_imported']} modules")
+    print(f"{'self ms':>9} {'cum ms':>9}  module")
+    for m in report["slowest"]:
+        print(f"{m['self_ms']:>9.2f} {m['cumulative_ms']:>9.2f}  {m['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if eager:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(eager)}")
+        failed = True
+    if args.max_ms is not None and report["import_main_ms"] > args.max_ms:
+        print(f"FAIL: import time {report['import_main_ms']} ms exceeds {args.max_ms} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
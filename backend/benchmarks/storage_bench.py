@@ -0,0 +1,193 @@
+"""
+Storage benchmark for the results collection
+Seeds the same synthetic history into a scratch database once per schema
+(verbose, and compact with content offloaded to result_contents), then
+reports collection and index sizes from collStats and the latency of the
+per-user history query, with and without the content join. Needs a real
+mongod; mongomock has no collStats.
+
+Usage (from backend/):
+    python -m benchmarks.storage_bench --mongo-uri mongodb://localhost:27017
+    python -m benchmarks.storage_bench --results 200000 --users 500 --output storage.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+SCRATCH_DB = "ai_content_verifier_storage_bench"
+
+# Settings are required at import time; the values are never used
+DUMMY_ENV = {
+    "MONGO_URI": "mongodb://localhost:27017",
+    "JWT_SECRET": "benchmark",
+    "HUGGINGFACE_API_KEY": "benchmark",
+}
+
+WORDS = (
+    "model data content verification detection network image video text analysis "
+    "language generated human artificial intelligence result score confidence sample"
+).split()
+
+
+def make_texts(count: int, rng: random.Random) -> List[str]:
+    return [" ".join(rng.choice(WORDS) for _ in range(160))[:1000] for _ in range(count)]
+
+
+def make_docs(args, rng: random.Random) -> List[Dict]:
+    from bson import ObjectId
+
+    users = [ObjectId() for _ in range(args.users)]
+    # Repeat submissions share content, which the compact schema stores once
+    texts = make_texts(max(1, int(args.results * (1 - args.duplicate_rate) / 2)), rng)
+    now = datetime.utcnow()
+    docs = []
+    for i in range(args.results):
+        content_type = rng.choices(["text", "image", "video"], weights=[6, 3, 1])[0]
+        docs.append({
+            "_id": ObjectId(),
+            "user_id": rng.choice(users),
+            "type": content_type,
+            "result": rng.random() < 0.5,
+            "confidence": rng.uniform(0.5, 1.0),
+            "content": rng.choice(texts) if content_type == "text" else None,
+            "timestamp": now - timedelta(seconds=i * 7),
+        })
+    return docs
+
+
+def seed(db, docs: List[Dict], compact: bool, chunk: int = 5000):
+    from pymongo import ASCENDING, DESCENDING
+    from models.result_model import COMPACT_FIELDS, to_storage
+    from services.result_store import CONTENTS_COLLECTION, content_update
+
+    db["results"].drop()
+    db[CONTENTS_COLLECTION].drop()
+    for start in range(0, len(docs), chunk):
+        part = docs[start:start + chunk]
+        if compact:
+            contents = {doc["content"] for doc in part if doc["content"] is not None}
+            if contents:
+                db[CONTENTS_COLLECTION].bulk_write([content_update(c) for c in contents], ordered=False)
+        db["results"].insert_many([to_storage(dict(doc), compact=compact) for doc in part], ordered=False)
+
+    user_field, timestamp_field = "user_id", "timestamp"
+    if compact:
+        user_field, timestamp_field = COMPACT_FIELDS[user_field], COMPACT_FIELDS[timestamp_field]
+    db["results"].create_index([(user_field, ASCENDING), (timestamp_field, DESCENDING)])
+
+
+def collection_stats(db, name: str) -> Dict:
+    stats = db.command("collStats", name)
+    return {
+        "count": stats.get("count", 0),
+        "size_mb": round(stats.get("size", 0) / 1024 ** 2, 2),
+        "storage_mb": round(stats.get("storageSize", 0) / 1024 ** 2, 2),
+        "index_mb": round(stats.get("totalIndexSize", 0) / 1024 ** 2, 2),
+        "avg_obj_bytes": int(stats.get("avgObjSize", 0)),
+    }
+
+
+def time_history(db, users: List, compact: bool, queries: int, include_content: bool, limit: int) -> Dict:
+    from benchmarks.load_test import percentile
+    from models.result_model import COMPACT_FIELDS
+    from services.result_store import CONTENTS_COLLECTION, decompress_content
+
+    user_field, timestamp_field = "user_id", "timestamp"
+    if compact:
+        user_field, timestamp_field = COMPACT_FIELDS[user_field], COMPACT_FIELDS[timestamp_field]
+    projection = None if include_content else {"content": 0}
+
+    latencies = []
+    for user_id in users[:queries]:
+        start = time.perf_counter()
+        page = list(db["results"].find({user_field: user_id}, projection).sort(timestamp_field, -1).limit(limit))
+        if compact and include_content:
+            content_field = COMPACT_FIELDS["content_id"]
+            content_ids = list({doc[content_field] for doc in page if content_field in doc})
+            if content_ids:
+                for content in db[CONTENTS_COLLECTION].find({"_id": {"$in": content_ids}}):
+                    decompress_content(content["codec"], content["body"])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Results collection size and history query latency per schema")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--results", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--duplicate-rate", type=float, default=0.3, help="Share of text results repeating content")
+    parser.add_argument("--queries", type=int, default=200, help="History queries per variant")
+    parser.add_argument("--limit", type=int, default=50, help="Page size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Defaults to benchmarks/results/storage-<commit>.json")
+    args = parser.parse_args()
+
+    for key, value in DUMMY_ENV.items():
+        os.environ.setdefault(key, value)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from pymongo import MongoClient
+    from benchmarks.load_test import git_commit
+    from services.result_store import CONTENTS_COLLECTION
+
+    rng = random.Random(args.seed)
+    docs = make_docs(args, rng)
+    users = list({doc["user_id"] for doc in docs})
+    rng.shuffle(users)
+    users = (users * (args.queries // max(1, len(users)) + 1))[:args.queries]
+
+    client = MongoClient(args.mongo_uri)
+    db = client[SCRATCH_DB]
+    schemas = {}
+    try:
+        for schema in ("verbose", "compact"):
+            compact = schema == "compact"
+            started = time.perf_counter()
+            seed(db, docs, compact)
+            schemas[schema] = {
+                "seed_s": round(time.perf_counter() - started, 2),
+                "results": collection_stats(db, "results"),
+                "contents": collection_stats(db, CONTENTS_COLLECTION) if compact else None,
+                "history": time_history(db, users, compact, args.queries, True, args.limit),
+                "history_without_content": time_history(db, users, compact, args.queries, False, args.limit),
+            }
+    finally:
+        client.drop_database(SCRATCH_DB)
+        client.close()
+
+    for schema, stats in schemas.items():
+        size = stats["results"]["size_mb"] + (stats["contents"]["size_mb"] if stats["contents"] else 0)
+        print(f"{schema:<8} data {size:8.2f} MB  results {stats['results']['size_mb']:8.2f} MB  "
+              f"avg doc {stats['results']['avg_obj_bytes']:5d} B  "
+              f"history p50 {stats['history']['p50_ms']:7.3f} ms  p95 {stats['history']['p95_ms']:7.3f} ms  "
+              f"(no content p50 {stats['history_without_content']['p50_ms']:7.3f} ms)")
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "mongo_uri")},
+        "schemas": schemas,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"storage-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Evaluation harness for the local text triage stage
+Compares local triage verdicts with the full remote model on a labelled set
+and reports, per confidence gate, how many texts would still be escalated and
+how often the locally resolved ones agree with the full model. Also times
+feature extraction and can refit the logistic weights.
+
+The dataset is JSONL with a "text" field and, ideally, the full model's
+"ai_score" (precomputed, or filled in with --score-remote, which calls the
+configured HUGGINGFACE_API_URL/KEY and can save the scores with --save-scores).
+
+Usage (from backend/):
+    python -m benchmarks.triage_eval --dataset texts.jsonl
+    python -m benchmarks.triage_eval --dataset texts.jsonl --score-remote --save-scores scored.jsonl
+    python -m benchmarks.triage_eval --dataset scored.jsonl --fit
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GATES = [0.8, 0.85, 0.9, 0.95, 0.98, 0.99]
+
+
+def load_dataset(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def score_remote(rows: List[Dict], concurrency: int):
+    """Fill in missing ai_score from the full model (triage and dedup off)"""
+    from services.text_detector import detect_ai_text
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def score(row):
+        async with semaphore:
+            detection = await detect_ai_text(row["text"])
+        if "error" not in detection:
+            row["ai_score"] = detection["ai_score"]
+
+    await asyncio.gather(*(score(row) for row in rows if "ai_score" not in row))
+
+
+def evaluate(features, labels, weights, eligible) -> List[Dict]:
+    """Escalation rate and agreement with the full model for every gate"""
+    import numpy as np
+    from services.text_triage import triage_score
+
+    scores = np.array([triage_score(f, weights) for f in features])
+    local_labels = scores > 0.5
+    confidence = np.where(local_labels, scores, 1 - scores)
+    report = []
+    for gate in GATES:
+        resolved = eligible & (confidence >= gate)
+        agreement = float((local_labels[resolved] == labels[resolved]).mean()) if resolved.any() else None
+        report.append({
+            "gate": gate,
+            "escalation_rate": round(1 - float(resolved.mean()), 4),
+            "resolved": int(resolved.sum()),
+            "local_agreement": round(agreement, 4) if agreement is not None else None,
+            # Escalated texts get the full model's verdict, so only local misses count
+            "overall_agreement": round(1 - float((local_labels[resolved] != labels[resolved]).sum()) / len(labels), 4),
+        })
+    return report
+
+
+def fit_weights(features, labels, iterations: int = 5000, learning_rate: float = 0.5, l2: float = 1e-3):
+    """Plain logistic regression by gradient descent on standardized features"""
+    import numpy as np
+
+    mean, std = features.mean(axis=0), features.std(axis=0)
+    std[std == 0] = 1.0
+    x = (features - mean) / std
+    y = labels.astype(np.float64)
+    w = np.zeros(x.shape[1])
+    b = 0.0
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-(x @ w + b)))
+        w -= learning_rate * (x.T @ (p - y) / len(y) + l2 * w)
+        b -= learning_rate * float((p - y).mean())
+    # Fold the standardization back in so the weights apply to raw features
+    raw_w = w / std
+    return np.concatenate([[b - float(mean @ raw_w)], raw_w])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate local text triage against the full model")
+    parser.add_argument("--dataset", required=True, help="JSONL with text and (optionally) ai_score")
+    parser.add_argument("--score-remote", action="store_true", help="Score rows without ai_score remotely")
+    parser.add_argument("--save-scores", default=None, help="Write the dataset with ai_score filled in")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fit", action="store_true", help="Refit weights on 70%% of rows, evaluate on the rest")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    os.environ["TRIAGE_ENABLED"] = "false"
+    os.environ["TEXT_DEDUP_ENABLED"] = "false"
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import numpy as np
+    from core.config import settings
+    from services.text_triage import FEATURES, triage_features, weight_vector, word_count
+
+    rows = load_dataset(args.dataset)
+    if args.score_remote:
+        asyncio.run(score_remote(rows, args.concurrency))
+    if args.save_scores:
+        with open(args.save_scores, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+    rows = [row for row in rows if "ai_score" in row]
+    if not rows:
+        sys.exit("No rows with ai_score; pass --score-remote or a scored dataset")
+
+    timings = []
+    features = []
+    for row in rows:
+        start = time.perf_counter()
+        row_features = triage_features(row["text"])
+        timings.append((time.perf_counter() - start) * 1e6)
+        features.append(row_features if row_features is not None else np.zeros(len(FEATURES)))
+    features = np.array(features)
+    labels = np.array([row["ai_score"] > 0.5 for row in rows])
+    eligible = np.array([word_count(row["text"]) >= settings.TRIAGE_MIN_WORDS for row in rows])
+    timings.sort()
+
+    report = {
+        "rows": len(rows),
+        "ai_share": round(float(labels.mean()), 4),
+        "feature_us": {
+            "median": round(timings[len(timings) // 2], 1),
+            "p99": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 1),
+        },
+        "current_weights": evaluate(features, labels, weight_vector(), eligible),
+    }
+
+    if args.fit:
+        order = np.random.default_rng(0).permutation(len(rows))
+        train, test = order[:int(len(rows) * 0.7)], order[int(len(rows) * 0.7):]
+        fitted = fit_weights(features[train], labels[train])
+        report["fitted_weights"] = dict(zip(["bias"] + FEATURES, [round(float(w), 4) for w in fitted]))
+        report["fitted_holdout"] = evaluate(features[test], labels[test], fitted, eligible[test])
+
+    print(f"{report['rows']} texts, {report['ai_share']:.0%} AI per full model, "
+          f"features median {report['feature_us']['median']} us / p99 {report['feature_us']['p99']} us")
+    sections = [("current weights", report["current_weights"])]
+    if args.fit:
+        sections.append(("fitted weights (holdout)", report["fitted_holdout"]))
+    for title, rows_report in sections:
+        print(f"\n{title}")
+        for entry in rows_report:
+            local = f"{entry['local_agreement']:.1%}" if entry["local_agreement"] is not None else "   -"
+            print(f"  gate {entry['gate']:.2f}  escalated {entry['escalation_rate']:6.1%}  "
+                  f"local agreement {local}  overall {entry['overall_agreement']:.1%}")
+    if args.fit:
+        print(f"\nTRIAGE_WEIGHTS='{json.dumps(report['fitted_weights'])}'")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
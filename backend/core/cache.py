@@ -0,0 +1,72 @@
+from typing import Any, Hashable, Optional
+from collections import OrderedDict
+import hashlib
+import time
+
+from core.config import settings
+from core.metrics import registry, Counter
+
+response_cache_lookups = registry.register(Counter(
+    "response_cache_lookups_total", "Server-side response cache lookups", ["outcome"]
+))
+
+
+class TTLCache:
+    """
+    Small LRU cache whose entries also expire after `ttl` seconds
+    Per worker and in memory; keys should carry whatever versions make an
+    entry stale, the TTL only bounds how long unused entries linger
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            response_cache_lookups.inc(outcome="miss")
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            response_cache_lookups.inc(outcome="expired")
+            return None
+        self._entries.move_to_end(key)
+        response_cache_lookups.inc(outcome="hit")
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag derived from everything that determines a response body"""
+    return '"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 specifies for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+response_cache = TTLCache(settings.RESPONSE_CACHE_TTL, settings.RESPONSE_CACHE_MAX_ENTRIES)
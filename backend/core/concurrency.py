@@ -0,0 +1,184 @@
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
+
+from core.config import settings
+from core.metrics import registry, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# EWMA weights of the recent and baseline latency per key
+SHORT_LATENCY_WEIGHT = 0.2
+LONG_LATENCY_WEIGHT = 0.02
+
+concurrency_limit = registry.register(Gauge(
+    "inference_concurrency_limit", "Adaptive limit on concurrent inference API calls"
+))
+concurrency_in_flight = registry.register(Gauge(
+    "inference_concurrency_in_flight", "Inference API calls holding a slot"
+))
+concurrency_queue_length = registry.register(Gauge(
+    "inference_concurrency_queue_length", "Inference API calls waiting for a slot"
+))
+concurrency_queue_wait = registry.register(Histogram(
+    "inference_concurrency_queue_wait_seconds", "Time inference API calls waited for a slot"
+))
+concurrency_rejections = registry.register(Counter(
+    "inference_concurrency_rejections_total", "Inference API calls refused a slot", ["reason"]
+))
+concurrency_backoffs = registry.register(Counter(
+    "inference_concurrency_backoffs_total", "Limit decreases after overload responses"
+))
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """No slot within the allowed wait, or the queue is full"""
+
+
+class LimiterSlot:
+    """Held for one call; the caller marks overload responses with dropped()"""
+
+    def __init__(self):
+        self.outcome = "success"
+
+    def dropped(self):
+        """429/503/timeout: the upstream is saturated, back off"""
+        self.outcome = "dropped"
+
+    def ignore(self):
+        """Neither a latency sample nor an overload signal (e.g. a cut-short timeout)"""
+        self.outcome = "ignored"
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for calls to one upstream
+    The limit grows by one slot per limit's worth of successful calls while
+    their recent latency stays within INFERENCE_LATENCY_TOLERANCE of its
+    baseline (tracked per key, as models differ), holds when latency drifts
+    up, and is multiplied by INFERENCE_CONCURRENCY_BACKOFF on an overload
+    signal. Only calls started after the previous decrease can cause another,
+    so a burst of failures from one window backs off once. Callers beyond the
+    limit wait in FIFO order, at most INFERENCE_QUEUE_TIMEOUT seconds.
+    Only used from the event loop, so it needs no locking.
+    """
+
+    def __init__(self):
+        self.limit = float(settings.INFERENCE_CONCURRENCY_INITIAL)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latency: Dict[str, Tuple[float, float]] = {}
+        self._last_backoff_at = 0.0
+
+    @property
+    def capacity(self) -> int:
+        if not settings.INFERENCE_CONCURRENCY_ENABLED:
+            return settings.INFERENCE_CONCURRENCY_MAX
+        return max(settings.INFERENCE_CONCURRENCY_MIN, int(self.limit))
+
+    @property
+    def queue_length(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def _acquire(self, timeout: float):
+        if self.in_flight < self.capacity and not self._waiters:
+            self.in_flight += 1
+            return
+        if self.queue_length >= settings.INFERENCE_QUEUE_MAX:
+            concurrency_rejections.inc(reason="queue_full")
+            raise ConcurrencyLimitExceeded(f"{self.queue_length} inference calls already queued")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we gave up; pass the slot on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                concurrency_rejections.inc(reason="queue_timeout")
+                raise ConcurrencyLimitExceeded(f"No inference slot within {timeout:.1f}s")
+            raise
+        finally:
+            concurrency_queue_wait.observe(time.monotonic() - started)
+
+    def _wake(self):
+        """Hand free slots to waiters in arrival order"""
+        while self._waiters and self.in_flight < self.capacity:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue  # Timed out or cancelled
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _release(self, key: str, slot: LimiterSlot, started: float):
+        latency = time.monotonic() - started
+        saturated = self.in_flight >= self.capacity / 2  # Only grow when the limit is actually in use
+        self.in_flight -= 1
+
+        if slot.outcome == "dropped":
+            if started >= self._last_backoff_at:
+                previous = self.limit
+                self.limit = max(
+                    float(settings.INFERENCE_CONCURRENCY_MIN),
+                    self.limit * settings.INFERENCE_CONCURRENCY_BACKOFF
+                )
+                self._last_backoff_at = time.monotonic()
+                concurrency_backoffs.inc()
+                logger.info(f"Inference concurrency limit {previous:.1f} -> {self.limit:.1f} after overload")
+        elif slot.outcome == "success":
+            short, long = self._latency.get(key, (latency, latency))
+            short += SHORT_LATENCY_WEIGHT * (latency - short)
+            long += LONG_LATENCY_WEIGHT * (latency - long)
+            self._latency[key] = (short, long)
+            if saturated and short <= long * settings.INFERENCE_LATENCY_TOLERANCE:
+                self.limit = min(float(settings.INFERENCE_CONCURRENCY_MAX), self.limit + 1 / self.limit)
+
+        self._wake()
+
+    @asynccontextmanager
+    async def acquire(self, key: str, timeout: Optional[float] = None) -> AsyncIterator[LimiterSlot]:
+        """
+        Hold a slot for one call to `key` (the model), waiting up to `timeout`
+        seconds (default INFERENCE_QUEUE_TIMEOUT) for one
+        Raises ConcurrencyLimitExceeded if none frees up in time. Exceptions
+        from the call count as neither success nor overload unless the slot
+        was marked dropped.
+        """
+        if timeout is None:
+            timeout = settings.INFERENCE_QUEUE_TIMEOUT
+        await self._acquire(timeout)
+        slot = LimiterSlot()
+        started = time.monotonic()
+        try:
+            yield slot
+        except BaseException:
+            if slot.outcome == "success":
+                slot.ignore()
+            raise
+        finally:
+            self._release(key, slot, started)
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "enabled": settings.INFERENCE_CONCURRENCY_ENABLED,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queue_length,
+        }
+
+
+inference_limiter = AdaptiveLimiter()
+registry.add_collector(lambda: [
+    concurrency_limit.set(inference_limiter.capacity),
+    concurrency_in_flight.set(inference_limiter.in_flight),
+    concurrency_queue_length.set(inference_limiter.queue_length),
+])
@@ -8,8 +8,148 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION: int = 86400  # 24 hours in seconds
     HUGGINGFACE_API_KEY: str
+    HUGGINGFACE_API_URL: str = "https://api-inference.huggingface.co/models"
+    TEXT_INFERENCE_TIMEOUT: float = 60.0  # Seconds
+    IMAGE_INFERENCE_TIMEOUT: float = 90.0  # Seconds
+
+    # End-to-end request deadlines (clients may lower them with X-Request-Timeout)
+    TEXT_REQUEST_DEADLINE: float = 90.0  # Seconds
+    IMAGE_REQUEST_DEADLINE: float = 120.0
+    VIDEO_REQUEST_DEADLINE: float = 300.0
+    MAX_REQUEST_DEADLINE: float = 300.0
+    DEADLINE_GRACE: float = 1.0  # Extra time for stages to wind down before a hard cancel
+
+    # Per-user rate limits: type -> [requests per minute, burst]
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "mongo" (shared)
+    RATE_LIMITS: dict = {"text": [30, 10], "image": [10, 5], "video": [2, 2]}
+
+    # Upload validation: oversized or disguised uploads are refused before they are read
+    UPLOAD_LIMITS: dict = {"text": 1024 * 1024, "image": 10 * 1024 * 1024, "video": 100 * 1024 * 1024}  # Bytes
+    UPLOAD_READ_CHUNK_SIZE: int = 64 * 1024
+    IMAGE_MAX_PIXELS: int = 40_000_000  # Checked from the header, before decoding (decompression bombs)
+
+    # Fair-share scheduling of detection work
+    SCHEDULER_SLOTS: int = 8  # Concurrent detections per worker
+    SCHEDULER_MAX_QUEUE: int = 100
+    SCHEDULER_WEIGHTS: dict = {"text": 4.0, "image": 2.0, "video": 1.0}
+
+    # Ensemble scoring: query all models concurrently instead of a fallback chain
+    ENSEMBLE_MODE: bool = False
+    ENSEMBLE_DEADLINE: float = 30.0  # Seconds; late models are dropped
+    TEXT_MODEL_WEIGHTS: dict = {}  # Model name -> weight (default 1.0, 0 disables)
+    IMAGE_MODEL_WEIGHTS: dict = {}
+
+    # Tiled mode: score large images as native-resolution crops instead of downsizing
+    IMAGE_TILED_MODE: bool = False
+    IMAGE_TILED_MIN_SIDE: int = 1536  # Smaller images are scored whole
+    IMAGE_TILE_SIZE: int = 512
+    IMAGE_MAX_TILES: int = 6  # Most textured tiles scored per image
+
+    # Perceptual-hash index: near-duplicate images and frames reuse prior verdicts
+    IMAGE_HASH_INDEX_ENABLED: bool = True
+    PHASH_MAX_DISTANCE: int = 6  # Max differing bits out of 64
+    DHASH_MAX_DISTANCE: int = 10
+    IMAGE_HASH_INDEX_MAX_ENTRIES: int = 100000  # Hashes kept in memory per worker; oldest go first
+    IMAGE_HASH_RETENTION_DAYS: int = 90  # Stored hashes expire after this (TTL index)
+
+    # MinHash/LSH index: near-duplicate text reuses prior verdicts
+    TEXT_DEDUP_ENABLED: bool = True
+    TEXT_DEDUP_THRESHOLD: float = 0.8  # Min estimated Jaccard similarity of word shingles
+    TEXT_SHINGLE_SIZE: int = 5  # Words per shingle
+    TEXT_DEDUP_BANDS: int = 32  # LSH bands over the 128-value signature
+    TEXT_DEDUP_MAX_MATCHES: int = 5  # Matches blended into one verdict
+    TEXT_DEDUP_MAX_ENTRIES: int = 50000  # Signatures kept in memory per worker (~1 KB each); oldest go first
+    TEXT_DEDUP_RETENTION_DAYS: int = 90  # Stored signatures expire after this (TTL index)
+
+    # Local triage: resolve clear-cut texts without remote inference
+    TRIAGE_ENABLED: bool = False  # Calibrate TRIAGE_WEIGHTS with benchmarks/triage_eval.py first
+    TRIAGE_CONFIDENCE_GATE: float = 0.95  # Local verdicts below this confidence escalate
+    TRIAGE_MIN_WORDS: int = 80
+    TRIAGE_WEIGHTS: dict = {}  # Feature name (or "bias") -> logistic weight override
+
+    # Video frame pipeline
+    VIDEO_FRAME_QUEUE_SIZE: int = 4  # Decoded frames held ahead of inference
+    VIDEO_INFERENCE_WORKERS: int = 2  # Concurrent frame inference calls
+    VIDEO_ADAPTIVE_SAMPLING: bool = True  # Stop sampling once the verdict is statistically settled
+    VIDEO_MIN_FRAMES: int = 4  # Frames scored before stopping early is considered
+    VIDEO_BASE_FRAME_BUDGET: int = 8  # Max frames for short videos
+    VIDEO_FRAMES_PER_MINUTE: float = 4.0  # Longer videos get a larger budget ...
+    VIDEO_MAX_FRAMES: int = 32  # ... up to this
+    VIDEO_CONFIDENCE_Z: float = 1.96  # Interval width for the stopping rule (95%)
+    VIDEO_SCORE_SIGMA_FLOOR: float = 0.1
+    VIDEO_FRAME_STORE_ENABLED: bool = True  # Keep per-frame scores so re-analysis only scores new frames
+    VIDEO_FRAME_RETENTION_DAYS: int = 90  # Stored frame scores expire this long after the last analysis
     ENVIRONMENT: str = "development"
     CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:5173"]
+    PRELOAD_DETECTORS: bool = False  # Import detection services at startup instead of first use
+    RESPONSE_COMPRESSION: bool = True  # gzip, or brotli when brotli-asgi is installed
+    COMPRESSION_MIN_SIZE: int = 1000  # Bytes; smaller responses are sent as is
+    RESPONSE_CACHE_TTL: float = 30.0  # Seconds; 0 disables the results/stats response cache
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    METRICS_TOKEN: str = ""  # Bearer token required on /metrics; empty leaves it open (expose it internally only)
+
+    # Tracing: per-request spans exported to a JSONL file or an OTLP/HTTP collector
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 1.0  # Share of new traces recorded; an incoming traceparent decides for its trace
+    TRACE_EXPORTER: str = "file"  # "file" or "otlp"
+    TRACE_FILE_PATH: str = "traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318"  # Collector base URL; spans are posted to /v1/traces
+    TRACE_SERVICE_NAME: str = "ai-content-verifier-api"
+    TRACE_EXPORT_INTERVAL: float = 2.0  # Seconds
+    TRACE_MAX_QUEUE: int = 10000  # Finished spans waiting for export; more are dropped
+
+    # Graceful shutdown and outbound HTTP
+    SHUTDOWN_GRACE_PERIOD: float = 30.0  # Seconds to wait for in-flight requests and background tasks
+    DRAIN_RETRY_AFTER: int = 5  # Retry-After (seconds) on detections refused while draining
+    DRAIN_DELAY: float = 10.0  # Seconds between SIGTERM and shutdown, while /ready fails
+    HTTP_MAX_CONNECTIONS: int = 100  # Shared Hugging Face client pool
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+
+    # Adaptive concurrency limit on Hugging Face calls (per worker, AIMD)
+    INFERENCE_CONCURRENCY_ENABLED: bool = True  # Off: a fixed limit of INFERENCE_CONCURRENCY_MAX
+    INFERENCE_CONCURRENCY_INITIAL: int = 8
+    INFERENCE_CONCURRENCY_MIN: int = 1
+    INFERENCE_CONCURRENCY_MAX: int = 64  # Keep at or below HTTP_MAX_CONNECTIONS
+    INFERENCE_CONCURRENCY_BACKOFF: float = 0.7  # Limit multiplier on 429/503/timeout
+    INFERENCE_LATENCY_TOLERANCE: float = 1.5  # Stop growing once recent latency exceeds baseline by this factor
+    INFERENCE_QUEUE_TIMEOUT: float = 10.0  # Max seconds a call waits for a slot (also capped by its deadline)
+    INFERENCE_QUEUE_MAX: int = 256  # Calls queued beyond this are refused at once
+
+    # Admin diagnostics: sampling profiler and tracemalloc endpoints under /api/admin
+    ADMIN_EMAILS: list = []  # Users allowed to call them; empty disables the endpoints
+    PROFILER_MAX_SECONDS: float = 300.0
+    PROFILER_DEFAULT_INTERVAL_MS: float = 5.0
+
+    # MongoDB connection pool and read routing
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_CONNECT_TIMEOUT_MS: int = 20000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None  # Max wait for a pooled connection
+    MONGO_COMPRESSORS: str = ""  # e.g. "zstd,snappy,zlib"
+    MONGO_READ_PREFERENCE: str = "primary"
+    MONGO_RESULTS_READ_PREFERENCE: str = "primary"  # Timelines, stored frames and rollups; cached history/stats read the primary
+    MONGO_MAX_STALENESS_SECONDS: int = -1  # -1 = no bound, otherwise >= 90
+
+    # Compact results schema: short keys, content deduplicated in result_contents
+    RESULTS_COMPACT_SCHEMA: bool = False  # Migrate with scripts/migrate_results_schema.py
+    RESULT_CONTENT_COMPRESSION_LEVEL: int = 9  # zstd if installed, else zlib (capped at 9)
+
+    # Write-behind buffer for detection results
+    RESULT_WRITE_BEHIND: bool = True
+    RESULT_BUFFER_MAX_SIZE: int = 1000  # Queued docs before falling back to sync writes
+    RESULT_FLUSH_BATCH_SIZE: int = 100
+    RESULT_FLUSH_INTERVAL: float = 0.5  # Seconds
+
+    # Time-series rollups of detection results
+    ROLLUPS_ENABLED: bool = True
+    ROLLUP_HISTOGRAM_BINS: int = 10  # Confidence histogram bins over [0, 1]
+    ROLLUP_COMPACTION_INTERVAL: int = 3600  # Seconds between rebuilds, 0 disables
+    ROLLUP_COMPACTION_WINDOW_HOURS: int = 48
+    ROLLUP_COMPACTION_SETTLE: int = 300  # Seconds after a bucket ends before compaction may rebuild it
     
     class Config:
         env_file = ".env"
@@ -1,10 +1,111 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from pymongo import monitoring
+from pymongo.errors import OperationFailure
+from pymongo.read_preferences import (
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+    Nearest,
+)
+from typing import Optional, Dict, Any
 from core.config import settings
+from core.metrics import registry, Gauge
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool utilization and checkout waits per server"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: Dict[str, Dict[str, Any]] = {}
+
+    def _server(self, address) -> Dict[str, Any]:
+        key = f"{address[0]}:{address[1]}"
+        if key not in self._servers:
+            self._servers[key] = {
+                "connections": 0,
+                "checked_out": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "checkout_wait_total_ms": 0.0,
+                "checkout_wait_max_ms": 0.0,
+            }
+        return self._servers[key]
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._servers.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._server(event.address)["connections"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["connections"] = max(0, server["connections"] - 1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._server(event.address)["checkout_failures"] += 1
+
+    def connection_checked_out(self, event):
+        # Checkout durations are reported by pymongo >= 4.9
+        duration = getattr(event, "duration", None)
+        with self._lock:
+            server = self._server(event.address)
+            server["checked_out"] += 1
+            server["checkouts"] += 1
+            if duration is not None:
+                wait_ms = duration * 1000
+                server["checkout_wait_total_ms"] += wait_ms
+                server["checkout_wait_max_ms"] = max(server["checkout_wait_max_ms"], wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["checked_out"] = max(0, server["checked_out"] - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            servers = {}
+            for key, server in self._servers.items():
+                stats = dict(server)
+                stats["utilization"] = round(server["checked_out"] / settings.MONGO_MAX_POOL_SIZE, 4)
+                stats["checkout_wait_avg_ms"] = round(
+                    server["checkout_wait_total_ms"] / server["checkouts"], 3
+                ) if server["checkouts"] else 0.0
+                servers[key] = stats
+        return {"max_pool_size": settings.MONGO_MAX_POOL_SIZE, "servers": servers}
+
 
 class MongoDB:
     client: Optional[AsyncIOMotorClient] = None
@@ -12,12 +113,71 @@ class MongoDB:
 
 
 mongodb = MongoDB()
+pool_monitor = PoolMonitor()
+
+mongo_pool_connections = registry.register(Gauge(
+    "mongo_pool_connections", "Open pooled connections per server", ["server"]
+))
+mongo_pool_checked_out = registry.register(Gauge(
+    "mongo_pool_checked_out", "Connections currently checked out per server", ["server"]
+))
+mongo_pool_utilization = registry.register(Gauge(
+    "mongo_pool_utilization", "Checked-out connections as a fraction of maxPoolSize", ["server"]
+))
+mongo_pool_checkout_wait_avg = registry.register(Gauge(
+    "mongo_pool_checkout_wait_avg_seconds", "Mean wait to check out a connection", ["server"]
+))
+mongo_pool_checkout_failures = registry.register(Gauge(
+    "mongo_pool_checkout_failures", "Failed connection checkouts per server", ["server"]
+))
+
+
+def _collect_pool_metrics():
+    for server, stats in pool_monitor.snapshot()["servers"].items():
+        mongo_pool_connections.set(stats["connections"], server=server)
+        mongo_pool_checked_out.set(stats["checked_out"], server=server)
+        mongo_pool_utilization.set(stats["utilization"], server=server)
+        mongo_pool_checkout_wait_avg.set(stats["checkout_wait_avg_ms"] / 1000, server=server)
+        mongo_pool_checkout_failures.set(stats["checkout_failures"], server=server)
+
+
+registry.add_collector(_collect_pool_metrics)
+
+
+def build_read_preference(mode: str):
+    """Build a read preference, applying the staleness bound to non-primary modes"""
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=settings.MONGO_MAX_STALENESS_SECONDS)
+
+
+def _client_options() -> Dict[str, Any]:
+    """Translate settings into AsyncIOMotorClient keyword options"""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "read_preference": build_read_preference(settings.MONGO_READ_PREFERENCE),
+        "event_listeners": [pool_monitor],
+    }
+    if settings.MONGO_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+    if settings.MONGO_SOCKET_TIMEOUT_MS is not None:
+        options["socketTimeoutMS"] = settings.MONGO_SOCKET_TIMEOUT_MS
+    if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS is not None:
+        options["waitQueueTimeoutMS"] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    return options
 
 
 async def connect_to_mongo():
     """Create database connection"""
     try:
-        mongodb.client = AsyncIOMotorClient(settings.MONGO_URI)
+        mongodb.client = AsyncIOMotorClient(settings.MONGO_URI, **_client_options())
         mongodb.database = mongodb.client.get_database("ai_content_verifier")
         logger.info("Connected to MongoDB")
     except Exception as e:
@@ -36,3 +196,32 @@ def get_database():
     """Get database instance"""
     return mongodb.database
 
+
+def get_read_collection(name: str):
+    """Get a collection for read-heavy history/stats queries (may be routed to secondaries)"""
+    return mongodb.database.get_collection(
+        name,
+        read_preference=build_read_preference(settings.MONGO_RESULTS_READ_PREFERENCE)
+    )
+
+
+async def ensure_ttl_index(collection, field: str, expire_after_seconds: int):
+    """
+    Ascending TTL index on `field`; documents expire that many seconds after it
+    The server rejects a create_index that only changes expireAfterSeconds, so
+    a changed retention setting is applied to the existing index with collMod
+    """
+    try:
+        await collection.create_index(field, expireAfterSeconds=expire_after_seconds)
+    except OperationFailure as e:
+        if e.code != 85:  # IndexOptionsConflict
+            raise
+        await collection.database.command(
+            "collMod", collection.name,
+            index={"keyPattern": {field: 1}, "expireAfterSeconds": expire_after_seconds}
+        )
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get connection pool utilization and checkout-wait metrics"""
+    return pool_monitor.snapshot()
@@ -0,0 +1,109 @@
+from typing import Any, Awaitable, Callable
+from fastapi import HTTPException, Request, Response, status
+import asyncio
+import logging
+import math
+import time
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_HEADER = "X-Request-Timeout"
+CLIENT_CLOSED_REQUEST = 499  # nginx convention; the client never sees it
+DISCONNECT_POLL_INTERVAL = 0.5  # Seconds
+
+
+class Deadline:
+    """Time budget for one request, shared by every stage that works on it"""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    @classmethod
+    def unbounded(cls) -> "Deadline":
+        return cls(math.inf)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """Per-call timeout: the stage's own limit or whatever budget is left, if smaller"""
+        return min(default, self.remaining())
+
+
+def request_deadline(kind: str) -> Callable[[Request, Response], Deadline]:
+    """
+    Dependency creating the request's Deadline
+    Uses the route default for `kind` unless the client asks for a budget via
+    the X-Request-Timeout header (seconds), capped at MAX_REQUEST_DEADLINE
+    """
+    default = {
+        "text": settings.TEXT_REQUEST_DEADLINE,
+        "image": settings.IMAGE_REQUEST_DEADLINE,
+        "video": settings.VIDEO_REQUEST_DEADLINE,
+    }[kind]
+
+    def dependency(request: Request, response: Response) -> Deadline:
+        budget = default
+        header = request.headers.get(DEADLINE_HEADER)
+        if header:
+            try:
+                budget = float(header)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"{DEADLINE_HEADER} must be a number of seconds"
+                )
+            if budget <= 0:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"{DEADLINE_HEADER} must be positive"
+                )
+        budget = min(budget, settings.MAX_REQUEST_DEADLINE)
+        response.headers[DEADLINE_HEADER] = f"{budget:g}"
+        return Deadline(budget)
+
+    return dependency
+
+
+async def _wait_for_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def run_with_deadline(request: Request, work: Awaitable[Any], deadline: Deadline) -> Any:
+    """
+    Run `work`, cancelling it if the client disconnects or the deadline passes
+    Stages are expected to respect the deadline themselves; the hard cancel
+    here (after a short grace period) is a backstop.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.create_task(_wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait(
+            {task, watcher},
+            timeout=deadline.remaining() + settings.DEADLINE_GRACE,
+            return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    if task in done:
+        return task.result()
+    if watcher in done:
+        logger.info("Client disconnected, cancelled detection")
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    logger.warning(f"Detection exceeded its {deadline.budget:g}s deadline, cancelled")
+    raise HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail=f"Detection exceeded the {deadline.budget:g}s request deadline"
+    )
@@ -0,0 +1,170 @@
+from typing import Callable, Dict, List
+from collections import Counter
+import asyncio
+import logging
+import signal
+import threading
+import time
+
+from core.config import settings
+from core.metrics import registry, Gauge, Counter as MetricCounter
+from core.uploads import DETECT_ROUTES
+
+logger = logging.getLogger(__name__)
+
+in_flight_requests = registry.register(Gauge(
+    "in_flight_requests", "Requests being handled, by detection type (other for the rest)", ["type"]
+))
+drain_rejections = registry.register(MetricCounter(
+    "drain_rejected_requests_total", "Detection requests refused while draining", ["type"]
+))
+
+
+class Lifecycle:
+    """
+    In-flight work accounting and drain mode for graceful shutdown
+    While draining, /ready fails so load balancers stop routing here and new
+    detection requests get 503, but requests already running finish.
+    Shutdown waits (up to SHUTDOWN_GRACE_PERIOD) for them and for tracked
+    background tasks before clients are closed.
+    """
+
+    def __init__(self):
+        self.draining = False
+        self.drain_started_at = 0.0
+        self.in_flight: Counter = Counter()
+        self._tasks: set = set()
+        self._shutdown_hooks: List[Callable[[], None]] = []
+
+    def begin_drain(self):
+        if not self.draining:
+            self.draining = True
+            self.drain_started_at = time.monotonic()
+            logger.info(f"Draining: {sum(self.in_flight.values())} requests in flight, "
+                        f"{len(self._tasks)} background tasks")
+
+    def track_task(self, task: asyncio.Task) -> asyncio.Task:
+        """Keep a fire-and-forget task alive and have shutdown wait for it"""
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def on_shutdown(self, hook: Callable[[], None]):
+        """Run `hook` once in-flight work is done or abandoned (e.g. removing temp files)"""
+        self._shutdown_hooks.append(hook)
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Wait for in-flight requests, then background tasks; False if the timeout ran out first"""
+        deadline = time.monotonic() + timeout
+        while sum(self.in_flight.values()) > 0:
+            if time.monotonic() >= deadline:
+                logger.warning(f"Shutdown grace period over with {dict(+self.in_flight)} requests in flight")
+                return False
+            await asyncio.sleep(0.1)
+
+        if self._tasks:
+            remaining = max(0.0, deadline - time.monotonic())
+            _, pending = await asyncio.wait(set(self._tasks), timeout=remaining)
+            if pending:
+                logger.warning(f"Cancelling {len(pending)} background tasks after the grace period")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                return False
+        return True
+
+    def run_shutdown_hooks(self):
+        for hook in self._shutdown_hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Shutdown hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "draining": self.draining,
+            "in_flight": dict(+self.in_flight),
+            "background_tasks": len(self._tasks),
+        }
+
+
+lifecycle = Lifecycle()
+registry.add_collector(lambda: [
+    in_flight_requests.set(lifecycle.in_flight[kind], type=kind)
+    for kind in (*DETECT_ROUTES.values(), "other")
+])
+
+_handover_tasks: set = set()
+
+
+def install_sigterm_drain():
+    """
+    Start draining as soon as SIGTERM arrives, and only pass the signal on to
+    the server's own handler DRAIN_DELAY seconds later
+    Uvicorn stops accepting connections on SIGTERM and runs the lifespan
+    shutdown only after that, too late for /ready to take the worker out of
+    the load balancer. A second SIGTERM, or one after POST /api/admin/drain,
+    hands over at once. Does nothing off the main thread or when no
+    Python-level handler is installed (not running under uvicorn >= 0.29).
+    Returns a function that restores the previous handler.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return lambda: None
+    loop = asyncio.get_running_loop()
+
+    async def hand_over(signum, frame):
+        await asyncio.sleep(settings.DRAIN_DELAY)
+        previous(signum, frame)
+
+    def on_sigterm(signum, frame):
+        if lifecycle.draining:
+            previous(signum, frame)
+            return
+        lifecycle.begin_drain()
+        logger.info(f"SIGTERM received, shutting down in {settings.DRAIN_DELAY:g}s")
+        # Not tracked: shutdown must not wait for it after a second SIGTERM
+        loop.call_soon_threadsafe(lambda: _handover_tasks.add(loop.create_task(hand_over(signum, frame))))
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    return lambda: signal.signal(signal.SIGTERM, previous)
+
+
+class InFlightMiddleware:
+    """
+    Counts requests while they run and refuses new detection requests when draining
+    Refused requests get 503 with Retry-After and Connection: close, so clients
+    retry against another instance.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        kind = DETECT_ROUTES.get(scope["path"].rstrip("/"))
+        if kind is not None and lifecycle.draining:
+            drain_rejections.inc(type=kind)
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(settings.DRAIN_RETRY_AFTER).encode()),
+                    (b"connection", b"close"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b'{"detail":"Server is shutting down"}'})
+            return
+
+        label = kind or "other"
+        lifecycle.in_flight[label] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lifecycle.in_flight[label] -= 1
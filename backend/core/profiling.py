@@ -0,0 +1,236 @@
+from typing import Any, Dict, List, Optional
+from collections import Counter
+from types import CodeType
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SITE_PACKAGES = f"{os.sep}site-packages{os.sep}"
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to the backend or site-packages, for readable frame labels"""
+    path = os.path.abspath(filename)
+    if path.startswith(BACKEND_DIR + os.sep):
+        return os.path.relpath(path, BACKEND_DIR)
+    if _SITE_PACKAGES in path:
+        return path.split(_SITE_PACKAGES, 1)[1]
+    return os.path.basename(filename)
+
+
+def module_group(filename: str) -> str:
+    """
+    Top-level bucket of a source file: the backend package it belongs to
+    (services, routers, core, ...), the third-party distribution, or stdlib
+    """
+    if filename.startswith("<frozen"):
+        return "stdlib"
+    if filename.startswith("<"):
+        return "<other>"
+    path = os.path.abspath(filename)
+    if path.startswith(BACKEND_DIR + os.sep):
+        top = os.path.relpath(path, BACKEND_DIR).split(os.sep)[0]
+        return top[:-3] if top.endswith(".py") else top
+    if _SITE_PACKAGES in path:
+        return path.split(_SITE_PACKAGES, 1)[1].split(os.sep)[0]
+    return "stdlib"
+
+
+class SamplingProfiler:
+    """
+    In-process wall-clock sampler
+    A daemon thread walks sys._current_frames() every `interval` seconds and
+    counts each thread's stack in collapsed form ("thread;outer;...;inner"),
+    the input format of flamegraph.pl and speedscope. Costs nothing until
+    started and stops itself after the requested duration. The event loop
+    thread only shows the coroutine that is running when sampled; idle time
+    appears as the selector's select().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[CodeType, str] = {}
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.interval = 0.0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval: float):
+        with self._lock:
+            if self.running:
+                raise ProfilerBusy("Profiler is already running")
+            self._stop.clear()
+            self.samples = Counter()
+            self.sample_count = 0
+            self.interval = interval
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._thread = threading.Thread(
+                target=self._run, args=(seconds, interval), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+        logger.info(f"Sampling profiler started for {seconds:g}s at {interval * 1000:g}ms intervals")
+
+    def join(self):
+        """Block until the current run, if any, has finished"""
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def stop(self):
+        self._stop.set()
+        self.join()
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _run(self, seconds: float, interval: float):
+        own_ident = threading.get_ident()
+        ends_at = time.monotonic() + seconds
+        try:
+            while not self._stop.wait(interval) and time.monotonic() < ends_at:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_ident:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(self._label(frame.f_code))
+                        frame = frame.f_back
+                    stack.append(names.get(ident, f"thread-{ident}"))
+                    self.samples[";".join(reversed(stack))] += 1
+                self.sample_count += 1
+        finally:
+            self.stopped_at = time.time()
+            self._labels.clear()
+            logger.info(f"Sampling profiler stopped after {self.sample_count} samples")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "samples": self.sample_count,
+            "interval_ms": self.interval * 1000,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+    def collapsed(self) -> str:
+        """One "stack count" line per distinct stack, most frequent first"""
+        samples = dict(self.samples)  # Snapshot; the sampler thread may still be adding to it
+        return "\n".join(
+            f"{stack} {count}" for stack, count in sorted(samples.items(), key=lambda item: -item[1])
+        ) + "\n"
+
+
+class MemoryTracker:
+    """
+    tracemalloc snapshots and diffs grouped by module
+    Tracing is only on between start() and stop(), so there is no allocation
+    overhead otherwise. snapshot() records a baseline; diff() compares the
+    current heap with it.
+    """
+
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1):
+        if not self.tracing:
+            tracemalloc.start(frames)
+            logger.info(f"tracemalloc started ({frames} frames per allocation)")
+        self.baseline = None
+
+    def stop(self):
+        self.baseline = None
+        if self.tracing:
+            tracemalloc.stop()
+            logger.info("tracemalloc stopped")
+
+    def _take(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        """Current heap by module, which also becomes the baseline for diff()"""
+        snapshot = self._take()
+        self.baseline = snapshot
+        groups: Dict[str, Dict[str, int]] = {}
+        for stat in snapshot.statistics("filename"):
+            group = groups.setdefault(module_group(stat.traceback[0].filename), {"size": 0, "count": 0})
+            group["size"] += stat.size
+            group["count"] += stat.count
+        return {
+            "traced_memory": tracemalloc.get_traced_memory()[0],
+            "groups": _sorted_groups(groups, "size"),
+            "top_lines": [_line_stat(stat) for stat in snapshot.statistics("lineno")[:top]],
+        }
+
+    def diff(self, top: int = 20) -> Dict[str, Any]:
+        """Growth since the last snapshot(), by module and by source line"""
+        current = self._take()
+        groups: Dict[str, Dict[str, int]] = {}
+        for stat in current.compare_to(self.baseline, "filename"):
+            group = groups.setdefault(
+                module_group(stat.traceback[0].filename),
+                {"size": 0, "size_diff": 0, "count": 0, "count_diff": 0}
+            )
+            group["size"] += stat.size
+            group["size_diff"] += stat.size_diff
+            group["count"] += stat.count
+            group["count_diff"] += stat.count_diff
+        return {
+            "traced_memory": tracemalloc.get_traced_memory()[0],
+            "groups": _sorted_groups(groups, "size_diff"),
+            "top_lines": [_line_stat(stat) for stat in current.compare_to(self.baseline, "lineno")[:top]],
+        }
+
+
+def _sorted_groups(groups: Dict[str, Dict[str, int]], key: str) -> List[Dict[str, Any]]:
+    return [
+        {"module": name, **values}
+        for name, values in sorted(groups.items(), key=lambda item: abs(item[1][key]), reverse=True)
+    ]
+
+
+def _line_stat(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    entry = {
+        "line": f"{_short_path(frame.filename)}:{frame.lineno}",
+        "module": module_group(frame.filename),
+        "size": stat.size,
+        "count": stat.count,
+    }
+    if isinstance(stat, tracemalloc.StatisticDiff):
+        entry["size_diff"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+profiler = SamplingProfiler()
+memory_tracker = MemoryTracker()
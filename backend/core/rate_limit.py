@@ -0,0 +1,103 @@
+from typing import Dict, Tuple
+from pymongo import ReturnDocument
+import logging
+import time
+
+from core.config import settings
+from core.database import get_database
+from core.metrics import registry, Counter
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITS_COLLECTION = "rate_limits"
+BUCKET_SWEEP_INTERVAL = 60.0  # Seconds between drops of refilled in-memory buckets
+
+rate_limited_requests = registry.register(Counter(
+    "rate_limited_requests_total", "Requests rejected with 429 by the per-user rate limiter", ["type"]
+))
+
+
+class InMemoryRateLimiter:
+    """
+    Token buckets held in this worker's memory (per-worker limits)
+    A missing bucket is a full one, so buckets that have refilled are dropped
+    by a sweep every BUCKET_SWEEP_INTERVAL seconds and memory stays bounded by
+    the keys active within one refill period
+    """
+
+    def __init__(self):
+        # key -> (tokens, updated_at, full_at)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._next_sweep = time.monotonic() + BUCKET_SWEEP_INTERVAL
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _sweep(self, now: float):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        self._next_sweep = now + BUCKET_SWEEP_INTERVAL
+
+    async def acquire(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens; returns 0 if allowed, otherwise seconds until enough refill"""
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill_per_second)
+        if allowed:
+            return 0.0
+        return (cost - tokens) / refill_per_second
+
+
+class MongoRateLimiter:
+    """
+    Token buckets shared by all workers
+    Refill and take happen in one atomic pipeline update against the server
+    clock, so concurrent workers can't both spend the last token.
+    """
+
+    async def acquire(self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0) -> float:
+        rate_limits_collection = get_database()[RATE_LIMITS_COLLECTION]
+        elapsed_seconds = {"$divide": [
+            {"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000
+        ]}
+        bucket = await rate_limits_collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {
+                    "tokens": {"$min": [capacity, {"$add": [
+                        {"$ifNull": ["$tokens", capacity]},
+                        {"$multiply": [elapsed_seconds, refill_per_second]},
+                    ]}]},
+                    "updated_at": "$$NOW",
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if bucket["allowed"]:
+            return 0.0
+        return (cost - bucket["tokens"]) / refill_per_second
+
+
+async def ensure_rate_limit_indexes():
+    """Expire idle buckets (a full bucket carries no state worth keeping)"""
+    if settings.RATE_LIMIT_BACKEND != "mongo":
+        return
+    rate_limits_collection = get_database()[RATE_LIMITS_COLLECTION]
+    await rate_limits_collection.create_index("updated_at", expireAfterSeconds=24 * 3600)
+
+
+def create_rate_limiter():
+    if settings.RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimiter()
+    return InMemoryRateLimiter()
+
+
+rate_limiter = create_rate_limiter()
@@ -0,0 +1,215 @@
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import bson
+import asyncio
+import logging
+
+from core.config import settings
+from core.database import get_database
+from core.metrics import registry, Gauge, Counter
+from core.tracing import start_span, current_span
+from services.analytics import record_results
+from services.result_store import store_contents, bump_results_versions
+from models.result_model import to_storage
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+FLUSH_RETRIES = 3
+
+result_buffer_size = registry.register(Gauge(
+    "result_buffer_size", "Result documents waiting in the write-behind buffer"
+))
+result_sync_fallbacks = registry.register(Counter(
+    "result_buffer_sync_writes_total", "Results written synchronously because the buffer was full"
+))
+results_dropped = registry.register(Counter(
+    "result_buffer_dropped_total", "Buffered results that could not be written"
+))
+
+
+class ResultWriter:
+    """
+    Write-behind buffer for detection results
+    Documents get a client-side ObjectId and are queued, then flushed in the
+    background with unordered insert_many once the batch size or flush
+    interval is reached. When the buffer is full (or not running) documents
+    are written synchronously instead. Documents use full field names until
+    they are converted to the storage schema on write.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Event] = None
+        # Result id -> (trace_id, span_id) of the request that submitted it, so
+        # the background flush span can link back to the traced requests
+        self._trace_links: Dict[ObjectId, Tuple[str, str]] = {}
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._closing.is_set()
+
+    async def start(self):
+        """Start the background flush task"""
+        if not settings.RESULT_WRITE_BEHIND or self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.RESULT_BUFFER_MAX_SIZE)
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Result write-behind buffer started")
+
+    async def stop(self):
+        """Flush everything still buffered and stop the background task"""
+        if self._task is None:
+            return
+        self._closing.set()
+        await self._task
+        self._task = None
+        logger.info("Result write-behind buffer flushed and stopped")
+
+    async def submit(self, doc: Dict[str, Any]) -> ObjectId:
+        """
+        Queue a result document for persistence and return its id
+        Raises InvalidDocument right away if the document can't be encoded as
+        BSON, so the request that produced it fails instead of its batch
+        """
+        doc.setdefault("_id", ObjectId())
+        bson.encode(doc)
+
+        if not self.running:
+            await self._insert_one(doc)
+            return doc["_id"]
+
+        span = current_span()
+        try:
+            self._queue.put_nowait(doc)
+            if span.sampled:
+                self._trace_links[doc["_id"]] = (span.trace_id, span.span_id)
+        except asyncio.QueueFull:
+            logger.warning("Result buffer full, writing result synchronously")
+            result_sync_fallbacks.inc()
+            await self._insert_one(doc)
+
+        return doc["_id"]
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            if batch:
+                await self._flush(batch)
+            elif self._closing.is_set():
+                return
+
+    async def _collect_batch(self) -> List[Dict[str, Any]]:
+        """Wait for the first document, then gather more until size or time threshold"""
+        batch: List[Dict[str, Any]] = []
+        loop = asyncio.get_running_loop()
+
+        if self._queue.empty():
+            if self._closing.is_set():
+                return batch
+            try:
+                batch.append(await asyncio.wait_for(
+                    self._queue.get(), timeout=settings.RESULT_FLUSH_INTERVAL
+                ))
+            except asyncio.TimeoutError:
+                return batch
+
+        deadline = loop.time() + settings.RESULT_FLUSH_INTERVAL
+        while len(batch) < settings.RESULT_FLUSH_BATCH_SIZE:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self._closing.is_set():
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        """Write a batch under a span linked to the traced requests that submitted it"""
+        links = [self._trace_links.pop(doc["_id"]) for doc in batch if doc["_id"] in self._trace_links]
+        with start_span("mongo.insert_many", sampled=bool(links), documents=len(batch)) as span:
+            for trace_id, span_id in links:
+                span.add_link(trace_id, span_id)
+            await self._flush_batch(batch)
+
+    async def _flush_batch(self, batch: List[Dict[str, Any]]):
+        """Insert a batch, retrying transient failures (ids make retries idempotent)"""
+        results_collection = get_database()["results"]
+        stored = [to_storage(doc) for doc in batch]
+
+        for attempt in range(1, FLUSH_RETRIES + 1):
+            try:
+                if settings.RESULTS_COMPACT_SCHEMA:
+                    # Bodies first, so a stored result never points at missing content
+                    await store_contents(batch)
+                await results_collection.insert_many(stored, ordered=False)
+                logger.debug(f"Flushed {len(batch)} results")
+                await self._persisted(batch)
+                return
+            except BulkWriteError as e:
+                # Duplicate ids mean an earlier attempt already landed those documents
+                errors = [
+                    err for err in e.details.get("writeErrors", [])
+                    if err.get("code") != DUPLICATE_KEY_ERROR
+                ]
+                if errors:
+                    logger.error(f"Failed to write {len(errors)} of {len(batch)} results: {errors[0].get('errmsg')}")
+                failed = {err["index"] for err in errors}
+                await self._persisted([doc for index, doc in enumerate(batch) if index not in failed])
+                return
+            except Exception as e:
+                if attempt == FLUSH_RETRIES or isinstance(e, InvalidDocument):
+                    logger.warning(f"Result flush failed ({e}), writing {len(batch)} results one by one")
+                    await self._flush_each(batch)
+                    return
+                logger.warning(f"Result flush failed (attempt {attempt}), retrying: {e}")
+                await asyncio.sleep(0.5 * attempt)
+
+    async def _flush_each(self, batch: List[Dict[str, Any]]):
+        """Insert documents one at a time, so a document that can't be written only loses itself"""
+        results_collection = get_database()["results"]
+        persisted = []
+        for doc in batch:
+            try:
+                if settings.RESULTS_COMPACT_SCHEMA:
+                    await store_contents([doc])
+                await results_collection.insert_one(to_storage(doc))
+            except DuplicateKeyError:
+                pass  # Landed in an earlier attempt
+            except Exception as e:
+                results_dropped.inc()
+                logger.error(f"Dropping result {doc['_id']} of user {doc.get('user_id')}: {e}")
+                continue
+            persisted.append(doc)
+        if persisted:
+            await self._persisted(persisted)
+
+    async def _insert_one(self, doc: Dict[str, Any]):
+        results_collection = get_database()["results"]
+        with start_span("mongo.insert_one"):
+            if settings.RESULTS_COMPACT_SCHEMA:
+                await store_contents([doc])
+            await results_collection.insert_one(to_storage(doc))
+        await self._persisted([doc])
+
+    async def _persisted(self, docs: List[Dict[str, Any]]):
+        """Bookkeeping once documents are stored: rollups and per-user ETag versions"""
+        await record_results(docs)
+        await bump_results_versions(docs)
+
+
+result_writer = ResultWriter()
+registry.add_collector(lambda: result_buffer_size.set(result_writer.pending))
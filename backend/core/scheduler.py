@@ -0,0 +1,113 @@
+from typing import Dict, List, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import heapq
+import itertools
+import logging
+
+from core.config import settings
+from core.metrics import registry, Gauge, Counter
+
+logger = logging.getLogger(__name__)
+
+scheduler_active = registry.register(Gauge(
+    "detection_scheduler_active", "Detection jobs currently holding a slot"
+))
+scheduler_queued = registry.register(Gauge(
+    "detection_scheduler_queued", "Detection jobs waiting for a slot"
+))
+scheduler_rejected = registry.register(Counter(
+    "detection_scheduler_rejected_total", "Detection jobs rejected because the queue was full", ["type"]
+))
+
+
+class SchedulerFull(Exception):
+    pass
+
+
+class FairScheduler:
+    """
+    Weighted fair queueing in front of the detection work
+    Jobs get a virtual finish tag (start-time fair queueing): each flow
+    (user + content type) advances by cost / weight per job, and free slots go
+    to the smallest tag. A user looping video uploads only delays their own
+    flow, and text's higher weight keeps interactive checks moving.
+    """
+
+    def __init__(self, slots: int, max_queue: int):
+        self.slots = slots
+        self.max_queue = max_queue
+        self._active = 0
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._queue: List[Tuple[float, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, waiter in self._queue if not waiter.cancelled())
+
+    def _tag(self, flow: str, weight: float, cost: float) -> Tuple[float, float]:
+        start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+        finish = start + cost / weight
+        self._last_finish[flow] = finish
+        if len(self._last_finish) > 10000:
+            # Flows that finished in the virtual past no longer affect ordering
+            self._last_finish = {
+                key: tag for key, tag in self._last_finish.items() if tag > self._virtual_time
+            }
+        return start, finish
+
+    @asynccontextmanager
+    async def slot(self, flow: str, weight: float, cost: float = 1.0):
+        """Wait for a slot in fair order; raises SchedulerFull if the queue is at capacity"""
+        immediate = self._active < self.slots and not self.queued
+        if not immediate and self.queued >= self.max_queue:
+            # Before tagging, so a shed request doesn't push its flow further back
+            raise SchedulerFull()
+        start, finish = self._tag(flow, weight, cost)
+
+        if immediate:
+            self._active += 1
+            self._virtual_time = start
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (finish, next(self._sequence), start, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as we were cancelled
+                    self._release()
+                raise
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        self._active -= 1
+        while self._queue:
+            _, _, start, waiter = heapq.heappop(self._queue)
+            if waiter.cancelled():
+                continue
+            self._active += 1
+            self._virtual_time = start
+            waiter.set_result(None)
+            break
+
+
+detection_scheduler = FairScheduler(settings.SCHEDULER_SLOTS, settings.SCHEDULER_MAX_QUEUE)
+
+
+def _collect_scheduler_metrics():
+    scheduler_active.set(detection_scheduler.active)
+    scheduler_queued.set(detection_scheduler.queued)
+
+
+registry.add_collector(_collect_scheduler_metrics)
@@ -0,0 +1,377 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID_HEADER = "X-Trace-Id"
+TRACE_LOG_FORMAT = "%(levelname)s:%(name)s:[%(trace_id)s] %(message)s"
+EXPORT_BATCH_SIZE = 512
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# (trace_id, span_id, sampled) of a span in another process
+RemoteParent = Tuple[str, str, bool]
+
+
+class Span:
+    """One timed operation; children share its trace_id and point at its span_id"""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        kind: str,
+        attributes: Dict[str, Any]
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.kind = kind
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.links: List[Tuple[str, str]] = []
+        self.status = "ok"
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def add_link(self, trace_id: str, span_id: str):
+        self.links.append((trace_id, span_id))
+
+    def set_error(self, message: str):
+        self.status = "error"
+        self.status_message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "events": self.events,
+            "links": [{"trace_id": trace_id, "span_id": span_id} for trace_id, span_id in self.links],
+            "status": self.status,
+            "status_message": self.status_message,
+        }
+
+
+class _NoopSpan:
+    """Stand-in while tracing is off, so call sites never need to check"""
+    trace_id = None
+    span_id = None
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def add_event(self, name: str, **attributes):
+        pass
+
+    def add_link(self, trace_id: str, span_id: str):
+        pass
+
+    def set_error(self, message: str):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span():
+    """Innermost open span of this task or thread, or a no-op span"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[RemoteParent]:
+    """W3C traceparent header -> (trace_id, parent span_id, sampled)"""
+    match = _TRACEPARENT_RE.match((header or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    kind: str = "internal",
+    remote_parent: Optional[RemoteParent] = None,
+    sampled: Optional[bool] = None,
+    **attributes
+) -> Iterator[Any]:
+    """
+    Open a span as a child of the current one (contextvars carry it into
+    awaited coroutines, new tasks and to_thread calls)
+    A root span continues `remote_parent` if given, otherwise starts a trace
+    that is recorded with probability TRACE_SAMPLE_RATE unless `sampled`
+    forces it. Exceptions escaping the block mark the span as failed.
+    Yields a no-op span while TRACING_ENABLED is off.
+    """
+    if not settings.TRACING_ENABLED:
+        yield NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    if remote_parent is not None:
+        trace_id, parent_id, parent_sampled = remote_parent
+    elif parent is not None:
+        trace_id, parent_id, parent_sampled = parent.trace_id, parent.span_id, parent.sampled
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        parent_sampled = sampled if sampled is not None else random.random() < settings.TRACE_SAMPLE_RATE
+
+    span = Span(name, trace_id, parent_id, parent_sampled, kind, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_error(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if span.sampled:
+            span_processor.submit(span)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    encoded = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": _OTLP_KINDS.get(span.kind, 1),
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _otlp_attributes(span.attributes),
+        "events": [
+            {
+                "name": event["name"],
+                "timeUnixNano": str(event["time_ns"]),
+                "attributes": _otlp_attributes(event["attributes"]),
+            }
+            for event in span.events
+        ],
+        "links": [{"traceId": trace_id, "spanId": span_id} for trace_id, span_id in span.links],
+        "status": {"code": 2, "message": span.status_message or ""} if span.status == "error" else {"code": 1},
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
+
+
+class FileSpanExporter:
+    """Appends spans as JSON lines, one per span"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, lines: List[str]):
+        with open(self.path, "a") as f:
+            f.writelines(lines)
+
+    async def export(self, spans: List[Span]):
+        lines = [json.dumps(span.to_dict(), default=str) + "\n" for span in spans]
+        await asyncio.to_thread(self._write, lines)
+
+    async def close(self):
+        pass
+
+
+class OTLPSpanExporter:
+    """Posts spans to an OpenTelemetry collector over OTLP/HTTP (JSON encoding)"""
+
+    def __init__(self, endpoint: str):
+        import httpx
+
+        self.url = f"{endpoint.rstrip('/')}/v1/traces"
+        self._client = httpx.AsyncClient(timeout=10.0)
+
+    async def export(self, spans: List[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": settings.TRACE_SERVICE_NAME})},
+                "scopeSpans": [{
+                    "scope": {"name": "core.tracing"},
+                    "spans": [_otlp_span(span) for span in spans],
+                }],
+            }]
+        }
+        response = await self._client.post(self.url, json=payload)
+        response.raise_for_status()
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class SpanProcessor:
+    """
+    Buffers finished spans and exports them in batches from a background task
+    Spans can finish on worker threads, so the buffer is a deque (append and
+    popleft are thread-safe). Past TRACE_MAX_QUEUE spans are dropped rather
+    than letting a slow collector grow memory.
+    """
+
+    def __init__(self):
+        self._spans: deque = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._exporter = None
+        self.dropped = 0
+
+    def submit(self, span: Span):
+        if self._task is None:
+            return
+        if len(self._spans) >= settings.TRACE_MAX_QUEUE:
+            self.dropped += 1
+            return
+        self._spans.append(span)
+
+    async def start(self):
+        if not settings.TRACING_ENABLED or self._task is not None:
+            return
+        if settings.TRACE_EXPORTER == "otlp":
+            self._exporter = OTLPSpanExporter(settings.TRACE_OTLP_ENDPOINT)
+        else:
+            self._exporter = FileSpanExporter(settings.TRACE_FILE_PATH)
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Tracing enabled ({settings.TRACE_EXPORTER} exporter, "
+                    f"sample rate {settings.TRACE_SAMPLE_RATE:g})")
+
+    async def stop(self):
+        """Export what is still buffered and stop the background task"""
+        if self._task is None:
+            return
+        self._closing.set()
+        await self._task
+        self._task = None
+        await self._exporter.close()
+
+    async def _run(self):
+        while not self._closing.is_set():
+            try:
+                await asyncio.wait_for(self._closing.wait(), timeout=settings.TRACE_EXPORT_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self):
+        while self._spans:
+            batch = []
+            while self._spans and len(batch) < EXPORT_BATCH_SIZE:
+                batch.append(self._spans.popleft())
+            try:
+                await self._exporter.export(batch)
+            except Exception as e:
+                logger.warning(f"Failed to export {len(batch)} spans: {e}")
+                return
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} spans: export queue full")
+            self.dropped = 0
+
+
+span_processor = SpanProcessor()
+
+
+def install_log_context():
+    """Give every log record trace_id/span_id attributes ("-" outside a span) for TRACE_LOG_FORMAT"""
+    factory = logging.getLogRecordFactory()
+
+    def record_factory(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        span = _current_span.get()
+        record.trace_id = span.trace_id if span is not None else "-"
+        record.span_id = span.span_id if span is not None else "-"
+        return record
+
+    logging.setLogRecordFactory(record_factory)
+
+
+class TracingMiddleware:
+    """
+    Root span per HTTP request
+    Continues the caller's trace from an incoming traceparent header and
+    returns the trace in X-Trace-Id and traceresponse response headers
+    (traceparent is a request header; W3C Trace Context uses traceresponse
+    for the server's span on the way back)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        remote_parent = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        with start_span(f"{scope['method']} {scope['path']}", kind="server", remote_parent=remote_parent) as span:
+            span.set_attribute("http.method", scope["method"])
+            span.set_attribute("http.target", scope["path"])
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_error(f"HTTP {message['status']}")
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (TRACE_ID_HEADER.lower().encode(), span.trace_id.encode()),
+                        (b"traceresponse", span.traceparent.encode()),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    # Route template instead of the raw path, like the metrics labels
+                    span.name = f"{scope['method']} {route.path}"
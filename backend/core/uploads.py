@@ -0,0 +1,253 @@
+from typing import Optional, Tuple
+from fastapi import HTTPException, UploadFile, status
+import logging
+import struct
+import orjson
+
+from core.config import settings
+from core.metrics import registry, Counter
+
+logger = logging.getLogger(__name__)
+
+# Multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+DETECT_ROUTES = {
+    "/api/detect/text": "text",
+    "/api/detect/image": "image",
+    "/api/detect/video": "video",
+}
+
+# (offset, signature, media type) of the formats the detectors can decode
+_SIGNATURES = [
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"BM", "image/bmp"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"\x1a\x45\xdf\xa3", "video/webm"),  # EBML: WebM and Matroska
+    (0, b"FLV\x01", "video/x-flv"),
+    (0, b"\x00\x00\x01\xba", "video/mpeg"),
+    (0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11", "video/x-ms-asf"),
+    (4, b"moov", "video/quicktime"),
+    (4, b"mdat", "video/quicktime"),
+    (4, b"wide", "video/quicktime"),
+]
+
+# ISO base media brands that are still images rather than video
+_IMAGE_BRANDS = {b"avif", b"avis", b"heic", b"heix", b"mif1", b"msf1"}
+
+# JPEG start-of-frame markers (the ones carrying the image size)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+upload_rejections = registry.register(Counter(
+    "upload_rejections_total", "Uploads refused before detection", ["type", "reason"]
+))
+
+
+class UploadTooLarge(HTTPException):
+    """Raised from the receive channel once a request body passes its limit"""
+
+    def __init__(self, kind: str):
+        super().__init__(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"{kind.capitalize()} upload too large (max {_megabytes(settings.UPLOAD_LIMITS[kind])})"
+        )
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):g}MB"
+
+
+def sniff_media_type(head: bytes) -> Optional[str]:
+    """Media type from the file signature, or None if it isn't a supported image or video"""
+    for offset, signature, media_type in _SIGNATURES:
+        if head.startswith(signature, offset):
+            return media_type
+    if head[:4] == b"RIFF":
+        if head[8:12] == b"WEBP":
+            return "image/webp"
+        if head[8:12] == b"AVI ":
+            return "video/x-msvideo"
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand in _IMAGE_BRANDS:
+            return None
+        return "video/quicktime" if brand == b"qt  " else "video/mp4"
+    return None
+
+
+def _jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    position = 2
+    while position + 9 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:  # Fill byte
+            position += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # Markers without a length
+            position += 2
+            continue
+        if marker == 0xDA:  # Start of scan before any frame header
+            return None
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[position + 5:position + 9])
+            return width, height
+        position += 2 + struct.unpack(">H", data[position + 2:position + 4])[0]
+    return None
+
+
+def _webp_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    return None
+
+
+def image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    (width, height) read straight from the image header, without decoding
+    None if the format isn't recognized or the header isn't in `data` yet
+    (JPEG metadata can push the frame header past the first chunk)
+    """
+    if data.startswith(b"\x89PNG\r\n\x1a\n") and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        return struct.unpack("<HH", data[6:10])
+    if data.startswith(b"BM") and len(data) >= 26:
+        if struct.unpack("<I", data[14:18])[0] == 12:  # OS/2 BITMAPCOREHEADER
+            return struct.unpack("<HH", data[18:22])
+        width, height = struct.unpack("<ii", data[18:26])
+        return abs(width), abs(height)  # Negative height marks a top-down bitmap
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return _webp_dimensions(data)
+    if data.startswith(b"\xff\xd8"):
+        return _jpeg_dimensions(data)
+    return None
+
+
+def _check_pixels(dimensions: Tuple[int, int]):
+    width, height = dimensions
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        upload_rejections.inc(type="image", reason="pixels")
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Image dimensions too large ({width}x{height}, max {settings.IMAGE_MAX_PIXELS:,} pixels)"
+        )
+
+
+async def read_upload(file: UploadFile, kind: str) -> bytes:
+    """
+    Read an uploaded image or video in chunks, validating it as it arrives
+    The first chunk is sniffed for the file signature (the client's
+    content_type is not trusted) and image dimensions are checked against
+    IMAGE_MAX_PIXELS from the header, before anything is decoded.
+    Reading stops as soon as the size limit is passed.
+    """
+    limit = settings.UPLOAD_LIMITS[kind]
+    chunk_size = settings.UPLOAD_READ_CHUNK_SIZE
+
+    head = await file.read(chunk_size)
+    media_type = sniff_media_type(head)
+    if media_type is None or not media_type.startswith(f"{kind}/"):
+        upload_rejections.inc(type=kind, reason="signature")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image" if kind == "image" else "File must be a video"
+        )
+
+    dimensions = image_dimensions(head) if kind == "image" else None
+    if dimensions:
+        _check_pixels(dimensions)
+
+    chunks = [head]
+    size = len(head)
+    while chunk := await file.read(chunk_size):
+        size += len(chunk)
+        if size > limit:
+            upload_rejections.inc(type=kind, reason="size")
+            raise UploadTooLarge(kind)
+        chunks.append(chunk)
+    data = b"".join(chunks)
+
+    if kind == "image" and dimensions is None:
+        # Frame header was past the first chunk; PIL's own limit covers formats we can't parse
+        dimensions = image_dimensions(data)
+        if dimensions:
+            _check_pixels(dimensions)
+    return data
+
+
+class UploadLimitMiddleware:
+    """
+    Refuse oversized detection requests before their body is read
+    A declared Content-Length over the route's limit is answered with 413
+    straight away; bodies without one (chunked) are counted as they stream in
+    and cut off with 413 as soon as they pass the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        kind = DETECT_ROUTES.get(scope.get("path", "").rstrip("/")) if scope["type"] == "http" else None
+        if kind is None or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.UPLOAD_LIMITS[kind] + MULTIPART_OVERHEAD
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            upload_rejections.inc(type=kind, reason="content_length")
+            await self._reject(send, UploadTooLarge(kind))
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    upload_rejections.inc(type=kind, reason="stream")
+                    raise UploadTooLarge(kind)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except UploadTooLarge as e:
+            # Normally rendered by the exception handlers; this covers reads outside a route
+            if response_started:
+                raise
+            await self._reject(send, e)
+
+    @staticmethod
+    async def _reject(send, error: HTTPException):
+        body = orjson.dumps({"detail": error.detail})
+        await send({
+            "type": "http.response.start",
+            "status": error.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,33 +1,93 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from starlette.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import importlib
 import logging
+import secrets
+import time
 
 from core.config import settings
-from core.database import connect_to_mongo, close_mongo_connection
-from routers import auth, detect, results, contact
-
-logging.basicConfig(level=logging.INFO)
+from core.database import connect_to_mongo, close_mongo_connection, get_pool_stats, get_database
+from core.result_writer import result_writer
+from core.rate_limit import ensure_rate_limit_indexes
+from core.uploads import UploadLimitMiddleware
+from core.lifecycle import lifecycle, InFlightMiddleware, install_sigterm_drain
+from core.tracing import TracingMiddleware, span_processor, install_log_context, TRACE_LOG_FORMAT
+from core.metrics import registry, http_request_duration, http_requests_in_progress, route_label
+from services.analytics import ensure_rollup_indexes, run_compaction_loop
+from services.result_store import ensure_result_indexes
+from services.http_client import close_http_client
+from routers import auth, detect, results, contact, analytics, admin
+from routers.auth import ensure_user_indexes, get_admin_user
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # Optional; responses are gzip-only without it
+    BrotliMiddleware = None
+
+install_log_context()
+logging.basicConfig(
+    level=logging.INFO,
+    format=TRACE_LOG_FORMAT if settings.TRACING_ENABLED else logging.BASIC_FORMAT
+)
 logger = logging.getLogger(__name__)
 
+DETECTOR_MODULES = [
+    "services.text_detector",
+    "services.image_detector",
+    "services.video_detector",
+]
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup
+    await span_processor.start()
     await connect_to_mongo()
+    await result_writer.start()
+    await ensure_user_indexes()
+    await ensure_result_indexes()
+    await ensure_rollup_indexes()
+    await ensure_rate_limit_indexes()
+    if settings.PRELOAD_DETECTORS:
+        # Detection workers warm cv2/numpy/PIL up front instead of on the first request
+        for module in DETECTOR_MODULES:
+            await asyncio.to_thread(importlib.import_module, module)
+    compaction_task = None
+    if settings.ROLLUPS_ENABLED and settings.ROLLUP_COMPACTION_INTERVAL > 0:
+        compaction_task = asyncio.create_task(run_compaction_loop())
+    restore_sigterm = install_sigterm_drain()
     yield
-    # Shutdown
+    restore_sigterm()
+    # Shutdown: stop taking detections, let in-flight requests and background
+    # writes finish (bounded), flush buffered results, then close the clients
+    lifecycle.begin_drain()
+    if compaction_task:
+        compaction_task.cancel()
+    await lifecycle.wait_idle(settings.SHUTDOWN_GRACE_PERIOD)
+    lifecycle.run_shutdown_hooks()
+    await result_writer.stop()
+    await close_http_client()
     await close_mongo_connection()
+    await span_processor.stop()
 
 
 app = FastAPI(
     title="AI Content Verifier API",
     description="Backend API for AI content detection",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Refuse oversized detection uploads before their body is read; added first so
+# it sits inside CORS and its 413s still carry CORS headers
+app.add_middleware(UploadLimitMiddleware)
+
 # CORS middleware - must be added before routers
 # Combine default origins with environment variable origins
 default_origins = ["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:5173"]
@@ -38,13 +98,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
+# Compress larger responses (result history pages, metrics); small ones aren't worth the CPU
+if settings.RESPONSE_COMPRESSION:
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE, gzip_fallback=True)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency histogram and in-flight gauge"""
+    start = time.perf_counter()
+    status_code = 500
+    http_requests_in_progress.inc(method=request.method)
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        http_requests_in_progress.dec(method=request.method)
+        http_request_duration.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route_label(request.scope) or "unmatched",
+            status=str(status_code),
+        )
+
+
+# In-flight accounting and drain-mode rejections, inside tracing so refusals are traced
+app.add_middleware(InFlightMiddleware)
+
+# Outermost, so the request's root span covers every other middleware
+app.add_middleware(TracingMiddleware)
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(detect.router)
 app.include_router(results.router)
 app.include_router(contact.router)
+app.include_router(analytics.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -58,9 +156,43 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up, even while draining"""
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: fails while draining or when MongoDB is unreachable, so load balancers route elsewhere"""
+    status = lifecycle.status()
+    if lifecycle.draining:
+        return ORJSONResponse({"status": "draining", **status}, status_code=503)
+    try:
+        await asyncio.wait_for(get_database().command("ping"), timeout=2.0)
+    except Exception as e:
+        return ORJSONResponse({"status": "unavailable", "error": str(e), **status}, status_code=503)
+    return {"status": "ready", **status}
+
+
+@app.get("/health/db", dependencies=[Depends(get_admin_user)])
+async def database_health():
+    """Connection pool utilization and checkout-wait metrics, per server address (admins only)"""
+    return get_pool_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus text-format scrape endpoint, behind METRICS_TOKEN when one is set"""
+    if settings.METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("authorization", "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
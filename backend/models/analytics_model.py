@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+
+
+class TimeseriesPoint(BaseModel):
+    bucket: datetime
+    type: str
+    total: int
+    ai_detected: int
+    human_detected: int
+    ai_rate: float
+    avg_confidence: float
+
+
+class HistogramBucket(BaseModel):
+    bucket: datetime
+    counts: List[int]
+
+
+class ConfidenceHistogram(BaseModel):
+    bin_edges: List[float]
+    total: List[int]
+    buckets: List[HistogramBucket]
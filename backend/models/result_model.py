@@ -1,6 +1,70 @@
 from pydantic import BaseModel
-from typing import Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
+import hashlib
+
+from core.config import settings
+
+# Compact storage schema (RESULTS_COMPACT_SCHEMA): short keys, and text
+# content replaced by the SHA-256 of its body in the result_contents collection
+COMPACT_FIELDS = {
+    "user_id": "u",
+    "type": "t",
+    "result": "r",
+    "confidence": "c",
+    "timestamp": "ts",
+    "content_id": "h",
+    "models": "m",
+    "video_hash": "vh",
+}
+EXPANDED_FIELDS = {short: name for name, short in COMPACT_FIELDS.items()}
+
+# Characters of submitted text kept in a result's content
+CONTENT_PREVIEW_CHARS = 1000
+
+
+def content_hash(content: str) -> bytes:
+    """Key of a content body in result_contents"""
+    return hashlib.sha256(content.encode()).digest()
+
+
+def storage_field(name: str) -> str:
+    """Name a result field is stored under in the active schema (for queries)"""
+    if settings.RESULTS_COMPACT_SCHEMA:
+        return COMPACT_FIELDS.get(name, name)
+    return name
+
+
+def is_compact(doc: Dict[str, Any]) -> bool:
+    return "u" in doc
+
+
+def to_storage(doc: Dict[str, Any], compact: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Stored form of a result document
+    In the compact schema `content` becomes a `content_id` reference; the body
+    itself has to be written with services.result_store.store_contents
+    """
+    if not (settings.RESULTS_COMPACT_SCHEMA if compact is None else compact):
+        return doc
+    stored = {}
+    for name, value in doc.items():
+        if name == "content":
+            if value is not None:
+                stored[COMPACT_FIELDS["content_id"]] = content_hash(value)
+            continue
+        stored[COMPACT_FIELDS.get(name, name)] = value
+    return stored
+
+
+def from_storage(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Result document with full field names, whichever schema it was stored in
+    Compact documents carry `content_id` instead of `content`
+    """
+    if not is_compact(doc):
+        return doc
+    return {EXPANDED_FIELDS.get(name, name): value for name, value in doc.items()}
 
 
 class ResultCreate(BaseModel):
@@ -10,6 +74,14 @@ class ResultCreate(BaseModel):
     content: Optional[str] = None  # For text, store the text content
 
 
+class ModelScore(BaseModel):
+    model: str
+    weight: float
+    status: Literal["ok", "no_verdict", "timeout"]
+    ai_score: Optional[float] = None
+    latency_ms: float
+
+
 class ResultResponse(BaseModel):
     id: str
     user_id: str
@@ -18,11 +90,26 @@ class ResultResponse(BaseModel):
     confidence: float
     content: Optional[str] = None
     timestamp: datetime
+    models: Optional[List[ModelScore]] = None  # Per-model breakdown in ensemble mode
     
     class Config:
         from_attributes = True
 
 
+class FrameScore(BaseModel):
+    frame: int
+    timestamp: float  # Seconds from the start of the video
+    ai_score: float
+    real_score: float
+
+
+class VideoTimeline(BaseModel):
+    result_id: str
+    fps: float
+    total_frames: int
+    frames: List[FrameScore]
+
+
 class ResultStats(BaseModel):
     total_verifications: int
     text_count: int
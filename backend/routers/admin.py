@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import asyncio
+
+from routers.auth import get_admin_user
+from core.config import settings
+from core.profiling import profiler, memory_tracker, ProfilerBusy
+from core.lifecycle import lifecycle
+
+# Diagnostics act on the worker that serves the request; with several workers,
+# repeat the call until each has been profiled.
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(get_admin_user)])
+
+
+@router.post("/profiler/start")
+async def start_profiler(
+    seconds: float = Query(30.0, gt=0),
+    interval_ms: Optional[float] = Query(None, gt=0),
+    wait: bool = False
+):
+    """
+    Sample every thread's stack for `seconds` (capped at PROFILER_MAX_SECONDS)
+    With wait=true, respond with the collapsed stacks once sampling ends
+    """
+    seconds = min(seconds, settings.PROFILER_MAX_SECONDS)
+    interval = (interval_ms or settings.PROFILER_DEFAULT_INTERVAL_MS) / 1000
+    try:
+        profiler.start(seconds, interval)
+    except ProfilerBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    if not wait:
+        return profiler.status()
+    await asyncio.to_thread(profiler.join)
+    return PlainTextResponse(profiler.collapsed())
+
+
+@router.post("/profiler/stop", response_class=PlainTextResponse)
+async def stop_profiler():
+    """Stop sampling early and return the collapsed stacks"""
+    await asyncio.to_thread(profiler.stop)
+    return profiler.collapsed()
+
+
+@router.get("/profiler")
+async def profiler_status():
+    return profiler.status()
+
+
+@router.get("/profiler/stacks", response_class=PlainTextResponse)
+async def profiler_stacks():
+    """Collapsed stacks of the current or last run, for flamegraph.pl or speedscope"""
+    return profiler.collapsed()
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(frames: int = Query(1, ge=1, le=64)):
+    """Start tracemalloc; allocations are only traced from here until /memory/stop"""
+    memory_tracker.start(frames)
+    return {"tracing": True, "frames": frames}
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing():
+    memory_tracker.stop()
+    return {"tracing": False}
+
+
+@router.post("/memory/snapshot")
+async def memory_snapshot(top: int = Query(20, ge=1, le=500)):
+    """Traced heap by module (services, routers, core, libraries); becomes the baseline for /memory/diff"""
+    if not memory_tracker.tracing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Memory tracing is not running"
+        )
+    return await asyncio.to_thread(memory_tracker.snapshot, top)
+
+
+@router.get("/memory/diff")
+async def memory_diff(top: int = Query(20, ge=1, le=500)):
+    """Heap growth by module and source line since the last snapshot"""
+    if memory_tracker.baseline is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Take a snapshot first"
+        )
+    return await asyncio.to_thread(memory_tracker.diff, top)
+
+
+@router.post("/drain")
+async def drain():
+    """
+    Fail /ready and refuse new detections on this worker, letting running ones finish
+    Meant for a pre-stop hook, ahead of SIGTERM
+    """
+    lifecycle.begin_drain()
+    return lifecycle.status()
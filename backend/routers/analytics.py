@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Literal, Optional
+from datetime import datetime, timedelta
+
+from routers.auth import get_admin_user
+from services.analytics import query_timeseries, query_confidence_histogram
+from models.analytics_model import TimeseriesPoint, ConfidenceHistogram
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+DEFAULT_RANGE = {"hour": timedelta(days=1), "day": timedelta(days=30)}
+
+
+def _resolve_range(granularity: str, start: Optional[datetime], end: Optional[datetime]):
+    end = end or datetime.utcnow()
+    start = start or end - DEFAULT_RANGE[granularity]
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    return start, end
+
+
+@router.get("/timeseries", response_model=List[TimeseriesPoint])
+async def get_timeseries(
+    granularity: Literal["hour", "day"] = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    type: Optional[Literal["text", "image", "video"]] = None,
+    admin_user: dict = Depends(get_admin_user)
+):
+    """Platform-wide detections, AI rate and mean confidence per bucket (admins only)"""
+    start, end = _resolve_range(granularity, start, end)
+    return await query_timeseries(granularity, start, end, type)
+
+
+@router.get("/confidence", response_model=ConfidenceHistogram)
+async def get_confidence_histogram(
+    granularity: Literal["hour", "day"] = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    type: Optional[Literal["text", "image", "video"]] = None,
+    admin_user: dict = Depends(get_admin_user)
+):
+    """Platform-wide confidence distribution per bucket (admins only)"""
+    start, end = _resolve_range(granularity, start, end)
+    return await query_confidence_histogram(granularity, start, end, type)
@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from typing import Annotated
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+import logging
 
 from models.user_model import (
     UserCreate,
@@ -14,6 +18,7 @@ from models.user_model import (
     PasswordValidate,
     PasswordChange,
 )
+from core.config import settings
 from core.database import get_database
 from core.security import (
     verify_password, 
@@ -22,12 +27,44 @@ from core.security import (
     decode_access_token
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    """Get current authenticated user from JWT token"""
+def _user_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="User not found",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _user_response(user: dict) -> UserResponse:
+    return UserResponse(
+        id=str(user["_id"]),
+        email=user["email"],
+        full_name=user["full_name"],
+        created_at=user["created_at"]
+    )
+
+
+async def ensure_user_indexes():
+    """
+    Unique email index; registration relies on it instead of checking first,
+    so startup fails if it can't be created
+    """
+    users_collection = get_database()["users"]
+    try:
+        await users_collection.create_index([("email", ASCENDING)], unique=True)
+    except Exception as e:
+        logger.error(f"Failed to create unique email index (merge duplicate emails in users first): {e}")
+        raise
+
+
+async def get_current_user_id(token: Annotated[str, Depends(oauth2_scheme)]) -> ObjectId:
+    """User id from the JWT, without loading the user (for handlers that read it back anyway)"""
     payload = decode_access_token(token)
     if payload is None:
         raise HTTPException(
@@ -42,36 +79,45 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    db = get_database()
-    users_collection: AsyncIOMotorCollection = db["users"]
-    user = await users_collection.find_one({"_id": ObjectId(user_id)})
-    
-    if user is None:
+    try:
+        return ObjectId(user_id)
+    except InvalidId:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
+            detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+async def get_current_user(user_id: ObjectId = Depends(get_current_user_id)):
+    """Get current authenticated user from JWT token"""
+    db = get_database()
+    users_collection: AsyncIOMotorCollection = db["users"]
+    user = await users_collection.find_one({"_id": user_id})
+    
+    if user is None:
+        raise _user_not_found()
     
     return user
 
 
+async def get_admin_user(current_user: dict = Depends(get_current_user)):
+    """Current user, if listed in ADMIN_EMAILS"""
+    if current_user.get("email") not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate):
     """Register a new user"""
     db = get_database()
     users_collection: AsyncIOMotorCollection = db["users"]
     
-    # Check if user already exists
-    existing_user = await users_collection.find_one({"email": user_data.email})
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Hash password and create user
+    # Hash password and create user; the unique email index rejects existing users
     hashed_password = get_password_hash(user_data.password)
     user_doc = {
         "email": user_data.email,
@@ -80,16 +126,16 @@ async def register(user_data: UserCreate):
         "created_at": datetime.utcnow()
     }
     
-    result = await users_collection.insert_one(user_doc)
+    try:
+        await users_collection.insert_one(user_doc)  # Sets user_doc["_id"]
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     # Return user without password
-    user = await users_collection.find_one({"_id": result.inserted_id})
-    return UserResponse(
-        id=str(user["_id"]),
-        email=user["email"],
-        full_name=user["full_name"],
-        created_at=user["created_at"]
-    )
+    return _user_response(user_doc)
 
 
 @router.post("/login", response_model=Token)
@@ -123,40 +169,28 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     """Get current authenticated user information"""
-    return UserResponse(
-        id=str(current_user["_id"]),
-        email=current_user["email"],
-        full_name=current_user["full_name"],
-        created_at=current_user["created_at"]
-    )
+    return _user_response(current_user)
 
 
 @router.put("/profile", response_model=UserResponse)
 async def update_profile(
     profile_data: ProfileUpdate,
-    current_user: dict = Depends(get_current_user)
+    user_id: ObjectId = Depends(get_current_user_id)
 ):
     """Update user profile (full name only, email cannot be changed)"""
     db = get_database()
     users_collection: AsyncIOMotorCollection = db["users"]
     
-    user_id = ObjectId(current_user["_id"])
-    
-    # Update only full_name
-    await users_collection.update_one(
+    # Update only full_name and read the updated user back in the same round trip
+    updated_user = await users_collection.find_one_and_update(
         {"_id": user_id},
-        {"$set": {"full_name": profile_data.full_name}}
+        {"$set": {"full_name": profile_data.full_name}},
+        return_document=ReturnDocument.AFTER
     )
+    if updated_user is None:
+        raise _user_not_found()
     
-    # Get updated user
-    updated_user = await users_collection.find_one({"_id": user_id})
-    
-    return UserResponse(
-        id=str(updated_user["_id"]),
-        email=updated_user["email"],
-        full_name=updated_user["full_name"],
-        created_at=updated_user["created_at"]
-    )
+    return _user_response(updated_user)
 
 
 @router.post("/validate-password")
@@ -165,13 +199,8 @@ async def validate_password(
     current_user: dict = Depends(get_current_user)
 ):
     """Validate current password before allowing password change"""
-    db = get_database()
-    users_collection: AsyncIOMotorCollection = db["users"]
-    
-    user_id = ObjectId(current_user["_id"])
-    user = await users_collection.find_one({"_id": user_id})
-    
-    if not verify_password(password_data.current_password, user["hashed_password"]):
+    # get_current_user has already loaded the user, hash included
+    if not verify_password(password_data.current_password, current_user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Current password is incorrect"
@@ -189,11 +218,8 @@ async def change_password(
     db = get_database()
     users_collection: AsyncIOMotorCollection = db["users"]
     
-    user_id = ObjectId(current_user["_id"])
-    user = await users_collection.find_one({"_id": user_id})
-    
-    # Verify current password
-    if not verify_password(password_data.current_password, user["hashed_password"]):
+    # Verify current password against the user get_current_user already loaded
+    if not verify_password(password_data.current_password, current_user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Current password is incorrect"
@@ -206,20 +232,18 @@ async def change_password(
             detail="Password must be at least 6 characters"
         )
     
-    # Hash new password and update
+    # Hash new password and update, unless the password changed since it was verified
     hashed_password = get_password_hash(password_data.new_password)
-    await users_collection.update_one(
-        {"_id": user_id},
-        {"$set": {"hashed_password": hashed_password}}
+    updated_user = await users_collection.find_one_and_update(
+        {"_id": current_user["_id"], "hashed_password": current_user["hashed_password"]},
+        {"$set": {"hashed_password": hashed_password}},
+        return_document=ReturnDocument.AFTER
     )
+    if updated_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Current password is incorrect"
+        )
     
-    # Get updated user
-    updated_user = await users_collection.find_one({"_id": user_id})
-    
-    return UserResponse(
-        id=str(updated_user["_id"]),
-        email=updated_user["email"],
-        full_name=updated_user["full_name"],
-        created_at=updated_user["created_at"]
-    )
+    return _user_response(updated_user)
 
@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from motor.motor_asyncio import AsyncIOMotorCollection
-from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, Response, status
+from typing import Annotated, Any, Awaitable, Callable, Dict
+import math
 from datetime import datetime
 from bson import ObjectId
 from pydantic import BaseModel
 
 from routers.auth import get_current_user
-from core.database import get_database
-from services.text_detector import detect_ai_text
-from services.image_detector import detect_ai_image
-from services.video_detector import detect_ai_video
-from models.result_model import ResultResponse
+from core.result_writer import result_writer
+from core.metrics import time_stage
+from core.deadline import Deadline, request_deadline, run_with_deadline
+from core.config import settings
+from core.rate_limit import rate_limiter, rate_limited_requests
+from core.scheduler import detection_scheduler, scheduler_rejected, SchedulerFull
+from core.uploads import read_upload
+from core.tracing import start_span, current_span
+from models.result_model import ResultResponse, CONTENT_PREVIEW_CHARS
+
+# Detection services are imported inside the handlers: they pull in cv2, numpy
+# and PIL, which workers serving only auth/results should not pay for at startup.
 
 router = APIRouter(prefix="/api/detect", tags=["detect"])
 
@@ -19,10 +26,74 @@ class TextDetectRequest(BaseModel):
     text: str
 
 
+def rate_limit(kind: str):
+    """Dependency enforcing the per-user token bucket for one content type"""
+    async def dependency(current_user: dict = Depends(get_current_user)):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        per_minute, burst = settings.RATE_LIMITS[kind]
+        retry_after = await rate_limiter.acquire(
+            f"{current_user['_id']}:{kind}", burst, per_minute / 60
+        )
+        if retry_after > 0:
+            rate_limited_requests.inc(type=kind)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many {kind} detections, try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return dependency
+
+
+async def _scheduled(kind: str, user_id: str, detect: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Wait for a fair-share detection slot, then run the detector"""
+    try:
+        async with detection_scheduler.slot(f"{user_id}:{kind}", settings.SCHEDULER_WEIGHTS[kind]):
+            current_span().add_event("slot_acquired")
+            return await detect()
+    except SchedulerFull:
+        scheduler_rejected.inc(type=kind)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Detection queue is full, try again later",
+            headers={"Retry-After": "5"},
+        )
+
+
+async def _run_detection(
+    http_request: Request,
+    kind: str,
+    current_user: dict,
+    detect: Callable[[], Awaitable[Dict[str, Any]]],
+    deadline: Deadline
+) -> Dict[str, Any]:
+    """
+    Run a detector in its fair-share slot under the request deadline
+    Time spent queued counts against the deadline; a verdict cut short by it is a 504, not a result
+    """
+    with start_span(f"detect.{kind}", type=kind, deadline=deadline.budget) as span:
+        work = _scheduled(kind, str(current_user["_id"]), detect)
+        detection_result = await run_with_deadline(http_request, work, deadline)
+        span.set_attribute("result", detection_result.get("result"))
+        if "error" in detection_result:
+            span.set_error(detection_result["error"])
+    if deadline.expired and "error" in detection_result:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"Detection exceeded the {deadline.budget:g}s request deadline"
+        )
+    return detection_result
+
+
 @router.post("/text", response_model=ResultResponse)
 async def detect_text(
     request: TextDetectRequest,
-    current_user: dict = Depends(get_current_user)
+    http_request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    deadline: Deadline = Depends(request_deadline("text")),
+    _: None = Depends(rate_limit("text"))
 ):
     """Detect if text is AI-generated"""
     if not request.text or len(request.text.strip()) == 0:
@@ -32,64 +103,58 @@ async def detect_text(
         )
     
     # Perform detection
-    detection_result = await detect_ai_text(request.text)
-    
-    # Save result to database
-    db = get_database()
-    results_collection: AsyncIOMotorCollection = db["results"]
+    from services.text_detector import detect_ai_text
+    detection_result = await _run_detection(
+        http_request, "text", current_user, lambda: detect_ai_text(request.text, deadline), deadline
+    )
     
+    # Queue result for persistence (id is generated client-side)
     result_doc = {
         "user_id": ObjectId(current_user["_id"]),
         "type": "text",
         "result": detection_result["result"],
         "confidence": detection_result["confidence"],
-        "content": request.text[:1000],  # Store first 1000 chars
+        "content": request.text[:CONTENT_PREVIEW_CHARS],
         "timestamp": datetime.utcnow()
     }
     
-    result_id = await results_collection.insert_one(result_doc)
+    with time_stage("text", "persist"):
+        result_id = await result_writer.submit(result_doc)
+    
+    response.headers["X-Deadline-Remaining"] = f"{deadline.remaining():.3f}"
     
     return ResultResponse(
-        id=str(result_id.inserted_id),
+        id=str(result_id),
         user_id=str(current_user["_id"]),
         type="text",
         result=detection_result["result"],
         confidence=detection_result["confidence"],
-        content=request.text[:1000],
-        timestamp=result_doc["timestamp"]
+        content=request.text[:CONTENT_PREVIEW_CHARS],
+        timestamp=result_doc["timestamp"],
+        models=detection_result.get("models")
     )
 
 
 @router.post("/image", response_model=ResultResponse)
 async def detect_image(
+    http_request: Request,
+    response: Response,
     file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    deadline: Deadline = Depends(request_deadline("image")),
+    _: None = Depends(rate_limit("image"))
 ):
     """Detect if image is AI-generated"""
-    # Validate file type
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File must be an image"
-        )
-    
-    # Read file content
-    image_data = await file.read()
-    
-    # Validate file size (max 10MB)
-    if len(image_data) > 10 * 1024 * 1024:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Image file too large (max 10MB)"
-        )
+    # Read in chunks: type from the file signature, size and pixel limits enforced as it arrives
+    image_data = await read_upload(file, "image")
     
     # Perform detection
-    detection_result = await detect_ai_image(image_data)
-    
-    # Save result to database
-    db = get_database()
-    results_collection: AsyncIOMotorCollection = db["results"]
+    from services.image_detector import detect_ai_image
+    detection_result = await _run_detection(
+        http_request, "image", current_user, lambda: detect_ai_image(image_data, deadline), deadline
+    )
     
+    # Queue result for persistence (id is generated client-side)
     result_doc = {
         "user_id": ObjectId(current_user["_id"]),
         "type": "image",
@@ -99,49 +164,43 @@ async def detect_image(
         "timestamp": datetime.utcnow()
     }
     
-    result_id = await results_collection.insert_one(result_doc)
+    with time_stage("image", "persist"):
+        result_id = await result_writer.submit(result_doc)
+    
+    response.headers["X-Deadline-Remaining"] = f"{deadline.remaining():.3f}"
     
     return ResultResponse(
-        id=str(result_id.inserted_id),
+        id=str(result_id),
         user_id=str(current_user["_id"]),
         type="image",
         result=detection_result["result"],
         confidence=detection_result["confidence"],
         content=None,
-        timestamp=result_doc["timestamp"]
+        timestamp=result_doc["timestamp"],
+        models=detection_result.get("models")
     )
 
 
 @router.post("/video", response_model=ResultResponse)
 async def detect_video(
+    http_request: Request,
+    response: Response,
     file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    deadline: Deadline = Depends(request_deadline("video")),
+    _: None = Depends(rate_limit("video"))
 ):
     """Detect if video is AI-generated"""
-    # Validate file type
-    if not file.content_type or not file.content_type.startswith("video/"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File must be a video"
-        )
-    
-    # Read file content
-    video_data = await file.read()
-    
-    # Validate file size (max 100MB)
-    if len(video_data) > 100 * 1024 * 1024:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Video file too large (max 100MB)"
-        )
+    # Read in chunks: type from the file signature, size limit enforced as it arrives
+    video_data = await read_upload(file, "video")
     
     # Perform detection
-    detection_result = await detect_ai_video(video_data)
-    
-    # Save result to database
-    db = get_database()
-    results_collection: AsyncIOMotorCollection = db["results"]
+    from services.video_detector import detect_ai_video
+    detection_result = await _run_detection(
+        http_request, "video", current_user, lambda: detect_ai_video(video_data, deadline), deadline
+    )
     
+    # Queue result for persistence (id is generated client-side)
     result_doc = {
         "user_id": ObjectId(current_user["_id"]),
         "type": "video",
@@ -150,16 +209,23 @@ async def detect_video(
         "content": None,
         "timestamp": datetime.utcnow()
     }
+    if detection_result.get("video_hash"):
+        # Links the result to its per-frame scores for the timeline endpoint
+        result_doc["video_hash"] = detection_result["video_hash"]
+    
+    with time_stage("video", "persist"):
+        result_id = await result_writer.submit(result_doc)
     
-    result_id = await results_collection.insert_one(result_doc)
+    response.headers["X-Deadline-Remaining"] = f"{deadline.remaining():.3f}"
     
     return ResultResponse(
-        id=str(result_id.inserted_id),
+        id=str(result_id),
         user_id=str(current_user["_id"]),
         type="video",
         result=detection_result["result"],
         confidence=detection_result["confidence"],
         content=None,
-        timestamp=result_doc["timestamp"]
+        timestamp=result_doc["timestamp"],
+        models=detection_result.get("models")
     )
 
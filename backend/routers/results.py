@@ -1,74 +1,131 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from motor.motor_asyncio import AsyncIOMotorCollection
-from typing import Annotated, List
+from typing import Annotated, Any, Awaitable, Callable, List
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
+import orjson
 
 from routers.auth import get_current_user
-from core.database import get_database
-from models.result_model import ResultResponse, ResultStats
+from core.cache import response_cache, make_etag, etag_matches
+from core.database import get_database, get_read_collection
+from models.result_model import (
+    ResultResponse, ResultStats, VideoTimeline, COMPACT_FIELDS, from_storage, storage_field
+)
+from services.result_store import attach_contents
 
 router = APIRouter(prefix="/api/results", tags=["results"])
 
+# Content under either schema, so a collection mid-migration is covered too
+WITHOUT_CONTENT = {"content": 0, "content_id": 0, COMPACT_FIELDS["content_id"]: 0}
+
+
+async def _cached_json(request: Request, current_user: dict, build: Callable[[], Awaitable[Any]]) -> Response:
+    """
+    Serve a per-user JSON view with an ETag, and cache its body briefly
+    The ETag covers the user's results_version, which is bumped whenever new
+    results are persisted, so If-None-Match is answered with 304 straight from
+    the already loaded user document without touching the results collection.
+    `build` must read from the primary: the version comes from there, and a
+    lagging secondary would otherwise cache a stale body under the new version
+    """
+    key = (
+        str(current_user["_id"]),
+        current_user.get("results_version", 0),
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+    )
+    etag = make_etag(*key)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = response_cache.get(key)
+    if body is None:
+        body = orjson.dumps(await build())
+        response_cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @router.get("/", response_model=List[ResultResponse])
 async def get_user_results(
+    request: Request,
     current_user: dict = Depends(get_current_user),
     limit: int = 50,
-    skip: int = 0
+    skip: int = 0,
+    include_content: bool = True
 ):
     """Get all verification results for the current user"""
-    db = get_database()
-    results_collection: AsyncIOMotorCollection = db["results"]
+    return await _cached_json(
+        request, current_user, lambda: _load_results(current_user, limit, skip, include_content)
+    )
+
+
+async def _load_results(current_user: dict, limit: int, skip: int, include_content: bool) -> List[dict]:
+    results_collection: AsyncIOMotorCollection = get_database()["results"]
     
     cursor = results_collection.find(
-        {"user_id": ObjectId(current_user["_id"])}
-    ).sort("timestamp", -1).skip(skip).limit(limit)
+        {storage_field("user_id"): ObjectId(current_user["_id"])},
+        None if include_content else WITHOUT_CONTENT
+    ).sort(storage_field("timestamp"), -1).skip(skip).limit(limit)
     
-    results = await cursor.to_list(length=limit)
+    results = [from_storage(result) for result in await cursor.to_list(length=limit)]
+    if include_content:
+        # Compact results only reference their content; fetch the page's bodies in one query
+        await attach_contents(results)
     
+    # Rows are our own documents, so skip per-row ResultResponse validation and
+    # serialize the dicts directly; response_model still documents the shape
     return [
-        ResultResponse(
-            id=str(result["_id"]),
-            user_id=str(result["user_id"]),
-            type=result["type"],
-            result=result["result"],
-            confidence=result["confidence"],
-            content=result.get("content"),
-            timestamp=result["timestamp"]
-        )
+        {
+            "id": str(result["_id"]),
+            "user_id": str(result["user_id"]),
+            "type": result["type"],
+            "result": result["result"],
+            "confidence": result["confidence"],
+            "content": result.get("content"),
+            "timestamp": result["timestamp"],
+            "models": None,
+        }
         for result in results
     ]
 
 
 @router.get("/stats", response_model=ResultStats)
-async def get_user_stats(current_user: dict = Depends(get_current_user)):
+async def get_user_stats(request: Request, current_user: dict = Depends(get_current_user)):
     """Get verification statistics for the current user"""
-    db = get_database()
-    results_collection: AsyncIOMotorCollection = db["results"]
+    return await _cached_json(request, current_user, lambda: _load_stats(current_user))
+
+
+async def _load_stats(current_user: dict) -> dict:
+    results_collection: AsyncIOMotorCollection = get_database()["results"]
     
     user_id = ObjectId(current_user["_id"])
     
+    user_field = storage_field("user_id")
+    type_field = storage_field("type")
+    result_field = storage_field("result")
+    
     # Get total count
-    total = await results_collection.count_documents({"user_id": user_id})
+    total = await results_collection.count_documents({user_field: user_id})
     
     # Get counts by type
     text_count = await results_collection.count_documents(
-        {"user_id": user_id, "type": "text"}
+        {user_field: user_id, type_field: "text"}
     )
     image_count = await results_collection.count_documents(
-        {"user_id": user_id, "type": "image"}
+        {user_field: user_id, type_field: "image"}
     )
     video_count = await results_collection.count_documents(
-        {"user_id": user_id, "type": "video"}
+        {user_field: user_id, type_field: "video"}
     )
     
     # Get AI vs Human detection counts
     ai_detected = await results_collection.count_documents(
-        {"user_id": user_id, "result": True}
+        {user_field: user_id, result_field: True}
     )
     human_detected = await results_collection.count_documents(
-        {"user_id": user_id, "result": False}
+        {user_field: user_id, result_field: False}
     )
     
     return ResultStats(
@@ -78,5 +135,33 @@ async def get_user_stats(current_user: dict = Depends(get_current_user)):
         video_count=video_count,
         ai_detected=ai_detected,
         human_detected=human_detected
+    ).model_dump()
+
+
+@router.get("/{result_id}/timeline", response_model=VideoTimeline)
+async def get_video_timeline(result_id: str, current_user: dict = Depends(get_current_user)):
+    """Per-frame scores of a video result, as stored when it was analyzed"""
+    not_found = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="No frame timeline for this result"
     )
+    try:
+        object_id = ObjectId(result_id)
+    except InvalidId:
+        raise not_found
+
+    results_collection: AsyncIOMotorCollection = get_read_collection("results")
+    result = await results_collection.find_one({
+        "_id": object_id,
+        storage_field("user_id"): ObjectId(current_user["_id"]),
+    })
+    result = from_storage(result) if result else {}
+    if result.get("type") != "video" or not result.get("video_hash"):
+        raise not_found
 
+    # numpy-backed, so imported on first use like the detectors
+    from services.frame_store import get_timeline
+    timeline = await get_timeline(result["video_hash"])
+    if timeline is None:
+        raise not_found
+    return {"result_id": result_id, **timeline}
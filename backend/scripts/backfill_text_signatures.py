@@ -0,0 +1,33 @@
+"""
+Build MinHash signatures for text results scored before the near-duplicate index existed
+
+Usage (from backend/, with the usual .env):
+    python -m scripts.backfill_text_signatures --limit 50000
+"""
+import argparse
+import asyncio
+import logging
+
+from core.database import connect_to_mongo, close_mongo_connection
+from services.text_dedup import backfill_from_results
+
+
+async def run(limit: int):
+    await connect_to_mongo()
+    try:
+        added = await backfill_from_results(limit)
+        print(f"Indexed {added} texts")
+    finally:
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the text near-duplicate index from stored results")
+    parser.add_argument("--limit", type=int, default=0, help="Most recent results to sign (0 = all)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Convert stored results between the verbose and compact schemas
+
+Compact results use short keys and reference their text content by SHA-256 in
+the result_contents collection. The migration is idempotent and can be
+resumed: documents already in the target schema are skipped. Readers accept
+both schemas, but queries only match the one RESULTS_COMPACT_SCHEMA selects,
+so switch the setting and restart the API right after migrating.
+
+Usage (from backend/, with the usual .env):
+    python -m scripts.migrate_results_schema --to compact
+    python -m scripts.migrate_results_schema --to verbose --batch-size 500
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List
+
+from pymongo import ReplaceOne, ASCENDING, DESCENDING
+
+from core.database import connect_to_mongo, close_mongo_connection, get_database
+from models.result_model import COMPACT_FIELDS, from_storage, to_storage
+from services.result_store import attach_contents, store_contents
+
+logger = logging.getLogger(__name__)
+
+
+async def _migrate_batch(docs: List[Dict[str, Any]], compact: bool):
+    results_collection = get_database()["results"]
+    expanded = [from_storage(doc) for doc in docs]
+    if compact:
+        await store_contents(expanded)
+    else:
+        await attach_contents(expanded)
+        for doc in expanded:
+            doc.pop("content_id", None)
+    await results_collection.bulk_write(
+        [ReplaceOne({"_id": doc["_id"]}, to_storage(doc, compact=compact)) for doc in expanded],
+        ordered=False
+    )
+
+
+async def migrate(compact: bool, batch_size: int) -> int:
+    results_collection = get_database()["results"]
+    # Compact documents are the ones with the short user key
+    pending = {COMPACT_FIELDS["user_id"]: {"$exists": not compact}}
+    migrated = 0
+    started = time.perf_counter()
+
+    batch: List[Dict[str, Any]] = []
+    async for doc in results_collection.find(pending).sort("_id", ASCENDING):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await _migrate_batch(batch, compact)
+            migrated += len(batch)
+            batch = []
+            logger.info(f"Migrated {migrated} results ({migrated / (time.perf_counter() - started):.0f}/s)")
+    if batch:
+        await _migrate_batch(batch, compact)
+        migrated += len(batch)
+
+    user_field, timestamp_field = "user_id", "timestamp"
+    if compact:
+        user_field, timestamp_field = COMPACT_FIELDS[user_field], COMPACT_FIELDS[timestamp_field]
+    await results_collection.create_index([(user_field, ASCENDING), (timestamp_field, DESCENDING)])
+    return migrated
+
+
+async def run(target: str, batch_size: int):
+    await connect_to_mongo()
+    try:
+        migrated = await migrate(target == "compact", batch_size)
+        print(f"Migrated {migrated} results to the {target} schema")
+        print(f"Set RESULTS_COMPACT_SCHEMA={'true' if target == 'compact' else 'false'} and restart the API")
+    finally:
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the results collection between storage schemas")
+    parser.add_argument("--to", dest="target", choices=["compact", "verbose"], required=True)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.target, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Iterable, Tuple
+from datetime import datetime, timedelta
+from collections import defaultdict
+from pymongo import UpdateOne, ASCENDING
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import logging
+import os
+import socket
+
+from core.config import settings
+from core.database import get_database, get_read_collection
+from models.result_model import storage_field
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# numpy is imported inside the functions that need it so importing this
+# module (main.py does, for the compaction job) stays cheap at startup.
+
+ROLLUPS_COLLECTION = "result_rollups"
+LEASES_COLLECTION = "leases"
+GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its hour or day bucket"""
+    start = timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        start = start.replace(hour=0)
+    return start
+
+
+def rollup_id(granularity: str, bucket: datetime, content_type: str, result: bool) -> str:
+    return f"{granularity}:{bucket.isoformat()}:{content_type}:{int(result)}"
+
+
+def confidence_bins(confidences: Iterable[float]) -> "np.ndarray":
+    """Map confidences in [0, 1] to histogram bin indices"""
+    import numpy as np
+    bins = settings.ROLLUP_HISTOGRAM_BINS
+    values = np.clip(np.asarray(list(confidences), dtype=np.float64), 0.0, 1.0)
+    return np.minimum((values * bins).astype(np.int64), bins - 1)
+
+
+def _histogram_array(hist: Optional[Dict[str, int]]) -> "np.ndarray":
+    import numpy as np
+    counts = np.zeros(settings.ROLLUP_HISTOGRAM_BINS, dtype=np.int64)
+    for index, count in (hist or {}).items():
+        if int(index) < len(counts):
+            counts[int(index)] = count
+    return counts
+
+
+def build_rollup_updates(docs: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """Aggregate result documents into $inc upserts for every hour and day bucket"""
+    import numpy as np
+    groups: Dict[Tuple[str, datetime, str, bool], List[float]] = defaultdict(list)
+    for doc in docs:
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(doc["timestamp"], granularity), doc["type"], bool(doc["result"]))
+            groups[key].append(float(doc["confidence"]))
+
+    updates = []
+    for (granularity, bucket, content_type, result), confidences in groups.items():
+        hist = np.bincount(confidence_bins(confidences), minlength=settings.ROLLUP_HISTOGRAM_BINS)
+        increments = {
+            "count": len(confidences),
+            "confidence_sum": float(np.sum(confidences)),
+        }
+        for index in np.flatnonzero(hist):
+            increments[f"confidence_hist.{index}"] = int(hist[index])
+
+        updates.append(UpdateOne(
+            {"_id": rollup_id(granularity, bucket, content_type, result)},
+            {
+                "$inc": increments,
+                "$setOnInsert": {
+                    "granularity": granularity,
+                    "bucket": bucket,
+                    "type": content_type,
+                    "result": result,
+                },
+            },
+            upsert=True
+        ))
+    return updates
+
+
+async def ensure_rollup_indexes():
+    """Create indexes used by range queries over rollups"""
+    rollups_collection = get_database()[ROLLUPS_COLLECTION]
+    await rollups_collection.create_index([("granularity", ASCENDING), ("bucket", ASCENDING)])
+
+
+async def record_results(docs: List[Dict[str, Any]]):
+    """Incrementally fold newly persisted results into the rollup buckets"""
+    if not settings.ROLLUPS_ENABLED or not docs:
+        return
+    try:
+        rollups_collection = get_database()[ROLLUPS_COLLECTION]
+        await rollups_collection.bulk_write(build_rollup_updates(docs), ordered=False)
+    except Exception as e:
+        # Compaction repairs any buckets missed here
+        logger.error(f"Failed to update result rollups: {e}")
+
+
+def _compaction_pipeline(granularity: str, since: datetime, until: datetime, compacted_at: datetime) -> List[Dict[str, Any]]:
+    """Rebuild the rollups of [since, until) server-side and $merge them over the stored ones"""
+    bins = settings.ROLLUP_HISTOGRAM_BINS
+    timestamp = storage_field("timestamp")
+    confidence = f"${storage_field('confidence')}"
+    return [
+        {"$match": {timestamp: {"$gte": since, "$lt": until}}},
+        {"$group": {
+            "_id": {
+                "bucket": {"$dateTrunc": {"date": f"${timestamp}", "unit": granularity}},
+                "type": f"${storage_field('type')}",
+                "result": {"$toBool": f"${storage_field('result')}"},
+                "bin": {"$toInt": {"$max": [0, {"$min": [bins - 1, {"$floor": {"$multiply": [confidence, bins]}}]}]}},
+            },
+            "count": {"$sum": 1},
+            "confidence_sum": {"$sum": confidence},
+        }},
+        {"$group": {
+            "_id": {"bucket": "$_id.bucket", "type": "$_id.type", "result": "$_id.result"},
+            "count": {"$sum": "$count"},
+            "confidence_sum": {"$sum": "$confidence_sum"},
+            "confidence_hist": {"$push": {"k": {"$toString": "$_id.bin"}, "v": "$count"}},
+        }},
+        {"$project": {
+            # Same ids as rollup_id(), so incremental updates and compaction share documents
+            "_id": {"$concat": [
+                f"{granularity}:",
+                {"$dateToString": {"date": "$_id.bucket", "format": "%Y-%m-%dT%H:%M:%S"}},
+                ":", "$_id.type",
+                ":", {"$cond": ["$_id.result", "1", "0"]},
+            ]},
+            "granularity": {"$literal": granularity},
+            "bucket": "$_id.bucket",
+            "type": "$_id.type",
+            "result": "$_id.result",
+            "count": 1,
+            "confidence_sum": 1,
+            "confidence_hist": {"$arrayToObject": "$confidence_hist"},
+            "compacted_at": {"$literal": compacted_at},
+        }},
+        {"$merge": {"into": ROLLUPS_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+async def compact_rollups(since: datetime, now: Optional[datetime] = None):
+    """
+    Rebuild hour and day buckets from the raw results collection
+    Repairs drift from failed incremental updates. Only closed buckets are
+    rebuilt: from `since` up to the last bucket that ended ROLLUP_COMPACTION_SETTLE
+    seconds ago, so record_results no longer increments them. Each bucket is
+    replaced atomically by $merge; buckets in that range without results are removed.
+    """
+    db = get_database()
+    results_collection = db["results"]
+    rollups_collection = db[ROLLUPS_COLLECTION]
+    now = now or datetime.utcnow()
+    settled = now - timedelta(seconds=settings.ROLLUP_COMPACTION_SETTLE)
+    since = bucket_start(since, "day")
+
+    for granularity in GRANULARITIES:
+        until = bucket_start(settled, granularity)
+        if until <= since:
+            continue
+        compacted_at = datetime.utcnow()
+        pipeline = _compaction_pipeline(granularity, since, until, compacted_at)
+        await results_collection.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+        # Buckets the rebuild didn't produce no longer have any results
+        removed = await rollups_collection.delete_many({
+            "granularity": granularity,
+            "bucket": {"$gte": since, "$lt": until},
+            "compacted_at": {"$ne": compacted_at},
+        })
+        logger.info(f"Compacted {granularity} rollups from {since.isoformat()} to {until.isoformat()} "
+                    f"({removed.deleted_count} empty buckets removed)")
+
+
+async def _acquire_lease(name: str, owner: str, ttl: float) -> bool:
+    """
+    Take or renew a named lease in LEASES_COLLECTION; False while another owner holds it
+    An expired lease can be taken over, so a crashed holder blocks others for at most `ttl`
+    """
+    leases_collection = get_database()[LEASES_COLLECTION]
+    now = datetime.utcnow()
+    try:
+        await leases_collection.update_one(
+            {"_id": name, "$or": [{"owner": owner}, {"expires_at": {"$lte": now}}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The upsert's insert collided with a lease held by someone else
+        return False
+    return True
+
+
+async def run_compaction_loop():
+    """
+    Periodically rebuild recent rollup buckets from raw results
+    Every worker runs this loop, but a lease makes only one of them compact
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        await asyncio.sleep(settings.ROLLUP_COMPACTION_INTERVAL)
+        try:
+            if not await _acquire_lease("rollup_compaction", owner, 2 * settings.ROLLUP_COMPACTION_INTERVAL):
+                continue
+            since = datetime.utcnow() - timedelta(hours=settings.ROLLUP_COMPACTION_WINDOW_HOURS)
+            await compact_rollups(since)
+        except Exception as e:
+            logger.error(f"Rollup compaction failed: {e}", exc_info=True)
+
+
+async def _load_rollups(
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    content_type: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    rollups_collection = get_read_collection(ROLLUPS_COLLECTION)
+    query: Dict[str, Any] = {
+        "granularity": granularity,
+        "bucket": {"$gte": bucket_start(start, granularity), "$lt": end},
+    }
+    if content_type:
+        query["type"] = content_type
+    cursor = rollups_collection.find(query).sort("bucket", 1)
+    return await cursor.to_list(length=None)
+
+
+async def query_timeseries(
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    content_type: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Detections, AI rate and mean confidence per bucket and type"""
+    series: Dict[Tuple[datetime, str], Dict[str, Any]] = {}
+    for rollup in await _load_rollups(granularity, start, end, content_type):
+        point = series.setdefault((rollup["bucket"], rollup["type"]), {
+            "bucket": rollup["bucket"],
+            "type": rollup["type"],
+            "total": 0,
+            "ai_detected": 0,
+            "human_detected": 0,
+            "confidence_sum": 0.0,
+        })
+        point["total"] += rollup["count"]
+        point["ai_detected" if rollup["result"] else "human_detected"] += rollup["count"]
+        point["confidence_sum"] += rollup["confidence_sum"]
+
+    points = []
+    for point in series.values():
+        confidence_sum = point.pop("confidence_sum")
+        point["ai_rate"] = point["ai_detected"] / point["total"] if point["total"] else 0.0
+        point["avg_confidence"] = confidence_sum / point["total"] if point["total"] else 0.0
+        points.append(point)
+    return points
+
+
+async def query_confidence_histogram(
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    content_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """Confidence histogram per bucket plus the total over the range"""
+    import numpy as np
+    bins = settings.ROLLUP_HISTOGRAM_BINS
+    per_bucket: Dict[datetime, np.ndarray] = {}
+    for rollup in await _load_rollups(granularity, start, end, content_type):
+        counts = per_bucket.setdefault(rollup["bucket"], np.zeros(bins, dtype=np.int64))
+        counts += _histogram_array(rollup.get("confidence_hist"))
+
+    total = np.sum(list(per_bucket.values()), axis=0) if per_bucket else np.zeros(bins, dtype=np.int64)
+    return {
+        "bin_edges": np.linspace(0.0, 1.0, bins + 1).round(4).tolist(),
+        "total": total.astype(int).tolist(),
+        "buckets": [
+            {"bucket": bucket, "counts": counts.astype(int).tolist()}
+            for bucket, counts in per_bucket.items()
+        ],
+    }
@@ -0,0 +1,87 @@
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+ModelQuery = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+
+async def run_ensemble(
+    models: List[str],
+    query_model: ModelQuery,
+    weights: Dict[str, float],
+    deadline: float,
+    other_key: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Query models concurrently and combine whatever answers arrive before the deadline
+    `query_model` returns a detection dict (with "ai_score" and `other_key`) or None.
+    Models without an explicit weight count as 1.0; a weight of 0 skips the model.
+    Returns the weighted scores plus per-model scores and latencies, or None if no
+    model produced a verdict in time.
+    """
+    active = [model for model in models if weights.get(model, 1.0) > 0]
+    if not active:
+        return None
+
+    started = time.perf_counter()
+    latencies: Dict[str, float] = {}
+
+    async def timed(model_name: str):
+        try:
+            return await query_model(model_name)
+        finally:
+            latencies[model_name] = (time.perf_counter() - started) * 1000
+
+    tasks = {asyncio.create_task(timed(model)): model for model in active}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    model_scores = []
+    weighted_ai = 0.0
+    weighted_other = 0.0
+    total_weight = 0.0
+    for task, model_name in tasks.items():
+        weight = weights.get(model_name, 1.0)
+        entry = {
+            "model": model_name,
+            "weight": weight,
+            "status": "timeout",
+            "ai_score": None,
+            "latency_ms": round(latencies.get(model_name, deadline * 1000), 1),
+        }
+        if task in done:
+            detection = None if task.exception() else task.result()
+            if detection:
+                entry["status"] = "ok"
+                entry["ai_score"] = detection["ai_score"]
+                weighted_ai += weight * detection["ai_score"]
+                weighted_other += weight * detection[other_key]
+                total_weight += weight
+            else:
+                entry["status"] = "no_verdict"
+        model_scores.append(entry)
+
+    answered = sum(1 for entry in model_scores if entry["status"] == "ok")
+    logger.info(f"Ensemble answered by {answered}/{len(active)} models in "
+                f"{(time.perf_counter() - started) * 1000:.0f}ms")
+    if total_weight == 0:
+        return None
+
+    ai_score = weighted_ai / total_weight
+    other_score = weighted_other / total_weight
+    total = ai_score + other_score
+    if total > 0:
+        ai_score = ai_score / total
+        other_score = other_score / total
+
+    return {
+        "ai_score": float(ai_score),
+        other_key: float(other_score),
+        "models": model_scores,
+    }
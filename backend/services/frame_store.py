@@ -0,0 +1,93 @@
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+from bson import Binary
+import hashlib
+import logging
+import numpy as np
+
+from core.config import settings
+from core.database import get_database, get_read_collection, ensure_ttl_index
+
+logger = logging.getLogger(__name__)
+
+FRAMES_COLLECTION = "video_frames"
+
+# frame index -> (ai_score, real_score)
+FrameScores = Dict[int, Tuple[float, float]]
+
+_ttl_index_ready = False
+
+
+def video_hash(video_data: bytes) -> str:
+    return hashlib.sha256(video_data).hexdigest()
+
+
+def _decode(doc: Dict[str, Any]) -> FrameScores:
+    indices = np.frombuffer(doc["frames"], dtype=np.int32)
+    scores = np.frombuffer(doc["scores"], dtype=np.float32).reshape(-1, 2)
+    return {int(index): (float(ai), float(real)) for index, (ai, real) in zip(indices, scores)}
+
+
+async def load_frames(content_hash: str) -> FrameScores:
+    """Previously scored frames of a video, or {} if it was never analyzed"""
+    frames_collection = get_database()[FRAMES_COLLECTION]
+    doc = await frames_collection.find_one({"_id": content_hash})
+    return _decode(doc) if doc else {}
+
+
+async def save_frames(content_hash: str, fps: float, total_frames: int, frames: FrameScores):
+    """
+    Store every scored frame of a video
+    One document per video holds parallel int32 index / float32 score arrays
+    (12 bytes a frame). `frames` should include the ones loaded earlier;
+    concurrent analyses of the same video keep whichever wrote last. Videos
+    not analyzed for VIDEO_FRAME_RETENTION_DAYS expire, timeline included.
+    """
+    global _ttl_index_ready
+    if not frames:
+        return
+    indices = np.array(sorted(frames), dtype=np.int32)
+    scores = np.array([frames[index] for index in indices.tolist()], dtype=np.float32)
+    try:
+        frames_collection = get_database()[FRAMES_COLLECTION]
+        if not _ttl_index_ready:
+            await ensure_ttl_index(frames_collection, "updated_at", settings.VIDEO_FRAME_RETENTION_DAYS * 86400)
+            _ttl_index_ready = True
+        await frames_collection.update_one(
+            {"_id": content_hash},
+            {
+                "$set": {
+                    "fps": fps,
+                    "total_frames": total_frames,
+                    "frames": Binary(indices.tobytes()),
+                    "scores": Binary(scores.tobytes()),
+                    "updated_at": datetime.utcnow(),
+                },
+                "$setOnInsert": {"created_at": datetime.utcnow()},
+            },
+            upsert=True
+        )
+    except Exception as e:
+        logger.error(f"Failed to store frame scores for video {content_hash[:12]}: {e}")
+
+
+async def get_timeline(content_hash: str) -> Optional[Dict[str, Any]]:
+    """Per-frame scores in playback order, with timestamps"""
+    frames_collection = get_read_collection(FRAMES_COLLECTION)
+    doc = await frames_collection.find_one({"_id": content_hash})
+    if not doc:
+        return None
+    fps = doc.get("fps") or 1.0
+    return {
+        "fps": fps,
+        "total_frames": doc.get("total_frames", 0),
+        "frames": [
+            {
+                "frame": index,
+                "timestamp": round(index / fps, 3),
+                "ai_score": round(ai, 4),
+                "real_score": round(real, 4),
+            }
+            for index, (ai, real) in sorted(_decode(doc).items())
+        ],
+    }
@@ -0,0 +1,73 @@
+from typing import Optional
+import httpx
+import logging
+
+from core.config import settings
+from core.concurrency import inference_limiter
+from core.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+# Upstream saturated (rate limited, or overloaded/loading): the limiter backs off
+OVERLOAD_STATUSES = {429, 503}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Process-wide client for Hugging Face inference calls
+    Reuses pooled keep-alive connections across requests instead of a TLS
+    handshake per detection; callers pass their own per-call timeouts
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=max(settings.TEXT_INFERENCE_TIMEOUT, settings.IMAGE_INFERENCE_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    return _client
+
+
+async def post_inference(
+    client: httpx.AsyncClient,
+    model_name: str,
+    timeout: float,
+    deadline: Deadline,
+    **kwargs
+) -> httpx.Response:
+    """
+    POST to a Hugging Face model once a concurrency slot is free
+    Queueing counts against the deadline and raises ConcurrencyLimitExceeded
+    when it runs out. 429/503 responses and timeouts shrink the limit,
+    except timeouts the deadline cut short, which say nothing about the upstream.
+    """
+    async with inference_limiter.acquire(
+        model_name, min(settings.INFERENCE_QUEUE_TIMEOUT, deadline.remaining())
+    ) as slot:
+        call_timeout = deadline.timeout(timeout)
+        try:
+            response = await client.post(
+                f"{settings.HUGGINGFACE_API_URL}/{model_name}",
+                headers={"Authorization": f"Bearer {settings.HUGGINGFACE_API_KEY}"},
+                timeout=call_timeout,
+                **kwargs
+            )
+        except httpx.TimeoutException:
+            if call_timeout >= timeout:
+                slot.dropped()
+            raise
+        if response.status_code in OVERLOAD_STATUSES:
+            slot.dropped()
+        return response
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("HTTP client closed")
@@ -1,8 +1,24 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from core.config import settings
+from core.metrics import (
+    time_stage,
+    inference_fallbacks,
+    inference_timeouts,
+    inference_errors,
+    inference_cold_starts,
+    detection_failures,
+)
+from core.concurrency import ConcurrencyLimitExceeded
+from core.deadline import Deadline
+from core.tracing import start_span, current_span
+from services.http_client import get_http_client, post_inference
+from services.ensemble import run_ensemble
+from services.image_hash import image_hash_index, image_hashes
+from services.image_tiles import extract_tiles, score_tiles
 import logging
 import asyncio
+import warnings
 from io import BytesIO
 from PIL import Image
 
@@ -16,11 +32,227 @@ IMAGE_MODELS = [
 ]
 
 
-async def detect_ai_image(image_data: bytes) -> Dict[str, Any]:
+def _parse_image_response(result: Any) -> Optional[Dict[str, Any]]:
+    """
+    Turn a classification response into AI/real scores
+    Returns None when the labels can't be mapped to either class
+    """
+    # Parse the result - handle different formats
+    predictions = None
+    if isinstance(result, list):
+        if len(result) > 0:
+            if isinstance(result[0], list):
+                predictions = result[0]
+            else:
+                predictions = result
+    elif isinstance(result, dict):
+        if "label" in result and "score" in result:
+            predictions = [result]
+    
+    if not predictions:
+        return None
+    
+    ai_score = 0.0
+    real_score = 0.0
+    
+    for pred in predictions:
+        label = pred.get("label", "").lower()
+        score = pred.get("score", 0.0)
+        
+        # Check various label patterns
+        if any(keyword in label for keyword in ["fake", "ai", "gan", "generated", "synthetic", "artificial"]):
+            ai_score = max(ai_score, score)
+        elif any(keyword in label for keyword in ["real", "natural", "authentic", "original", "human"]):
+            real_score = max(real_score, score)
+    
+    # If we have scores, use them
+    if ai_score == 0 and real_score == 0:
+        return None
+    
+    # Normalize if needed
+    total = ai_score + real_score
+    if total > 1.0:
+        ai_score = ai_score / total
+        real_score = real_score / total
+    elif total < 0.1:
+        # Fallback if scores are too low
+        ai_score = 0.5
+        real_score = 0.5
+    
+    # If still no clear scores, use first prediction
+    if ai_score == 0.0 and real_score == 0.0 and len(predictions) > 0:
+        first_pred = predictions[0]
+        label = first_pred.get("label", "").lower()
+        score = first_pred.get("score", 0.0)
+        # Heuristic: if label contains certain keywords, assume AI
+        if any(keyword in label for keyword in ["fake", "ai", "gan"]):
+            ai_score = score
+            real_score = 1.0 - score
+        else:
+            real_score = score
+            ai_score = 1.0 - score
+    
+    is_ai_generated = ai_score > real_score
+    confidence = ai_score if is_ai_generated else real_score
+    
+    return {
+        "result": is_ai_generated,
+        "confidence": float(confidence),
+        "ai_score": float(ai_score),
+        "real_score": float(real_score),
+    }
+
+
+async def _query_model(
+    client: httpx.AsyncClient,
+    model_name: str,
+    image_data: bytes,
+    deadline: Deadline
+) -> Optional[Dict[str, Any]]:
+    """
+    Score an image with one model, waiting once for a cold start
+    Returns None if the model times out, errors or gives an unusable response
+    Every call and the cold-start wait are capped by the remaining deadline
+    """
+    if deadline.expired:
+        return None
+    
+    with start_span("hf.inference", kind="client", detector="image", model=model_name) as span:
+        try:
+            # Make request with image data
+            with time_stage("image", "upstream_call"):
+                response = await post_inference(
+                    client, model_name, settings.IMAGE_INFERENCE_TIMEOUT, deadline, content=image_data
+                )
+        
+            span.set_attribute("http.status_code", response.status_code)
+            # Handle model loading (503 status)
+            if response.status_code == 503:
+                inference_cold_starts.inc(detector="image", model=model_name)
+                retry_after = int(response.headers.get("Retry-After", 30))
+                span.add_event("model_loading", retry_after=retry_after)
+                logger.info(f"Model {model_name} is loading, waiting {retry_after}s...")
+                with time_stage("image", "cold_start_wait"):
+                    await asyncio.sleep(min(retry_after, deadline.remaining()))
+                if deadline.expired:
+                    logger.warning(f"Deadline reached while {model_name} was loading")
+                    inference_timeouts.inc(detector="image", model=model_name)
+                    return None
+            
+                # Retry once
+                with time_stage("image", "upstream_call"):
+                    response = await post_inference(
+                        client, model_name, settings.IMAGE_INFERENCE_TIMEOUT, deadline, content=image_data
+                    )
+                span.set_attribute("http.status_code", response.status_code)
+        
+            if response.status_code == 200:
+                with time_stage("image", "parse"):
+                    detection = _parse_image_response(response.json())
+            
+                if detection:
+                    logger.info(f"Image detection successful with {model_name}: "
+                                f"AI={detection['ai_score']:.2f}, Real={detection['real_score']:.2f}")
+                    detection["model"] = model_name
+                    return detection
+        
+            # If we get here, the model didn't work as expected
+            logger.warning(f"Model {model_name} returned unexpected format: {response.status_code}")
+            inference_errors.inc(detector="image", model=model_name, reason=f"status_{response.status_code}")
+        
+        except ConcurrencyLimitExceeded as e:
+            span.set_error("queue_timeout")
+            logger.warning(f"No inference slot for {model_name}: {e}")
+            inference_errors.inc(detector="image", model=model_name, reason="queue_timeout")
+        except httpx.TimeoutException:
+            span.set_error("timeout")
+            logger.warning(f"Timeout calling {model_name}")
+            inference_timeouts.inc(detector="image", model=model_name)
+        except Exception as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            logger.error(f"Error with model {model_name}: {e}")
+            inference_errors.inc(detector="image", model=model_name, reason=type(e).__name__)
+    
+    return None
+
+
+def _open_image(image_data: bytes) -> Image.Image:
+    """
+    Open an upload lazily (only the header is parsed), refusing decompression bombs
+    Backstop for formats whose size core.uploads can't read from the header.
+    PIL only warns between 1x and 2x its MAX_IMAGE_PIXELS, so the warning is an
+    error here, scoped to this call; the process-wide PIL and warnings settings
+    are left alone.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        image = Image.open(BytesIO(image_data))
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValueError(f"Image is {width}x{height}, over IMAGE_MAX_PIXELS ({settings.IMAGE_MAX_PIXELS})")
+    return image
+
+
+def _decode_image(image: Image.Image, image_data: bytes) -> Image.Image:
+    """Verify and fully decode an opened upload; CPU-bound, so run it in a thread"""
+    image.verify()  # Verify it's a valid image
+    # verify() leaves the image unusable, so open it again
+    image = Image.open(BytesIO(image_data))
+    image.load()
+    return image
+
+
+def _downsize(image: Image.Image, image_data: bytes) -> bytes:
+    """Resize if too large (max 1024px on longest side)"""
+    max_size = 1024
+    if max(image.size) <= max_size:
+        return image_data
+    with time_stage("image", "resize"):
+        ratio = max_size / max(image.size)
+        new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
+        image = image.resize(new_size, Image.Resampling.LANCZOS)
+        # Convert back to bytes
+        output = BytesIO()
+        image.save(output, format=image.format or 'JPEG', quality=85)
+    logger.info(f"Image resized to {new_size}")
+    return output.getvalue()
+
+
+async def _detect_tiled(
+    client: httpx.AsyncClient,
+    image: Image.Image,
+    deadline: Deadline
+) -> Optional[Dict[str, Any]]:
+    """Score the most textured native-resolution tiles with the primary model"""
+    with time_stage("image", "tile_select"):
+        tiles = await asyncio.to_thread(
+            extract_tiles, image, settings.IMAGE_TILE_SIZE, settings.IMAGE_MAX_TILES
+        )
+    if not tiles:
+        return None
+
+    model_name = IMAGE_MODELS[0]
+    detection = await score_tiles(
+        tiles,
+        lambda tile: _query_model(client, model_name, tile, deadline),
+        deadline.remaining()
+    )
+    if detection:
+        detection["model"] = model_name
+    return detection
+
+
+async def detect_ai_image(image_data: bytes, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """
     Detect if image is AI-generated using Hugging Face API
-    Tries multiple models for better reliability
+    Uses the primary model, or queries all configured models concurrently
+    and combines their scores when ENSEMBLE_MODE is on
+    Remote calls only use whatever remains of `deadline`
+    Near-duplicates of an already scored image reuse its verdict without inference
+    With IMAGE_TILED_MODE, large images are scored as native-resolution tiles instead
+    of being downsized
     """
+    deadline = deadline or Deadline.unbounded()
     if not image_data or len(image_data) == 0:
         return {
             "result": False,
@@ -30,24 +262,20 @@ async def detect_ai_image(image_data: bytes) -> Dict[str, Any]:
             "error": "Image data cannot be empty"
         }
     
-    # Validate image format
+    # Validate image format; pixel work runs in threads so it doesn't block the event loop
     try:
-        image = Image.open(BytesIO(image_data))
-        image.verify()  # Verify it's a valid image
-        # Reset file pointer after verify
-        image = Image.open(BytesIO(image_data))
+        with time_stage("image", "decode"):
+            image = _open_image(image_data)
+            image = await asyncio.to_thread(_decode_image, image, image_data)
+        
+        hashes = None
+        if settings.IMAGE_HASH_INDEX_ENABLED:
+            with time_stage("image", "hash"):
+                hashes = await asyncio.to_thread(image_hashes, image)
         
-        # Resize if too large (max 1024px on longest side)
-        max_size = 1024
-        if max(image.size) > max_size:
-            ratio = max_size / max(image.size)
-            new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
-            # Convert back to bytes
-            output = BytesIO()
-            image.save(output, format=image.format or 'JPEG', quality=85)
-            image_data = output.getvalue()
-            logger.info(f"Image resized to {new_size}")
+        tiled = settings.IMAGE_TILED_MODE and max(image.size) >= settings.IMAGE_TILED_MIN_SIDE
+        if not tiled:
+            image_data = await asyncio.to_thread(_downsize, image, image_data)
     except Exception as e:
         logger.error(f"Invalid image format: {e}")
         return {
@@ -58,105 +286,60 @@ async def detect_ai_image(image_data: bytes) -> Dict[str, Any]:
             "error": "Invalid image format"
         }
     
-    async with httpx.AsyncClient(timeout=90.0) as client:
+    if hashes:
+        with time_stage("image", "hash_lookup"):
+            prior = await image_hash_index.lookup(hashes)
+        if prior:
+            return prior
+    
+    detection = None
+    client = get_http_client()
+    if tiled:
+        try:
+            detection = await _detect_tiled(client, image, deadline)
+        except Exception as e:
+            logger.error(f"Tiled image analysis failed: {e}")
+        if not detection:
+            # Fall back to scoring the downsized whole image
+            image_data = await asyncio.to_thread(_downsize, image, image_data)
+    
+    if detection is None and settings.ENSEMBLE_MODE:
+        ensemble = await run_ensemble(
+            IMAGE_MODELS,
+            lambda model_name: _query_model(client, model_name, image_data, deadline),
+            settings.IMAGE_MODEL_WEIGHTS,
+            min(settings.ENSEMBLE_DEADLINE, deadline.remaining()),
+            "real_score"
+        )
+        if ensemble:
+            is_ai_generated = ensemble["ai_score"] > ensemble["real_score"]
+            detection = {
+                "result": is_ai_generated,
+                "confidence": ensemble["ai_score"] if is_ai_generated else ensemble["real_score"],
+                "ai_score": ensemble["ai_score"],
+                "real_score": ensemble["real_score"],
+                "model": "ensemble",
+                "models": ensemble["models"]
+            }
+    elif detection is None:
         for model_name in IMAGE_MODELS[:1]:  # Use primary model for now
-            try:
-                api_url = f"https://api-inference.huggingface.co/models/{model_name}"
-                headers = {
-                    "Authorization": f"Bearer {settings.HUGGINGFACE_API_KEY}"
-                }
-                
-                # Make request with image data
-                response = await client.post(api_url, headers=headers, content=image_data)
-                
-                # Handle model loading (503 status)
-                if response.status_code == 503:
-                    retry_after = int(response.headers.get("Retry-After", 30))
-                    logger.info(f"Model {model_name} is loading, waiting {retry_after}s...")
-                    await asyncio.sleep(retry_after)
-                    
-                    # Retry once
-                    response = await client.post(api_url, headers=headers, content=image_data)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    
-                    # Parse the result - handle different formats
-                    predictions = None
-                    if isinstance(result, list):
-                        if len(result) > 0:
-                            if isinstance(result[0], list):
-                                predictions = result[0]
-                            else:
-                                predictions = result
-                    elif isinstance(result, dict):
-                        if "label" in result and "score" in result:
-                            predictions = [result]
-                    
-                    if predictions:
-                        ai_score = 0.0
-                        real_score = 0.0
-                        
-                        for pred in predictions:
-                            label = pred.get("label", "").lower()
-                            score = pred.get("score", 0.0)
-                            
-                            # Check various label patterns
-                            if any(keyword in label for keyword in ["fake", "ai", "gan", "generated", "synthetic", "artificial"]):
-                                ai_score = max(ai_score, score)
-                            elif any(keyword in label for keyword in ["real", "natural", "authentic", "original", "human"]):
-                                real_score = max(real_score, score)
-                        
-                        # If we have scores, use them
-                        if ai_score > 0 or real_score > 0:
-                            # Normalize if needed
-                            total = ai_score + real_score
-                            if total > 1.0:
-                                ai_score = ai_score / total
-                                real_score = real_score / total
-                            elif total < 0.1:
-                                # Fallback if scores are too low
-                                ai_score = 0.5
-                                real_score = 0.5
-                            
-                            # If still no clear scores, use first prediction
-                            if ai_score == 0.0 and real_score == 0.0 and len(predictions) > 0:
-                                first_pred = predictions[0]
-                                label = first_pred.get("label", "").lower()
-                                score = first_pred.get("score", 0.0)
-                                # Heuristic: if label contains certain keywords, assume AI
-                                if any(keyword in label for keyword in ["fake", "ai", "gan"]):
-                                    ai_score = score
-                                    real_score = 1.0 - score
-                                else:
-                                    real_score = score
-                                    ai_score = 1.0 - score
-                            
-                            is_ai_generated = ai_score > real_score
-                            confidence = ai_score if is_ai_generated else real_score
-                            
-                            logger.info(f"Image detection successful with {model_name}: AI={ai_score:.2f}, Real={real_score:.2f}")
-                            
-                            return {
-                                "result": is_ai_generated,
-                                "confidence": float(confidence),
-                                "ai_score": float(ai_score),
-                                "real_score": float(real_score),
-                                "model": model_name
-                            }
-                
-                # If we get here, the model didn't work as expected
-                logger.warning(f"Model {model_name} returned unexpected format: {response.status_code}")
-                
-            except httpx.TimeoutException:
-                logger.warning(f"Timeout calling {model_name}, trying next model...")
-                continue
-            except Exception as e:
-                logger.error(f"Error with model {model_name}: {e}")
-                continue
+            if deadline.expired:
+                logger.warning("Request deadline reached, not trying further models")
+                break
+            detection = await _query_model(client, model_name, image_data, deadline)
+            if detection:
+                break
+            inference_fallbacks.inc(detector="image", model=model_name)
+            current_span().add_event("model_fallback", model=model_name)
+
+    if detection:
+        if hashes:
+            image_hash_index.add(hashes, detection)
+        return detection
     
     # All models failed, return fallback
     logger.error("All image detection models failed")
+    detection_failures.inc(detector="image")
     return {
         "result": False,
         "confidence": 0.5,
@@ -0,0 +1,217 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+from pymongo import DESCENDING
+import asyncio
+import logging
+import numpy as np
+from PIL import Image
+
+from core.config import settings
+from core.database import get_database, ensure_ttl_index
+from core.lifecycle import lifecycle
+from core.metrics import registry, Counter
+
+logger = logging.getLogger(__name__)
+
+IMAGE_HASHES_COLLECTION = "image_hashes"
+
+# Verdict fields kept with each hash and returned on a match
+VERDICT_FIELDS = ["result", "confidence", "ai_score", "real_score", "model"]
+
+image_hash_lookups = registry.register(Counter(
+    "image_hash_lookups_total", "Perceptual-hash index lookups", ["outcome"]
+))
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so a 2-D DCT is two matrix products"""
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def phash(image: Image.Image) -> int:
+    """64-bit DCT hash: low-frequency coefficients above their median"""
+    pixels = np.asarray(image.convert("L").resize((32, 32), Image.Resampling.LANCZOS), dtype=np.float64)
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8]
+    # The DC term only carries overall brightness
+    median = np.median(low.ravel()[1:])
+    return _bits_to_int(low > median)
+
+
+def dhash(image: Image.Image) -> int:
+    """64-bit gradient hash: is each pixel brighter than its right neighbour"""
+    pixels = np.asarray(image.convert("L").resize((9, 8), Image.Resampling.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def image_hashes(image: Image.Image) -> Tuple[int, int]:
+    return phash(image), dhash(image)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes
+    Children are keyed by their hamming distance to the parent, so a radius
+    search only descends into subtrees whose key is within the radius
+    (triangle inequality) instead of comparing against every hash
+    """
+
+    def __init__(self):
+        self._root: Optional[list] = None  # [hash, value, {distance: child}]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: int, value: Any):
+        if self._root is None:
+            self._root = [key, value, {}]
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            distance = hamming(key, node[0])
+            if distance == 0:
+                node[1] = value
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, value, {}]
+                self._size += 1
+                return
+            node = child
+
+    def search(self, key: int, max_distance: int) -> List[Tuple[int, int, Any]]:
+        """All (distance, hash, value) within max_distance, closest first"""
+        matches = []
+        if self._root is None:
+            return matches
+        stack = [self._root]
+        while stack:
+            node_key, value, children = stack.pop()
+            distance = hamming(key, node_key)
+            if distance <= max_distance:
+                matches.append((distance, node_key, value))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+class ImageHashIndex:
+    """
+    Near-duplicate lookup over previously scored images and video frames
+    The BK-tree is keyed by pHash; a candidate only counts as a match if its
+    dHash is close too, which weeds out the odd pHash collision. The newest
+    `capacity` hashes are loaded from the image_hashes collection on first use
+    and new verdicts are persisted in the background, where they expire after
+    IMAGE_HASH_RETENTION_DAYS. BK-trees can't delete, so once the index
+    outgrows its capacity the oldest quarter is dropped and the tree rebuilt
+    from the rest.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._tree = BKTree()
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()  # pHash -> entry, oldest first
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._pending: set = set()
+
+    def __len__(self) -> int:
+        return len(self._tree)
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            hashes_collection = get_database()[IMAGE_HASHES_COLLECTION]
+            # Also serves the newest-first load below
+            await ensure_ttl_index(hashes_collection, "created_at", settings.IMAGE_HASH_RETENTION_DAYS * 86400)
+            cursor = hashes_collection.find({}, {"created_at": 0}).sort("created_at", DESCENDING)
+            docs = await cursor.limit(self.capacity).to_list(length=None)
+            for doc in reversed(docs):
+                self._insert(int(doc["_id"], 16), self._entry(doc))
+            self._loaded = True
+            logger.info(f"Loaded {len(self._tree)} image hashes")
+
+    def _insert(self, image_phash: int, entry: Dict[str, Any]):
+        self._entries[image_phash] = entry
+        self._entries.move_to_end(image_phash)
+        self._tree.add(image_phash, entry)
+        if len(self._entries) > self.capacity:
+            for _ in range(len(self._entries) - self.capacity * 3 // 4):
+                self._entries.popitem(last=False)
+            self._tree = BKTree()
+            for key, value in self._entries.items():
+                self._tree.add(key, value)
+
+    @staticmethod
+    def _entry(doc: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {field: doc[field] for field in VERDICT_FIELDS if field in doc}
+        entry["dhash"] = int(doc["dhash"], 16)
+        return entry
+
+    async def lookup(self, hashes: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        """Prior verdict for a near-duplicate image, or None"""
+        try:
+            await self._ensure_loaded()
+        except Exception as e:
+            logger.error(f"Failed to load image hash index: {e}")
+            return None
+
+        image_phash, image_dhash = hashes
+        for distance, match_phash, entry in self._tree.search(image_phash, settings.PHASH_MAX_DISTANCE):
+            if hamming(image_dhash, entry["dhash"]) > settings.DHASH_MAX_DISTANCE:
+                continue
+            image_hash_lookups.inc(outcome="hit")
+            logger.info(f"Near-duplicate image (pHash distance {distance}), reusing prior verdict")
+            verdict = {field: entry[field] for field in VERDICT_FIELDS if field in entry}
+            verdict["duplicate_of"] = f"{match_phash:016x}"
+            verdict["hash_distance"] = distance
+            return verdict
+        image_hash_lookups.inc(outcome="miss")
+        return None
+
+    def add(self, hashes: Tuple[int, int], detection: Dict[str, Any]):
+        """Index a fresh verdict; the write to MongoDB happens in the background"""
+        image_phash, image_dhash = hashes
+        doc = {field: detection[field] for field in VERDICT_FIELDS if field in detection}
+        doc["dhash"] = f"{image_dhash:016x}"
+        self._insert(image_phash, self._entry(doc))
+
+        task = asyncio.create_task(self._persist(f"{image_phash:016x}", doc))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        lifecycle.track_task(task)
+
+    async def _persist(self, key: str, doc: Dict[str, Any]):
+        try:
+            hashes_collection = get_database()[IMAGE_HASHES_COLLECTION]
+            await hashes_collection.update_one(
+                {"_id": key},
+                {"$set": doc, "$setOnInsert": {"created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to persist image hash {key}: {e}")
+
+
+image_hash_index = ImageHashIndex(settings.IMAGE_HASH_INDEX_MAX_ENTRIES)
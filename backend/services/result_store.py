@@ -0,0 +1,117 @@
+from typing import Dict, Any, Iterable, List, Tuple
+from collections import Counter
+from datetime import datetime
+from bson import Binary
+from pymongo import UpdateOne, ASCENDING, DESCENDING
+import logging
+import zlib
+
+from core.config import settings
+from core.database import get_database
+from models.result_model import content_hash, storage_field
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CONTENTS_COLLECTION = "result_contents"
+
+
+def compress_content(content: str) -> Tuple[str, bytes]:
+    """(codec, compressed body); zstd when installed, zlib otherwise"""
+    raw = content.encode()
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=settings.RESULT_CONTENT_COMPRESSION_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, min(settings.RESULT_CONTENT_COMPRESSION_LEVEL, 9))
+
+
+def decompress_content(codec: str, body: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed content")
+        return zstandard.ZstdDecompressor().decompress(body).decode()
+    if codec == "zlib":
+        return zlib.decompress(body).decode()
+    return body.decode()
+
+
+def content_update(content: str) -> UpdateOne:
+    """Upsert of one content body; identical bodies share a document"""
+    codec, body = compress_content(content)
+    return UpdateOne(
+        {"_id": content_hash(content)},
+        {"$setOnInsert": {
+            "codec": codec,
+            "body": Binary(body),
+            "size": len(content),
+            "created_at": datetime.utcnow(),
+        }},
+        upsert=True
+    )
+
+
+async def store_contents(docs: Iterable[Dict[str, Any]]):
+    """Write the content bodies of result documents (full field names) to result_contents"""
+    updates = {}
+    for doc in docs:
+        content = doc.get("content")
+        if content is not None:
+            updates.setdefault(content, None)
+    if not updates:
+        return
+    contents_collection = get_database()[CONTENTS_COLLECTION]
+    await contents_collection.bulk_write([content_update(content) for content in updates], ordered=False)
+
+
+async def load_contents(content_ids: List[bytes]) -> Dict[bytes, str]:
+    """Content bodies by id, fetched in one query (from the primary, like the results referencing them)"""
+    if not content_ids:
+        return {}
+    contents_collection = get_database()[CONTENTS_COLLECTION]
+    contents = {}
+    async for doc in contents_collection.find({"_id": {"$in": list(set(content_ids))}}):
+        try:
+            contents[doc["_id"]] = decompress_content(doc["codec"], doc["body"])
+        except Exception as e:
+            logger.error(f"Failed to decode result content: {e}")
+    return contents
+
+
+async def attach_contents(results: List[Dict[str, Any]]):
+    """Join `content` back onto compact results that reference a content_id"""
+    content_ids = [result["content_id"] for result in results if result.get("content_id")]
+    contents = await load_contents(content_ids)
+    for result in results:
+        if result.get("content_id"):
+            result["content"] = contents.get(result["content_id"])
+
+
+async def bump_results_versions(docs: List[Dict[str, Any]]):
+    """
+    Advance the results_version of every user with newly stored results
+    History and stats ETags are derived from it, so this is what invalidates them
+    """
+    per_user = Counter(doc["user_id"] for doc in docs)
+    if not per_user:
+        return
+    try:
+        users_collection = get_database()["users"]
+        await users_collection.bulk_write([
+            UpdateOne({"_id": user_id}, {"$inc": {"results_version": count}})
+            for user_id, count in per_user.items()
+        ], ordered=False)
+    except Exception as e:
+        # Clients keep seeing the previous version until the user's next result
+        logger.error(f"Failed to bump results versions: {e}")
+
+
+async def ensure_result_indexes():
+    """Index backing the per-user history query, under the active schema's field names"""
+    results_collection = get_database()["results"]
+    await results_collection.create_index([
+        (storage_field("user_id"), ASCENDING),
+        (storage_field("timestamp"), DESCENDING),
+    ])
@@ -0,0 +1,303 @@
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+from bson import Binary
+from pymongo import UpdateOne, DESCENDING
+import asyncio
+import hashlib
+import logging
+import re
+import zlib
+import numpy as np
+
+from core.config import settings
+from core.database import get_database, ensure_ttl_index
+from core.lifecycle import lifecycle
+from core.metrics import registry, Counter
+from models.result_model import from_storage, storage_field, CONTENT_PREVIEW_CHARS
+from services.result_store import attach_contents
+
+logger = logging.getLogger(__name__)
+
+TEXT_SIGNATURES_COLLECTION = "text_signatures"
+
+# Verdict fields kept with each signature and returned on a match
+VERDICT_FIELDS = ["result", "confidence", "ai_score", "human_score", "model"]
+
+NUM_PERMUTATIONS = 128
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+# Fixed seed: persisted signatures must stay comparable across restarts
+_rng = np.random.default_rng(20240601)
+# Coefficients span the whole field: with small ones a * x + b rarely wraps
+# around the prime, so every permutation ordered shingles by x alike
+_PERM_A = _rng.integers(1, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)[:, None]
+_PERM_B = _rng.integers(0, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)[:, None]
+
+_WORD_RE = re.compile(r"\w+")
+
+text_dedup_lookups = registry.register(Counter(
+    "text_dedup_lookups_total", "MinHash near-duplicate text lookups", ["outcome"]
+))
+
+
+def shingles(text: str, size: int) -> List[str]:
+    """Overlapping word n-grams of the case- and punctuation-normalized text"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def minhash(text: str, size: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    128-value MinHash signature (uint32) of the text's shingle set
+    Each permutation is a universal hash (a * x + b) mod (2^61 - 1) applied to
+    the CRC32 of every shingle at once; the fraction of equal values between
+    two signatures estimates the Jaccard similarity of the shingle sets
+    """
+    shingle_set = set(shingles(text, size or settings.TEXT_SHINGLE_SIZE))
+    if not shingle_set:
+        return None
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) for shingle in shingle_set),
+        dtype=np.uint64, count=len(shingle_set)
+    )
+    with np.errstate(over="ignore"):  # Wrapping mod 2^64 before mod p still mixes well
+        permuted = (_PERM_A * hashes[None, :] + _PERM_B) % _MERSENNE_PRIME
+    return (permuted.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+class MinHashIndex:
+    """
+    LSH index over MinHash signatures of previously scored text
+    Signatures are split into bands; texts sharing any whole band land in the
+    same bucket, so a lookup only compares against a handful of candidates.
+    Signatures live in one contiguous uint32 array (512 bytes per text) that
+    doubles as it grows, up to `capacity` texts; past that the oldest entry's
+    slot is reused. The newest `capacity` signatures are loaded from the
+    text_signatures collection on first use and new verdicts are persisted in
+    the background, where they expire after TEXT_DEDUP_RETENTION_DAYS.
+    """
+
+    def __init__(self, bands: int, capacity: int):
+        self.bands = bands
+        self.rows = NUM_PERMUTATIONS // bands
+        self.capacity = capacity
+        self._signatures = np.empty((min(1024, capacity), NUM_PERMUTATIONS), dtype=np.uint32)
+        self._verdicts: List[Dict[str, Any]] = []
+        self._slot_keys: List[str] = []
+        self._keys: Dict[str, int] = {}
+        self._inserted = 0
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._pending: set = set()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _evict(self, position: int):
+        del self._keys[self._slot_keys[position]]
+        for band, band_key in self._band_keys(self._signatures[position]):
+            bucket = self._buckets[band][band_key]
+            bucket.remove(position)
+            if not bucket:
+                del self._buckets[band][band_key]
+
+    def _insert(self, key: str, signature: np.ndarray, verdict: Dict[str, Any]):
+        if key in self._keys:
+            self._verdicts[self._keys[key]] = verdict
+            return
+        position = self._inserted % self.capacity
+        self._inserted += 1
+        if position < len(self._slot_keys):
+            # Full: the slot holds the oldest entry
+            self._evict(position)
+            self._verdicts[position] = verdict
+            self._slot_keys[position] = key
+        else:
+            if position == len(self._signatures):
+                grown = min(2 * len(self._signatures), self.capacity)
+                self._signatures = np.concatenate([
+                    self._signatures,
+                    np.empty((grown - len(self._signatures), NUM_PERMUTATIONS), dtype=np.uint32)
+                ])
+            self._verdicts.append(verdict)
+            self._slot_keys.append(key)
+        self._signatures[position] = signature
+        self._keys[key] = position
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(position)
+
+    def query(self, signature: np.ndarray, threshold: float) -> List[tuple]:
+        """(estimated Jaccard, verdict) for indexed texts at or above threshold, most similar first"""
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        if not candidates:
+            return []
+        positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self._signatures[positions] == signature).mean(axis=1)
+        order = np.argsort(-similarity)
+        return [
+            (float(similarity[i]), self._verdicts[positions[i]])
+            for i in order if similarity[i] >= threshold
+        ]
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            signatures_collection = get_database()[TEXT_SIGNATURES_COLLECTION]
+            # Also serves the newest-first load below
+            await ensure_ttl_index(signatures_collection, "created_at", settings.TEXT_DEDUP_RETENTION_DAYS * 86400)
+            cursor = signatures_collection.find({}, {"created_at": 0}).sort("created_at", DESCENDING)
+            docs = await cursor.limit(self.capacity).to_list(length=None)
+            for doc in reversed(docs):  # Oldest first, so they are evicted first
+                signature = np.frombuffer(doc["signature"], dtype=np.uint32)
+                if len(signature) != NUM_PERMUTATIONS:
+                    continue
+                self._insert(doc["_id"], signature, {field: doc[field] for field in VERDICT_FIELDS if field in doc})
+            self._loaded = True
+            logger.info(f"Loaded {len(self)} text signatures")
+
+    async def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Verdict for a near-duplicate of already scored text, or None
+        One match is reused as is; several are blended, weighted by similarity
+        """
+        try:
+            await self._ensure_loaded()
+        except Exception as e:
+            logger.error(f"Failed to load text signature index: {e}")
+            return None
+
+        signature = minhash(text)
+        if signature is None:
+            return None
+        matches = self.query(signature, settings.TEXT_DEDUP_THRESHOLD)
+        if not matches:
+            text_dedup_lookups.inc(outcome="miss")
+            return None
+        text_dedup_lookups.inc(outcome="hit")
+
+        matches = matches[:settings.TEXT_DEDUP_MAX_MATCHES]
+        best_similarity, best = matches[0]
+        if len(matches) == 1:
+            verdict = dict(best)
+        else:
+            total_weight = sum(similarity for similarity, _ in matches)
+            ai_score = sum(similarity * v["ai_score"] for similarity, v in matches) / total_weight
+            human_score = sum(similarity * v["human_score"] for similarity, v in matches) / total_weight
+            is_ai_generated = ai_score > human_score
+            verdict = {
+                "result": is_ai_generated,
+                "confidence": float(ai_score if is_ai_generated else human_score),
+                "ai_score": float(ai_score),
+                "human_score": float(human_score),
+                "model": best.get("model"),
+            }
+        verdict["similarity"] = round(best_similarity, 3)
+        verdict["duplicate_matches"] = len(matches)
+        logger.info(f"Near-duplicate text (Jaccard ~{best_similarity:.2f}, {len(matches)} matches), "
+                    f"reusing prior verdict")
+        return verdict
+
+    def _index(self, text: str, detection: Dict[str, Any]) -> Optional[UpdateOne]:
+        """Insert a verdict in memory; returns the upsert persisting it, or None for text without words"""
+        signature = minhash(text)
+        if signature is None:
+            return None
+        key = hashlib.sha256(text.encode()).hexdigest()
+        verdict = {field: detection[field] for field in VERDICT_FIELDS if field in detection}
+        self._insert(key, signature, verdict)
+        return UpdateOne(
+            {"_id": key},
+            {
+                "$set": {**verdict, "signature": Binary(signature.tobytes())},
+                "$setOnInsert": {"created_at": datetime.utcnow()},
+            },
+            upsert=True
+        )
+
+    def add(self, text: str, detection: Dict[str, Any]):
+        """Index a fresh verdict; the write to MongoDB happens in the background"""
+        operation = self._index(text, detection)
+        if operation is None:
+            return
+        task = asyncio.create_task(self._persist([operation]))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        lifecycle.track_task(task)
+
+    async def extend(self, entries: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Index and persist many (text, detection) pairs with one bulk write,
+        e.g. for a backfill; returns how many texts were new to the index
+        """
+        await self._ensure_loaded()
+        before = self._inserted
+        operations = [op for op in (self._index(text, detection) for text, detection in entries) if op]
+        if operations:
+            await self._persist(operations)
+        return self._inserted - before
+
+    async def _persist(self, operations: List[UpdateOne]):
+        try:
+            signatures_collection = get_database()[TEXT_SIGNATURES_COLLECTION]
+            await signatures_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(operations)} text signatures: {e}")
+
+
+text_dedup_index = MinHashIndex(settings.TEXT_DEDUP_BANDS, settings.TEXT_DEDUP_MAX_ENTRIES)
+
+
+async def _backfill_batch(docs: List[Dict[str, Any]]) -> int:
+    await attach_contents(docs)
+    entries = []
+    for doc in docs:
+        content = doc.get("content")
+        # A preview cut at CONTENT_PREVIEW_CHARS would be signed differently from
+        # the full text lookups sign, so it could never match its own text
+        if not content or len(content) >= CONTENT_PREVIEW_CHARS:
+            continue
+        ai_score = doc["confidence"] if doc["result"] else 1 - doc["confidence"]
+        entries.append((content, {
+            "result": doc["result"],
+            "confidence": doc["confidence"],
+            "ai_score": ai_score,
+            "human_score": 1 - ai_score,
+        }))
+    return await text_dedup_index.extend(entries)
+
+
+async def backfill_from_results(limit: int = 0, batch_size: int = 500) -> int:
+    """
+    Sign text results stored before the index existed
+    Results only keep the first CONTENT_PREVIEW_CHARS characters, so only
+    texts shorter than that are complete enough to sign; scores are
+    reconstructed from result and confidence. Returns texts added.
+    """
+    results_collection = get_database()["results"]
+    cursor = results_collection.find(
+        {storage_field("type"): "text"}
+    ).sort(storage_field("timestamp"), -1)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    added = 0
+    batch: List[Dict[str, Any]] = []
+    async for doc in cursor:
+        batch.append(from_storage(doc))
+        if len(batch) >= batch_size:
+            added += await _backfill_batch(batch)
+            batch = []
+    if batch:
+        added += await _backfill_batch(batch)
+    return added
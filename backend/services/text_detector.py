@@ -1,6 +1,21 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from core.config import settings
+from core.metrics import (
+    time_stage,
+    inference_fallbacks,
+    inference_timeouts,
+    inference_errors,
+    inference_cold_starts,
+    detection_failures,
+)
+from core.concurrency import ConcurrencyLimitExceeded
+from core.deadline import Deadline
+from core.tracing import start_span, current_span
+from services.http_client import get_http_client, post_inference
+from services.ensemble import run_ensemble
+from services.text_dedup import text_dedup_index
+from services.text_triage import triage_text
 import logging
 import asyncio
 
@@ -14,11 +29,151 @@ TEXT_MODELS = [
 ]
 
 
-async def detect_ai_text(text: str) -> Dict[str, Any]:
+def _parse_text_response(result: Any) -> Optional[Dict[str, Any]]:
+    """
+    Turn a classification response into AI/human scores
+    Returns None when the labels can't be mapped to either class
+    """
+    # Handle different response formats
+    predictions = None
+    if isinstance(result, list):
+        if len(result) > 0:
+            # Check if it's a list of predictions
+            if isinstance(result[0], list):
+                predictions = result[0]
+            else:
+                predictions = result
+    elif isinstance(result, dict):
+        # Some models return dict with labels
+        if "label" in result and "score" in result:
+            predictions = [result]
+    
+    if not predictions:
+        return None
+    
+    ai_score = 0.0
+    human_score = 0.0
+    
+    for pred in predictions:
+        label = pred.get("label", "").upper()
+        score = pred.get("score", 0.0)
+        
+        if "FAKE" in label or "AI" in label or "GENERATED" in label:
+            ai_score = max(ai_score, score)
+        elif "REAL" in label or "HUMAN" in label or "ORIGINAL" in label:
+            human_score = max(human_score, score)
+    
+    # If we have scores, use them
+    if ai_score == 0 and human_score == 0:
+        return None
+    
+    # Normalize if needed
+    total = ai_score + human_score
+    if total > 1.0:
+        ai_score = ai_score / total
+        human_score = human_score / total
+    elif total < 0.1:
+        # Fallback if scores are too low
+        ai_score = 0.5
+        human_score = 0.5
+    
+    is_ai_generated = ai_score > human_score
+    confidence = ai_score if is_ai_generated else human_score
+    
+    return {
+        "result": is_ai_generated,
+        "confidence": float(confidence),
+        "ai_score": float(ai_score),
+        "human_score": float(human_score),
+    }
+
+
+async def _query_model(
+    client: httpx.AsyncClient,
+    model_name: str,
+    text: str,
+    deadline: Deadline
+) -> Optional[Dict[str, Any]]:
+    """
+    Score text with one model, waiting once for a cold start
+    Returns None if the model times out, errors or gives an unusable response
+    Every call and the cold-start wait are capped by the remaining deadline
+    """
+    if deadline.expired:
+        return None
+    
+    with start_span("hf.inference", kind="client", detector="text", model=model_name) as span:
+        try:
+            payload = {"inputs": text}
+        
+            # Make request
+            with time_stage("text", "upstream_call"):
+                response = await post_inference(
+                    client, model_name, settings.TEXT_INFERENCE_TIMEOUT, deadline, json=payload
+                )
+        
+            span.set_attribute("http.status_code", response.status_code)
+            # Handle model loading (503 status)
+            if response.status_code == 503:
+                inference_cold_starts.inc(detector="text", model=model_name)
+                # Wait for model to load
+                retry_after = int(response.headers.get("Retry-After", 30))
+                span.add_event("model_loading", retry_after=retry_after)
+                logger.info(f"Model {model_name} is loading, waiting {retry_after}s...")
+                with time_stage("text", "cold_start_wait"):
+                    await asyncio.sleep(min(retry_after, deadline.remaining()))
+                if deadline.expired:
+                    logger.warning(f"Deadline reached while {model_name} was loading")
+                    inference_timeouts.inc(detector="text", model=model_name)
+                    return None
+            
+                # Retry once
+                with time_stage("text", "upstream_call"):
+                    response = await post_inference(
+                        client, model_name, settings.TEXT_INFERENCE_TIMEOUT, deadline, json=payload
+                    )
+                span.set_attribute("http.status_code", response.status_code)
+        
+            if response.status_code == 200:
+                with time_stage("text", "parse"):
+                    detection = _parse_text_response(response.json())
+            
+                if detection:
+                    logger.info(f"Text detection successful with {model_name}: "
+                                f"AI={detection['ai_score']:.2f}, Human={detection['human_score']:.2f}")
+                    detection["model"] = model_name
+                    return detection
+        
+            # If we get here, the model didn't work as expected
+            logger.warning(f"Model {model_name} returned unexpected format: {response.status_code}")
+            inference_errors.inc(detector="text", model=model_name, reason=f"status_{response.status_code}")
+        
+        except ConcurrencyLimitExceeded as e:
+            span.set_error("queue_timeout")
+            logger.warning(f"No inference slot for {model_name}: {e}")
+            inference_errors.inc(detector="text", model=model_name, reason="queue_timeout")
+        except httpx.TimeoutException:
+            span.set_error("timeout")
+            logger.warning(f"Timeout calling {model_name}")
+            inference_timeouts.inc(detector="text", model=model_name)
+        except Exception as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            logger.error(f"Error with model {model_name}: {e}")
+            inference_errors.inc(detector="text", model=model_name, reason=type(e).__name__)
+    
+    return None
+
+
+async def detect_ai_text(text: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """
     Detect if text is AI-generated using Hugging Face API
-    Tries multiple models for better reliability
+    Tries multiple models in turn for better reliability, or queries them
+    all concurrently and combines their scores when ENSEMBLE_MODE is on
+    Remote calls only use whatever remains of `deadline`
+    Near-duplicates of already scored text reuse their verdicts without inference,
+    and with TRIAGE_ENABLED clear-cut texts are resolved by a local statistical model
     """
+    deadline = deadline or Deadline.unbounded()
     if not text or len(text.strip()) == 0:
         return {
             "result": False,
@@ -34,96 +189,57 @@ async def detect_ai_text(text: str) -> Dict[str, Any]:
         text = text[:max_length]
         logger.warning(f"Text truncated to {max_length} characters")
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    if settings.TEXT_DEDUP_ENABLED:
+        with time_stage("text", "dedup_lookup"):
+            prior = await text_dedup_index.lookup(text)
+        if prior:
+            return prior
+    
+    if settings.TRIAGE_ENABLED:
+        with time_stage("text", "triage"):
+            triaged = triage_text(text)
+        if triaged:
+            return triaged
+    
+    detection = None
+    client = get_http_client()
+    if settings.ENSEMBLE_MODE:
+        ensemble = await run_ensemble(
+            TEXT_MODELS,
+            lambda model_name: _query_model(client, model_name, text, deadline),
+            settings.TEXT_MODEL_WEIGHTS,
+            min(settings.ENSEMBLE_DEADLINE, deadline.remaining()),
+            "human_score"
+        )
+        if ensemble:
+            is_ai_generated = ensemble["ai_score"] > ensemble["human_score"]
+            detection = {
+                "result": is_ai_generated,
+                "confidence": ensemble["ai_score"] if is_ai_generated else ensemble["human_score"],
+                "ai_score": ensemble["ai_score"],
+                "human_score": ensemble["human_score"],
+                "model": "ensemble",
+                "models": ensemble["models"]
+            }
+    else:
         for model_name in TEXT_MODELS:
-            try:
-                api_url = f"https://api-inference.huggingface.co/models/{model_name}"
-                headers = {
-                    "Authorization": f"Bearer {settings.HUGGINGFACE_API_KEY}"
-                }
-                
-                payload = {"inputs": text}
-                
-                # Make request
-                response = await client.post(api_url, headers=headers, json=payload)
-                
-                # Handle model loading (503 status)
-                if response.status_code == 503:
-                    # Wait for model to load
-                    retry_after = int(response.headers.get("Retry-After", 30))
-                    logger.info(f"Model {model_name} is loading, waiting {retry_after}s...")
-                    await asyncio.sleep(retry_after)
-                    
-                    # Retry once
-                    response = await client.post(api_url, headers=headers, json=payload)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    
-                    # Handle different response formats
-                    predictions = None
-                    if isinstance(result, list):
-                        if len(result) > 0:
-                            # Check if it's a list of predictions
-                            if isinstance(result[0], list):
-                                predictions = result[0]
-                            else:
-                                predictions = result
-                    elif isinstance(result, dict):
-                        # Some models return dict with labels
-                        if "label" in result and "score" in result:
-                            predictions = [result]
-                    
-                    if predictions:
-                        ai_score = 0.0
-                        human_score = 0.0
-                        
-                        for pred in predictions:
-                            label = pred.get("label", "").upper()
-                            score = pred.get("score", 0.0)
-                            
-                            if "FAKE" in label or "AI" in label or "GENERATED" in label:
-                                ai_score = max(ai_score, score)
-                            elif "REAL" in label or "HUMAN" in label or "ORIGINAL" in label:
-                                human_score = max(human_score, score)
-                        
-                        # If we have scores, use them
-                        if ai_score > 0 or human_score > 0:
-                            # Normalize if needed
-                            total = ai_score + human_score
-                            if total > 1.0:
-                                ai_score = ai_score / total
-                                human_score = human_score / total
-                            elif total < 0.1:
-                                # Fallback if scores are too low
-                                ai_score = 0.5
-                                human_score = 0.5
-                            
-                            is_ai_generated = ai_score > human_score
-                            confidence = ai_score if is_ai_generated else human_score
-                            
-                            logger.info(f"Text detection successful with {model_name}: AI={ai_score:.2f}, Human={human_score:.2f}")
-                            
-                            return {
-                                "result": is_ai_generated,
-                                "confidence": float(confidence),
-                                "ai_score": float(ai_score),
-                                "human_score": float(human_score),
-                                "model": model_name
-                            }
-                
-                # If we get here, the model didn't work as expected
-                logger.warning(f"Model {model_name} returned unexpected format: {response.status_code}")
-                
-            except httpx.TimeoutException:
-                logger.warning(f"Timeout calling {model_name}, trying next model...")
-                continue
-            except Exception as e:
-                logger.error(f"Error with model {model_name}: {e}")
-                continue
+            if deadline.expired:
+                logger.warning("Request deadline reached, not trying further models")
+                break
+            detection = await _query_model(client, model_name, text, deadline)
+            if detection:
+                break
+            inference_fallbacks.inc(detector="text", model=model_name)
+            current_span().add_event("model_fallback", model=model_name)
+
+    if detection:
+        if settings.TEXT_DEDUP_ENABLED:
+            text_dedup_index.add(text, detection)
+        return detection
     
     # All models failed, return fallback
     logger.error("All text detection models failed")
+    detection_failures.inc(detector="text")
     return {
         "result": False,
         "confidence": 0.5,
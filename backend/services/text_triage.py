@@ -0,0 +1,126 @@
+from typing import Dict, Any, Optional
+import logging
+import math
+import re
+import numpy as np
+
+from core.config import settings
+from core.metrics import registry, Counter
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ["word_length_cv", "sentence_length_cv", "type_token_ratio", "repetition", "punctuation_entropy"]
+
+# Logistic weights over FEATURES (positive = more AI-like), overridable through
+# TRIAGE_WEIGHTS. Refit them against the remote models with benchmarks/triage_eval.py.
+DEFAULT_WEIGHTS = {
+    "bias": 4.0,
+    "word_length_cv": -2.0,  # Human word lengths vary more
+    "sentence_length_cv": -5.0,  # ... and so do sentence lengths (burstiness)
+    "type_token_ratio": -2.0,
+    "repetition": 8.0,  # Repeated trigrams
+    "punctuation_entropy": -0.8,  # Humans use a wider mix of punctuation
+}
+
+# Vocabulary richness is measured over a fixed window so it doesn't just track length
+TTR_WINDOW = 200
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+_SENTENCE_RE = re.compile(r"[.!?]+(?:\s+|$)")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+triage_outcomes = registry.register(Counter(
+    "text_triage_total", "Texts resolved by local triage or escalated to remote models", ["outcome"]
+))
+
+
+def _cv(values: np.ndarray) -> float:
+    """Coefficient of variation (std / mean); 0 for fewer than two values"""
+    if len(values) < 2:
+        return 0.0
+    mean = values.mean()
+    return float(values.std() / mean) if mean > 0 else 0.0
+
+
+def word_count(text: str) -> int:
+    return len(_WORD_RE.findall(text))
+
+
+def triage_features(text: str) -> Optional[np.ndarray]:
+    """Statistical features in FEATURES order, or None if the text has no words"""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return None
+
+    word_lengths = np.fromiter(map(len, words), dtype=np.float64, count=len(words))
+    sentence_lengths = np.array(
+        [len(_WORD_RE.findall(sentence)) for sentence in _SENTENCE_RE.split(text)],
+        dtype=np.float64
+    )
+    sentence_lengths = sentence_lengths[sentence_lengths > 0]
+
+    window = words[:TTR_WINDOW]
+    type_token_ratio = len(set(window)) / len(window)
+
+    trigrams = list(zip(words, words[1:], words[2:]))
+    repetition = 1 - len(set(trigrams)) / len(trigrams) if trigrams else 0.0
+
+    punctuation = _PUNCTUATION_RE.findall(text)
+    punctuation_entropy = 0.0
+    if punctuation:
+        _, counts = np.unique(np.array(punctuation), return_counts=True)
+        probabilities = counts / counts.sum()
+        punctuation_entropy = float(-(probabilities * np.log2(probabilities)).sum())
+
+    return np.array([
+        _cv(word_lengths),
+        _cv(sentence_lengths),
+        type_token_ratio,
+        repetition,
+        punctuation_entropy,
+    ])
+
+
+def weight_vector(weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """(bias, *feature weights) from DEFAULT_WEIGHTS, TRIAGE_WEIGHTS and `weights`"""
+    merged = {**DEFAULT_WEIGHTS, **settings.TRIAGE_WEIGHTS, **(weights or {})}
+    return np.array([merged["bias"]] + [merged[name] for name in FEATURES], dtype=np.float64)
+
+
+def triage_score(features: np.ndarray, weights: np.ndarray) -> float:
+    """Probability that the text is AI-generated under the logistic model"""
+    logit = weights[0] + float(features @ weights[1:])
+    return 1 / (1 + math.exp(-max(-50.0, min(50.0, logit))))
+
+
+def triage_text(text: str, gate: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Resolve clear-cut texts locally
+    Returns a detection when the local score clears the confidence gate, or
+    None to escalate to the remote models. Short texts always escalate:
+    their statistics are too noisy to trust.
+    """
+    gate = settings.TRIAGE_CONFIDENCE_GATE if gate is None else gate
+    features = None
+    if word_count(text) >= settings.TRIAGE_MIN_WORDS:
+        features = triage_features(text)
+    if features is None:
+        triage_outcomes.inc(outcome="escalated")
+        return None
+
+    ai_score = triage_score(features, weight_vector())
+    is_ai_generated = ai_score > 0.5
+    confidence = ai_score if is_ai_generated else 1 - ai_score
+    if confidence < gate:
+        triage_outcomes.inc(outcome="escalated")
+        return None
+
+    triage_outcomes.inc(outcome="resolved")
+    logger.info(f"Text resolved by local triage: AI={ai_score:.2f}")
+    return {
+        "result": is_ai_generated,
+        "confidence": float(confidence),
+        "ai_score": float(ai_score),
+        "human_score": float(1 - ai_score),
+        "model": "local-triage",
+    }
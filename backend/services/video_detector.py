@@ -1,125 +1,441 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable, Tuple
+import bisect
 import logging
+import asyncio
+import math
+import threading
+import weakref
 import cv2
 import numpy as np
-from io import BytesIO
 import tempfile
 import os
+from core.config import settings
 from services.image_detector import detect_ai_image
+from services.frame_store import FrameScores, video_hash, load_frames, save_frames
+from core.metrics import registry, Histogram, time_stage, detection_failures
+from core.deadline import Deadline
+from core.lifecycle import lifecycle
 
 logger = logging.getLogger(__name__)
 
+# Marks the end of the frame stream in the pipeline queue
+_END_OF_FRAMES = None
 
-async def extract_frames(video_data: bytes, num_frames: int = 5) -> List[bytes]:
+# A stored frame stands in for a planned one this close to it, as a fraction
+# of the spacing between planned frames
+STORED_FRAME_TOLERANCE = 0.25
+
+# Readers with a temp file on disk; any left open at shutdown are closed so
+# abandoned requests don't leak spooled videos
+_open_readers: "weakref.WeakSet[VideoReader]" = weakref.WeakSet()
+
+video_frames_analyzed = registry.register(Histogram(
+    "video_frames_analyzed",
+    "Frames scored per video (inference calls, before near-duplicate reuse)",
+    buckets=(2, 4, 6, 8, 12, 16, 24, 32, 48, 64),
+))
+
+
+class VideoReader:
     """
-    Extract frames from video for analysis
-    Returns list of frame images as bytes
-    Supports multiple video formats (mp4, avi, mov, webm, etc.)
+    Reads and JPEG-encodes individual frames from in-memory video data
+    OpenCV needs a file path, so the data is spooled to a temp file that is
+    removed on close(). Calls are blocking and meant to run in a worker
+    thread; a lock keeps read_frame() and close() from overlapping.
     """
-    frames = []
-    temp_video_path = None
-    
-    try:
+
+    def __init__(self, video_data: bytes):
+        self.video_data = video_data
+        self.total_frames = 0
+        self.fps = 1.0
+        self._cap = None
+        self._path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _suffix(self) -> str:
         # Determine video format from magic bytes or use default
         video_suffix = '.mp4'  # Default
-        if video_data[:4] == b'RIFF':
+        if self.video_data[:4] == b'RIFF':
             video_suffix = '.avi'
-        elif video_data[:4] == b'ftyp':
-            if b'mp4' in video_data[:20] or b'isom' in video_data[:20]:
+        elif self.video_data[:4] == b'ftyp':
+            if b'mp4' in self.video_data[:20] or b'isom' in self.video_data[:20]:
                 video_suffix = '.mp4'
-            elif b'qt' in video_data[:20]:
+            elif b'qt' in self.video_data[:20]:
                 video_suffix = '.mov'
-        elif video_data[:4] == b'\x1a\x45\xdf\xa3':
+        elif self.video_data[:4] == b'\x1a\x45\xdf\xa3':
             video_suffix = '.webm'
-        
+        return video_suffix
+
+    def open(self) -> bool:
+        """Spool the video to disk and open it; returns False if it has no readable frames"""
+        with self._lock:
+            if self._closed:
+                return False
+            _open_readers.add(self)
+            return self._open()
+
+    def _open(self) -> bool:
         # Save video data to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=video_suffix) as temp_video:
-            temp_video.write(video_data)
-            temp_video_path = temp_video.name
-        
-        try:
-            # Open video with OpenCV
-            cap = cv2.VideoCapture(temp_video_path)
-            
-            if not cap.isOpened():
-                logger.error(f"Failed to open video file: {temp_video_path}")
-                return frames
-            
-            # Get video properties
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS) or 1.0
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            logger.info(f"Video properties: {total_frames} frames, {fps:.2f} fps, {width}x{height}")
-            
-            if total_frames <= 0:
-                logger.error("Video has no frames or invalid frame count")
-                return frames
-            
-            # Calculate frame indices to extract (evenly distributed)
-            num_frames_to_extract = min(num_frames, total_frames)
-            frame_indices = np.linspace(0, total_frames - 1, num_frames_to_extract, dtype=int)
-            
-            # Extract frames
-            frames_extracted = 0
-            for frame_idx in frame_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-                ret, frame = cap.read()
-                
-                if ret and frame is not None:
-                    # Handle grayscale or color images
-                    if len(frame.shape) == 2:
-                        # Grayscale - convert to RGB
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
-                    elif len(frame.shape) == 3:
-                        # BGR to RGB
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    else:
-                        logger.warning(f"Unexpected frame shape: {frame.shape}")
-                        continue
-                    
-                    # Resize if too large (max 1024px on longest side)
-                    max_size = 1024
-                    h, w = frame_rgb.shape[:2]
-                    if max(h, w) > max_size:
-                        ratio = max_size / max(h, w)
-                        new_w = int(w * ratio)
-                        new_h = int(h * ratio)
-                        frame_rgb = cv2.resize(frame_rgb, (new_w, new_h), interpolation=cv2.INTER_AREA)
-                    
-                    # Encode as JPEG
-                    _, buffer = cv2.imencode('.jpg', frame_rgb, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                    if buffer is not None:
-                        frame_bytes = buffer.tobytes()
-                        frames.append(frame_bytes)
-                        frames_extracted += 1
-                        logger.debug(f"Extracted frame {frame_idx}/{total_frames}")
-                else:
-                    logger.warning(f"Failed to read frame {frame_idx}")
-            
-            cap.release()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=self._suffix()) as temp_video:
+            temp_video.write(self.video_data)
+            self._path = temp_video.name
+
+        # Open video with OpenCV
+        with time_stage("video", "open"):
+            self._cap = cv2.VideoCapture(self._path)
+
+        if not self._cap.isOpened():
+            logger.error(f"Failed to open video file: {self._path}")
+            return False
+
+        # Get video properties
+        self.total_frames = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 1.0
+        width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        logger.info(f"Video properties: {self.total_frames} frames, {self.fps:.2f} fps, {width}x{height}")
+
+        if self.total_frames <= 0:
+            logger.error("Video has no frames or invalid frame count")
+            return False
+        return True
+
+    @property
+    def duration(self) -> float:
+        """Length in seconds"""
+        return self.total_frames / self.fps
+
+    def frame_indices(self, num_frames: int) -> List[int]:
+        """Evenly distributed frame indices"""
+        num_frames_to_extract = min(num_frames, self.total_frames)
+        return np.linspace(0, self.total_frames - 1, num_frames_to_extract, dtype=int).tolist()
+
+    def progressive_frame_indices(self, num_frames: int) -> List[int]:
+        """
+        The same evenly distributed indices, ordered coarse to fine
+        Positions are visited in bit-reversed order (0, 1/2, 1/4, 3/4, ...), so
+        stopping after any prefix still covers the whole video evenly
+        """
+        indices = list(dict.fromkeys(self.frame_indices(num_frames)))
+        bits = max(1, (len(indices) - 1).bit_length())
+        return [
+            indices[i] for i in sorted(
+                range(len(indices)), key=lambda i: int(format(i, f"0{bits}b")[::-1], 2)
+            )
+        ]
+
+    def read_frame(self, frame_idx: int) -> Optional[bytes]:
+        """Decode one frame, convert to RGB, downsize and encode as JPEG"""
+        with self._lock:
+            if self._cap is None:
+                return None
+            with time_stage("video", "decode"):
+                self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                ret, frame = self._cap.read()
+
+        if not ret or frame is None:
+            logger.warning(f"Failed to read frame {frame_idx}")
+            return None
+
+        # Handle grayscale or color images
+        if len(frame.shape) == 2:
+            # Grayscale - convert to RGB
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB)
+        elif len(frame.shape) == 3:
+            # BGR to RGB
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        else:
+            logger.warning(f"Unexpected frame shape: {frame.shape}")
+            return None
+
+        # Resize if too large (max 1024px on longest side)
+        max_size = 1024
+        h, w = frame_rgb.shape[:2]
+        if max(h, w) > max_size:
+            with time_stage("video", "resize"):
+                ratio = max_size / max(h, w)
+                new_w = int(w * ratio)
+                new_h = int(h * ratio)
+                frame_rgb = cv2.resize(frame_rgb, (new_w, new_h), interpolation=cv2.INTER_AREA)
+
+        # Encode as JPEG
+        with time_stage("video", "encode"):
+            _, buffer = cv2.imencode('.jpg', frame_rgb, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        if buffer is None:
+            return None
+        logger.debug(f"Extracted frame {frame_idx}/{self.total_frames}")
+        return buffer.tobytes()
+
+    def close(self):
+        _open_readers.discard(self)
+        with self._lock:
+            self._closed = True
+            if self._cap is not None:
+                self._cap.release()
+                self._cap = None
+        # Clean up temporary file
+        if self._path and os.path.exists(self._path):
+            try:
+                os.unlink(self._path)
+            except Exception as e:
+                logger.warning(f"Failed to delete temp file: {e}")
+        self._path = None
+
+
+def _close_open_readers():
+    for reader in list(_open_readers):
+        reader.close()
+
+
+lifecycle.on_shutdown(_close_open_readers)
+
+
+async def _produce_frames(
+    video_data: bytes,
+    frame_plan: Callable[[VideoReader], List[int]],
+    queue: asyncio.Queue,
+    deadline: Deadline,
+    stop: Optional[asyncio.Event] = None
+):
+    """
+    Decode frames in a worker thread and push (frame_idx, jpeg) pairs into the queue
+    `frame_plan` picks the frame indices once the video is open
+    put() blocks while the queue is full, so at most queue.maxsize frames are held
+    Stops early once the deadline has passed or `stop` is set
+    """
+    reader = VideoReader(video_data)
+    frames_extracted = 0
+    try:
+        if await asyncio.to_thread(reader.open):
+            for frame_idx in frame_plan(reader):
+                if deadline.expired:
+                    logger.warning(f"Deadline reached after extracting {frames_extracted} frames")
+                    break
+                if stop is not None and stop.is_set():
+                    break
+                frame_bytes = await asyncio.to_thread(reader.read_frame, frame_idx)
+                if frame_bytes is not None:
+                    await queue.put((frame_idx, frame_bytes))
+                    frames_extracted += 1
             logger.info(f"Successfully extracted {frames_extracted} frames from video")
-            
-        finally:
-            # Clean up temporary file
-            if temp_video_path and os.path.exists(temp_video_path):
-                try:
-                    os.unlink(temp_video_path)
-                except Exception as e:
-                    logger.warning(f"Failed to delete temp file: {e}")
-    
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         logger.error(f"Error extracting frames: {e}", exc_info=True)
-    
-    return frames
+    finally:
+        reader.close()
+    await queue.put(_END_OF_FRAMES)
+
+
+async def stream_frames(
+    video_data: bytes,
+    num_frames: int = 5,
+    queue_size: Optional[int] = None,
+    deadline: Optional[Deadline] = None
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Yield (frame_idx, jpeg bytes) as frames are decoded
+    Decoding runs ahead of the consumer by at most queue_size frames
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or settings.VIDEO_FRAME_QUEUE_SIZE)
+    producer = asyncio.create_task(_produce_frames(
+        video_data, lambda reader: reader.frame_indices(num_frames), queue, deadline or Deadline.unbounded()
+    ))
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END_OF_FRAMES:
+                break
+            yield item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+async def extract_frames(
+    video_data: bytes,
+    num_frames: int = 5,
+    deadline: Optional[Deadline] = None
+) -> List[bytes]:
+    """
+    Extract frames from video for analysis
+    Returns list of frame images as bytes
+    Supports multiple video formats (mp4, avi, mov, webm, etc.)
+    """
+    return [
+        frame_bytes
+        async for _, frame_bytes in stream_frames(video_data, num_frames, deadline=deadline)
+    ]
+
+
+def frame_budget(duration: float) -> int:
+    """Most frames to score for a video: a base budget that grows with duration, capped"""
+    scaled = math.ceil(duration / 60 * settings.VIDEO_FRAMES_PER_MINUTE)
+    return min(settings.VIDEO_MAX_FRAMES, max(settings.VIDEO_BASE_FRAME_BUDGET, scaled))
+
 
+def _frame_probability(frame_result: Dict[str, Any]) -> float:
+    total = frame_result["ai_score"] + frame_result["real_score"]
+    return frame_result["ai_score"] / total if total > 0 else 0.5
 
-async def detect_ai_video(video_data: bytes) -> Dict[str, Any]:
+
+def score_interval(probabilities: List[float], z: float) -> Tuple[float, float, float]:
+    """
+    Mean per-frame AI probability with a normal-approximation confidence interval
+    The spread is floored at VIDEO_SCORE_SIGMA_FLOOR so a few identical frames
+    don't produce a zero-width interval
+    """
+    values = np.asarray(probabilities, dtype=np.float64)
+    mean = float(values.mean())
+    sigma = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+    half_width = z * max(sigma, settings.VIDEO_SCORE_SIGMA_FLOOR) / math.sqrt(len(values))
+    return mean, max(0.0, mean - half_width), min(1.0, mean + half_width)
+
+
+def _stored_frame_result(ai_score: float, real_score: float) -> Dict[str, Any]:
+    is_ai_generated = bool(ai_score > real_score)
+    return {
+        "result": is_ai_generated,
+        "confidence": float(ai_score if is_ai_generated else real_score),
+        "ai_score": float(ai_score),
+        "real_score": float(real_score),
+        "stored": True,
+    }
+
+
+def _match_stored_frames(plan: List[int], stored: FrameScores, total_frames: int) -> Tuple[List[int], List[int]]:
+    """
+    Split a frame plan into (stored frames to reuse, frames still to decode)
+    Each planned frame is replaced by the nearest unused stored frame within
+    STORED_FRAME_TOLERANCE of the frame spacing, so a re-run with a larger
+    budget reuses the earlier frames instead of landing next to them
+    """
+    if not stored or not plan:
+        return [], plan
+    tolerance = STORED_FRAME_TOLERANCE * total_frames / len(plan)
+    available = sorted(stored)
+    reused, to_decode = [], []
+    for frame_idx in plan:
+        position = bisect.bisect_left(available, frame_idx)
+        candidates = available[max(0, position - 1):position + 1]
+        nearest = min(candidates, key=lambda idx: abs(idx - frame_idx), default=None)
+        if nearest is not None and abs(nearest - frame_idx) <= tolerance:
+            reused.append(nearest)
+            available.remove(nearest)
+        else:
+            to_decode.append(frame_idx)
+    return reused, to_decode
+
+
+async def _analyze_frames(
+    video_data: bytes,
+    num_frames: int,
+    deadline: Deadline,
+    adaptive: bool = False,
+    stored: Optional[FrameScores] = None
+) -> Dict[str, Any]:
+    """
+    Run frame extraction and frame inference as a pipeline
+    Inference workers start on the first decoded frame instead of waiting for all of them
+    In adaptive mode the frame budget scales with the video's duration and frames
+    are visited coarse to fine; sampling stops once VIDEO_MIN_FRAMES are scored and
+    the confidence interval of the mean AI probability excludes 0.5
+    Frames already in `stored` (from an earlier analysis) are reused without decoding
+    Returns the (frame index, frame result) pairs ordered by frame index, frames
+    extracted, the frame budget and the video's fps and frame count
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.VIDEO_FRAME_QUEUE_SIZE)
+    results: List[Tuple[int, Dict[str, Any]]] = []
+    frames_extracted = 0
+    budget = num_frames
+    video_info = {"fps": 0.0, "total_frames": 0}
+    settled = asyncio.Event()
+
+    def frame_plan(reader: VideoReader) -> List[int]:
+        nonlocal budget
+        video_info.update(fps=reader.fps, total_frames=reader.total_frames)
+        if not adaptive:
+            plan = reader.frame_indices(num_frames)
+        else:
+            budget = frame_budget(reader.duration)
+            plan = reader.progressive_frame_indices(budget)
+
+        reused, to_decode = _match_stored_frames(plan, stored or {}, reader.total_frames)
+        if reused:
+            logger.info(f"Reusing {len(reused)} stored frame scores, {len(to_decode)} frames left to score")
+        for frame_idx in reused:
+            results.append((frame_idx, _stored_frame_result(*stored[frame_idx])))
+        if reused and adaptive:
+            check_settled()
+        return to_decode
+
+    def check_settled():
+        if len(results) < settings.VIDEO_MIN_FRAMES:
+            return
+        _, low, high = score_interval(
+            [_frame_probability(frame_result) for _, frame_result in results], settings.VIDEO_CONFIDENCE_Z
+        )
+        if low > 0.5 or high < 0.5:
+            logger.info(f"Video verdict settled after {len(results)} of up to {budget} frames")
+            settled.set()
+
+    async def worker():
+        nonlocal frames_extracted
+        while True:
+            item = await queue.get()
+            if item is _END_OF_FRAMES:
+                # Leave the marker for the other workers
+                queue.put_nowait(_END_OF_FRAMES)
+                return
+            if settled.is_set():
+                # Drain frames decoded before the verdict settled
+                continue
+            frame_idx, frame_bytes = item
+            frames_extracted += 1
+            try:
+                logger.debug(f"Analyzing frame {frame_idx}...")
+                with time_stage("video", "frame_inference"):
+                    frame_result = await detect_ai_image(frame_bytes, deadline)
+
+                if deadline.expired and "error" in frame_result:
+                    # Frame was cut off by the deadline rather than scored
+                    continue
+                if "ai_score" in frame_result and "real_score" in frame_result:
+                    results.append((frame_idx, frame_result))
+                    if adaptive:
+                        check_settled()
+            except Exception as e:
+                logger.error(f"Error analyzing frame {frame_idx}: {e}")
+
+    producer = asyncio.create_task(_produce_frames(video_data, frame_plan, queue, deadline, settled))
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, settings.VIDEO_INFERENCE_WORKERS))]
+    try:
+        await asyncio.gather(producer, *workers)
+    finally:
+        for task in [producer, *workers]:
+            task.cancel()
+        await asyncio.gather(producer, *workers, return_exceptions=True)
+
+    results.sort(key=lambda item: item[0])
+    return {
+        "frames": results,
+        "frames_extracted": frames_extracted,
+        "budget": budget,
+        **video_info,
+    }
+
+
+async def detect_ai_video(video_data: bytes, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """
     Detect if video is AI-generated using frame extraction and image analysis
     Extracts frames from video and analyzes them using image detection models
+    Frames are only extracted and scored while `deadline` has budget left
+    With VIDEO_ADAPTIVE_SAMPLING the frame budget scales with duration and
+    sampling stops as soon as the verdict is statistically settled
     """
+    deadline = deadline or Deadline.unbounded()
     if not video_data or len(video_data) == 0:
         return {
             "result": False,
@@ -128,14 +444,40 @@ async def detect_ai_video(video_data: bytes) -> Dict[str, Any]:
             "real_score": 0.5,
             "error": "Video data cannot be empty"
         }
-    
+
     try:
         logger.info("Starting video analysis...")
-        
-        # Extract frames from video (5-10 frames for analysis)
-        frames = await extract_frames(video_data, num_frames=8)
-        
-        if len(frames) == 0:
+
+        # Frames scored by an earlier analysis of the same video are not scored again
+        content_hash = None
+        stored: FrameScores = {}
+        if settings.VIDEO_FRAME_STORE_ENABLED:
+            content_hash = await asyncio.to_thread(video_hash, video_data)
+            try:
+                stored = await load_frames(content_hash)
+            except Exception as e:
+                logger.warning(f"Failed to load stored frame scores: {e}")
+
+        # Extract and analyze frames concurrently: 8 evenly spaced frames, or with
+        # adaptive sampling as many as it takes to settle the verdict
+        with time_stage("video", "pipeline"):
+            analysis = await _analyze_frames(
+                video_data, num_frames=8, deadline=deadline,
+                adaptive=settings.VIDEO_ADAPTIVE_SAMPLING, stored=stored
+            )
+        frame_results = [frame_result for _, frame_result in analysis["frames"]]
+        frames_extracted = analysis["frames_extracted"]
+        budget = analysis["budget"]
+
+        scored = {
+            frame_idx: (float(frame_result["ai_score"]), float(frame_result["real_score"]))
+            for frame_idx, frame_result in analysis["frames"]
+            if not frame_result.get("stored")
+        }
+        if content_hash and scored:
+            await save_frames(content_hash, analysis["fps"], analysis["total_frames"], {**stored, **scored})
+
+        if frames_extracted == 0 and not frame_results:
             logger.error("Failed to extract frames from video")
             return {
                 "result": False,
@@ -144,30 +486,13 @@ async def detect_ai_video(video_data: bytes) -> Dict[str, Any]:
                 "real_score": 0.5,
                 "error": "Failed to extract frames from video"
             }
-        
-        logger.info(f"Extracted {len(frames)} frames for analysis")
-        
-        # Analyze each frame
-        frame_results = []
-        ai_scores = []
-        real_scores = []
-        
-        for i, frame in enumerate(frames):
-            try:
-                logger.debug(f"Analyzing frame {i+1}/{len(frames)}...")
-                frame_result = await detect_ai_image(frame)
-                
-                if "ai_score" in frame_result and "real_score" in frame_result:
-                    ai_scores.append(frame_result["ai_score"])
-                    real_scores.append(frame_result["real_score"])
-                    frame_results.append(frame_result)
-                
-            except Exception as e:
-                logger.error(f"Error analyzing frame {i+1}: {e}")
-                continue
-        
+
+        ai_scores = [r["ai_score"] for r in frame_results]
+        real_scores = [r["real_score"] for r in frame_results]
+
         if len(ai_scores) == 0:
             logger.error("Failed to analyze any frames")
+            detection_failures.inc(detector="video")
             return {
                 "result": False,
                 "confidence": 0.5,
@@ -175,44 +500,56 @@ async def detect_ai_video(video_data: bytes) -> Dict[str, Any]:
                 "real_score": 0.5,
                 "error": "Failed to analyze video frames"
             }
-        
+
         # Aggregate results from all frames
         # Use average of all frame scores
         avg_ai_score = np.mean(ai_scores)
         avg_real_score = np.mean(real_scores)
-        
+
         # Normalize scores
         total = avg_ai_score + avg_real_score
         if total > 0:
             avg_ai_score = avg_ai_score / total
             avg_real_score = avg_real_score / total
-        
-        # Determine if video is AI-generated
-        is_ai_generated = avg_ai_score > avg_real_score
+
+        # Determine if video is AI-generated (plain Python types: numpy scalars aren't BSON-encodable)
+        avg_ai_score = float(avg_ai_score)
+        avg_real_score = float(avg_real_score)
+        is_ai_generated = bool(avg_ai_score > avg_real_score)
         confidence = avg_ai_score if is_ai_generated else avg_real_score
-        
+
         # Additional heuristics based on consistency
         # If most frames agree, increase confidence
         ai_frame_count = sum(1 for r in frame_results if r.get("result", False))
         consistency = abs(ai_frame_count - (len(frame_results) - ai_frame_count)) / len(frame_results)
-        
+
         # Boost confidence if frames are consistent
         if consistency > 0.6:
             confidence = min(1.0, confidence * 1.1)
-        
+
+        video_frames_analyzed.observe(len(scored))
+        _, ci_low, ci_high = score_interval(
+            [_frame_probability(r) for r in frame_results], settings.VIDEO_CONFIDENCE_Z
+        )
+
         logger.info(f"Video analysis complete: AI={avg_ai_score:.2f}, Real={avg_real_score:.2f}, "
-                   f"Frames analyzed={len(frame_results)}")
-        
+                   f"Frames analyzed={len(frame_results)}/{budget}")
+
         return {
-            "result": is_ai_generated,
+            "result": bool(is_ai_generated),
             "confidence": float(confidence),
             "ai_score": float(avg_ai_score),
             "real_score": float(avg_real_score),
             "frames_analyzed": len(frame_results),
-            "total_frames": len(frames),
+            "frames_reused": sum(1 for r in frame_results if "duplicate_of" in r),
+            "frames_from_store": len(frame_results) - len(scored),
+            "total_frames": frames_extracted,
+            "frame_budget": budget,
+            "ai_score_interval": [round(ci_low, 4), round(ci_high, 4)],
+            "video_hash": content_hash,
             "method": "frame_extraction"
         }
-        
+
     except Exception as e:
         logger.error(f"Error in video detection: {e}", exc_info=True)
         return {
@@ -222,5 +559,3 @@ async def detect_ai_video(video_data: bytes) -> Dict[str, Any]:
             "real_score": 0.5,
             "error": f"Error processing video: {str(e)}"
         }
-
-
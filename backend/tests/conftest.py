@@ -0,0 +1,18 @@
+"""
+Unit tests run without a database or the inference API
+Settings are read at import time, so the required ones are filled in here,
+before any test module imports the app's packages.
+
+Usage (from backend/, after `pip install -r tests/requirements.txt`):
+    python -m pytest tests
+"""
+import os
+import sys
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("HUGGINGFACE_API_KEY", "test")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,56 @@
+import pytest
+
+import core.cache
+from core.cache import TTLCache, etag_matches, make_etag
+
+
+def test_etags_are_strong_and_depend_on_every_part():
+    etag = make_etag("user", 3, "/api/results/")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("user", 3, "/api/results/")
+    assert etag != make_etag("user", 4, "/api/results/")
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", W/"abc"', True),
+    ('"other",  "abc" ', True),
+    ('"other"', False),
+    ("abc", False),
+    ("*", True),
+])
+def test_if_none_match_uses_weak_comparison(if_none_match, matches):
+    assert etag_matches(if_none_match, '"abc"') is matches
+
+
+class FakeClock:
+    """Stands in for the `time` module of the code under test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(core.cache, "time", clock)
+    cache = TTLCache(ttl=10, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # Evicts b, the least recently used
+    assert cache.get("b") is None and len(cache) == 2
+
+    clock.now += 10
+    assert cache.get("a") is None and cache.get("c") is None
+
+
+def test_zero_ttl_disables_the_cache():
+    cache = TTLCache(ttl=0, max_entries=10)
+    cache.set("a", 1)
+    assert cache.get("a") is None
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+import core.concurrency
+from core.concurrency import AdaptiveLimiter, ConcurrencyLimitExceeded
+from core.config import settings
+
+
+class FakeClock:
+    """Stands in for the `time` module of the code under test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(core.concurrency, "time", clock)
+    monkeypatch.setattr(settings, "INFERENCE_CONCURRENCY_ENABLED", True)
+    monkeypatch.setattr(settings, "INFERENCE_CONCURRENCY_INITIAL", 4)
+    monkeypatch.setattr(settings, "INFERENCE_CONCURRENCY_MIN", 1)
+    monkeypatch.setattr(settings, "INFERENCE_CONCURRENCY_MAX", 64)
+    monkeypatch.setattr(settings, "INFERENCE_CONCURRENCY_BACKOFF", 0.5)
+    monkeypatch.setattr(settings, "INFERENCE_LATENCY_TOLERANCE", 1.5)
+    monkeypatch.setattr(settings, "INFERENCE_QUEUE_MAX", 2)
+    return clock
+
+
+async def call(limiter, clock, latency=1.0, dropped=False):
+    async with limiter.acquire("model") as slot:
+        clock.now += latency
+        if dropped:
+            slot.dropped()
+
+
+@pytest.mark.asyncio
+async def test_saturated_successes_grow_the_limit_additively(clock):
+    limiter = AdaptiveLimiter()
+    for _ in range(4):
+        # Keep two slots busy, so the limit counts as in use
+        async with limiter.acquire("model"):
+            await call(limiter, clock)
+    # One slot per limit's worth of successes: 4 calls at limit ~4 add ~1
+    assert 4.9 < limiter.limit < 5.0
+
+
+@pytest.mark.asyncio
+async def test_unsaturated_successes_leave_the_limit_alone(clock):
+    limiter = AdaptiveLimiter()
+    for _ in range(10):
+        await call(limiter, clock)
+    assert limiter.limit == 4.0
+
+
+@pytest.mark.asyncio
+async def test_rising_latency_stops_growth(clock):
+    limiter = AdaptiveLimiter()
+    async with limiter.acquire("model"):
+        for _ in range(20):
+            await call(limiter, clock, latency=1.0)
+    grown = limiter.limit
+    async with limiter.acquire("model"):
+        for _ in range(5):
+            await call(limiter, clock, latency=10.0)
+    assert limiter.limit == grown
+
+
+@pytest.mark.asyncio
+async def test_overload_backs_off_once_per_window(clock):
+    limiter = AdaptiveLimiter()
+    slots = [limiter.acquire("model") for _ in range(3)]
+    held = [await slot.__aenter__() for slot in slots]
+    clock.now += 1
+    for slot, context in zip(held, slots):
+        slot.dropped()
+        await context.__aexit__(None, None, None)
+    # Three failures from calls started before the first backoff count once
+    assert limiter.limit == 2.0
+
+    await call(limiter, clock, dropped=True)
+    assert limiter.limit == 1.0
+    await call(limiter, clock, dropped=True)
+    assert limiter.limit == 1.0  # INFERENCE_CONCURRENCY_MIN
+
+
+@pytest.mark.asyncio
+async def test_errors_are_neither_successes_nor_overload(clock):
+    limiter = AdaptiveLimiter()
+    with pytest.raises(ValueError):
+        async with limiter.acquire("model"):
+            raise ValueError()
+    assert limiter.limit == 4.0 and limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_order_and_time_out(clock, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_CONCURRENCY_INITIAL", 1)
+    limiter = AdaptiveLimiter()
+    order = []
+    release = asyncio.Event()
+
+    async def worker(name, timeout=5.0):
+        async with limiter.acquire("model", timeout=timeout):
+            order.append(name)
+            await release.wait()
+
+    first = asyncio.create_task(worker("first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(worker("second"))
+    third = asyncio.create_task(worker("third"))
+    await asyncio.sleep(0)
+    assert limiter.queue_length == 2
+
+    with pytest.raises(ConcurrencyLimitExceeded):  # INFERENCE_QUEUE_MAX
+        async with limiter.acquire("model"):
+            pass
+    monkeypatch.setattr(settings, "INFERENCE_QUEUE_MAX", 10)
+    with pytest.raises(ConcurrencyLimitExceeded):
+        async with limiter.acquire("model", timeout=0.01):
+            pass
+
+    release.set()
+    await asyncio.gather(first, second, third)
+    assert order == ["first", "second", "third"]
+    assert limiter.in_flight == 0 and limiter.queue_length == 0
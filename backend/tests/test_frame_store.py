@@ -0,0 +1,37 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import services.frame_store
+from core.database import mongodb
+from services.frame_store import FRAMES_COLLECTION, get_timeline, load_frames, save_frames
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(mongodb, "database", database)
+    monkeypatch.setattr(services.frame_store, "_ttl_index_ready", False)
+    monkeypatch.setattr(services.frame_store, "get_read_collection", lambda name: database[name])
+    return database
+
+
+@pytest.mark.asyncio
+async def test_frames_round_trip_through_the_packed_arrays(database):
+    frames = {30: (0.75, 0.25), 0: (0.5, 0.5), 15: (0.125, 0.875)}
+    await save_frames("video", 30.0, 90, frames)
+
+    assert await load_frames("video") == frames
+    assert await load_frames("unknown") == {}
+    timeline = await get_timeline("video")
+    assert timeline["total_frames"] == 90
+    assert [(frame["frame"], frame["timestamp"]) for frame in timeline["frames"]] == [
+        (0, 0.0), (15, 0.5), (30, 1.0)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stored_frames_expire_after_the_last_analysis(database):
+    await save_frames("video", 25.0, 50, {0: (0.5, 0.5)})
+    indexes = await database[FRAMES_COLLECTION].index_information()
+    ttl = [index for index in indexes.values() if "expireAfterSeconds" in index]
+    assert [index["key"] for index in ttl] == [[("updated_at", 1)]]
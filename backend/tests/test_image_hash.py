@@ -0,0 +1,43 @@
+import random
+
+from services.image_hash import BKTree, ImageHashIndex, hamming
+
+
+def test_bk_tree_search_matches_a_linear_scan():
+    rng = random.Random(7)
+    keys = [rng.getrandbits(64) for _ in range(500)]
+    # Near copies, so some searches have several hits
+    keys += [key ^ (1 << rng.randrange(64)) for key in keys[:50]]
+    tree = BKTree()
+    for index, key in enumerate(keys):
+        tree.add(key, index)
+
+    for query in keys[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 3, 10):
+            expected = sorted(
+                (hamming(query, key), key) for key in set(keys) if hamming(query, key) <= radius
+            )
+            found = [(distance, key) for distance, key, _ in tree.search(query, radius)]
+            assert sorted(found) == expected
+            assert [distance for distance, _ in found] == sorted(distance for distance, _ in found)
+
+
+def test_bk_tree_replaces_the_value_of_an_existing_key():
+    tree = BKTree()
+    tree.add(0b1010, "old")
+    tree.add(0b1010, "new")
+    assert len(tree) == 1
+    assert tree.search(0b1010, 0) == [(0, 0b1010, "new")]
+
+
+def test_empty_bk_tree_finds_nothing():
+    assert BKTree().search(123, 64) == []
+
+
+def test_index_drops_its_oldest_quarter_past_capacity():
+    index = ImageHashIndex(capacity=8)
+    for key in range(9):
+        index._insert(key << 8, {"result": bool(key % 2), "dhash": 0})
+    assert len(index) == 6
+    remaining = {key for _, key, _ in index._tree.search(0, 64)}
+    assert remaining == {key << 8 for key in range(3, 9)}
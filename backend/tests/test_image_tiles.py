@@ -0,0 +1,84 @@
+import asyncio
+import math
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.image_tiles import extract_tiles, score_tiles, select_tiles
+
+
+def fake_query(scores, cancelled):
+    """Tile payload b"<n>" scores scores[n] (ai probability), None fails, "hang" never answers"""
+
+    async def query_tile(tile):
+        score = scores[int(tile)]
+        if score == "hang":
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(tile)
+                raise
+        await asyncio.sleep(0)
+        if score is None:
+            raise RuntimeError("inference failed")
+        return {"ai_score": score, "real_score": 1 - score}
+
+    return query_tile
+
+
+def tiles(count):
+    return [str(n).encode() for n in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_stops_once_the_remaining_tiles_cannot_flip_the_mean():
+    cancelled = []
+    # 4 x 0.9 answered: even if both hanging tiles scored 0, the mean is 3.6 / 6 > 0.5
+    scores = [0.9, 0.9, 0.9, 0.9, "hang", "hang"]
+    verdict = await score_tiles(tiles(6), fake_query(scores, cancelled), math.inf)
+    assert verdict["result"] is True
+    assert verdict["tiles_analyzed"] == 4 and verdict["tiles"] == 6
+    assert sorted(cancelled) == [b"4", b"5"]
+
+
+@pytest.mark.asyncio
+async def test_stops_early_for_human_verdicts_too():
+    cancelled = []
+    scores = [0.1, 0.1, 0.1, 0.1, "hang", "hang"]
+    verdict = await score_tiles(tiles(6), fake_query(scores, cancelled), math.inf)
+    assert verdict["result"] is False and verdict["tiles_analyzed"] == 4
+
+
+@pytest.mark.asyncio
+async def test_keeps_waiting_while_the_mean_could_still_cross():
+    # 3 x 0.9 answered: three tiles at 0 would give 2.7 / 6 < 0.5, so the timeout decides
+    scores = [0.9, 0.9, 0.9, "hang", "hang", "hang"]
+    verdict = await score_tiles(tiles(6), fake_query(scores, []), 0.05)
+    assert verdict["tiles_analyzed"] == 3
+    assert verdict["ai_score"] == pytest.approx(0.9)
+
+
+@pytest.mark.asyncio
+async def test_failed_tiles_drop_out_of_the_mean():
+    scores = [0.8, None, 0.6, None]
+    verdict = await score_tiles(tiles(4), fake_query(scores, []), math.inf)
+    assert verdict["tiles_analyzed"] == 2
+    assert verdict["ai_score"] == pytest.approx(0.7)
+    assert await score_tiles(tiles(2), fake_query([None, None], []), math.inf) is None
+
+
+def test_select_tiles_prefers_textured_regions():
+    rng = np.random.default_rng(0)
+    pixels = np.full((64, 128, 3), 128, dtype=np.uint8)
+    pixels[32:, 64:] = rng.integers(0, 256, (32, 64, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels)
+    boxes = select_tiles(image, tile_size=32, max_tiles=3)
+    assert boxes[0] in {(64, 32, 96, 64), (96, 32, 128, 64)}
+    assert len(boxes) == 3
+    assert select_tiles(image, tile_size=256, max_tiles=3) == []
+
+    tile = Image.open(BytesIO(extract_tiles(image, 32, 1)[0]))
+    assert tile.size == (32, 32)
+    assert np.array_equal(np.asarray(tile), pixels[boxes[0][1]:boxes[0][3], boxes[0][0]:boxes[0][2]])
@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+from core.profiling import ProfilerBusy, SamplingProfiler
+
+
+def busy_wait(seconds: float):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_join_returns_once_the_run_ends():
+    profiler = SamplingProfiler()
+    profiler.join()  # Never started
+    profiler.start(0.2, 0.005)
+    with pytest.raises(ProfilerBusy):
+        profiler.start(0.2, 0.005)
+    busy_wait(0.05)
+    profiler.join()
+    assert not profiler.running
+    assert profiler.sample_count > 0
+    assert "busy_wait" in profiler.collapsed()
+
+
+def test_stop_ends_a_long_run_early():
+    profiler = SamplingProfiler()
+    profiler.start(60, 0.005)
+    started = time.monotonic()
+    profiler.stop()
+    assert not profiler.running
+    assert time.monotonic() - started < 5
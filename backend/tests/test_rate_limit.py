@@ -0,0 +1,69 @@
+import pytest
+
+import core.rate_limit
+from core.rate_limit import InMemoryRateLimiter
+
+
+class FakeClock:
+    """Stands in for the `time` module of the code under test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(core.rate_limit, "time", clock)
+    return clock
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_a_burst_of_capacity_then_refills(clock):
+    limiter = InMemoryRateLimiter()
+    for _ in range(3):
+        assert await limiter.acquire("user", capacity=3, refill_per_second=1) == 0.0
+    assert await limiter.acquire("user", capacity=3, refill_per_second=1) == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert await limiter.acquire("user", capacity=3, refill_per_second=1) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert await limiter.acquire("user", capacity=3, refill_per_second=1) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_bucket_never_refills_beyond_capacity(clock):
+    limiter = InMemoryRateLimiter()
+    await limiter.acquire("user", capacity=2, refill_per_second=1)
+    clock.now += 3600
+    assert await limiter.acquire("user", capacity=2, refill_per_second=1, cost=2) == 0.0
+    assert await limiter.acquire("user", capacity=2, refill_per_second=1) == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_buckets_are_independent_per_key(clock):
+    limiter = InMemoryRateLimiter()
+    assert await limiter.acquire("a", capacity=1, refill_per_second=1) == 0.0
+    assert await limiter.acquire("a", capacity=1, refill_per_second=1) > 0
+    assert await limiter.acquire("b", capacity=1, refill_per_second=1) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_sweep_drops_refilled_buckets_only(clock):
+    limiter = InMemoryRateLimiter()
+    for user in range(100):
+        await limiter.acquire(f"idle-{user}", capacity=10, refill_per_second=1)
+    clock.now += core.rate_limit.BUCKET_SWEEP_INTERVAL - 1
+    await limiter.acquire("busy", capacity=100, refill_per_second=1, cost=100)
+    assert len(limiter) == 101
+
+    clock.now += 1
+    await limiter.acquire("other", capacity=10, refill_per_second=1)
+    assert len(limiter) == 2
+
+    # A dropped bucket was full, so dropping it changed nothing
+    for _ in range(10):
+        assert await limiter.acquire("idle-0", capacity=10, refill_per_second=1) == 0.0
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from core.config import settings
+from models.result_model import COMPACT_FIELDS, content_hash, from_storage, storage_field, to_storage
+from routers.results import WITHOUT_CONTENT
+from services.result_store import compress_content, decompress_content
+
+
+def result_doc(content="Some submitted text"):
+    return {
+        "_id": ObjectId(),
+        "user_id": ObjectId(),
+        "type": "text",
+        "result": True,
+        "confidence": 0.93,
+        "content": content,
+        "timestamp": datetime(2024, 6, 1, 12, 0),
+        "models": ["a", "b"],
+        "video_hash": None,
+    }
+
+
+def test_compact_round_trip_swaps_content_for_its_hash():
+    doc = result_doc()
+    stored = to_storage(dict(doc), compact=True)
+    assert set(stored) == {"_id", *COMPACT_FIELDS.values()}
+    assert stored["h"] == content_hash(doc["content"])
+
+    expanded = from_storage(stored)
+    assert expanded["content_id"] == content_hash(doc["content"])
+    assert {k: v for k, v in expanded.items() if k != "content_id"} == {
+        k: v for k, v in doc.items() if k != "content"
+    }
+
+
+def test_compact_documents_without_content_have_no_reference():
+    stored = to_storage(result_doc(content=None), compact=True)
+    assert "h" not in stored and "content" not in stored
+
+
+def test_expanded_documents_pass_through_unchanged():
+    doc = result_doc()
+    assert to_storage(doc, compact=False) is doc
+    assert from_storage(doc) is doc
+
+
+def test_storage_field_follows_the_active_schema(monkeypatch):
+    monkeypatch.setattr(settings, "RESULTS_COMPACT_SCHEMA", True)
+    assert storage_field("user_id") == "u"
+    assert storage_field("_id") == "_id"
+    monkeypatch.setattr(settings, "RESULTS_COMPACT_SCHEMA", False)
+    assert storage_field("user_id") == "user_id"
+
+
+def test_content_compression_round_trips():
+    content = "An essay about tides. " * 200
+    codec, body = compress_content(content)
+    assert len(body) < len(content)
+    assert decompress_content(codec, body) == content
+
+
+@pytest.mark.asyncio
+async def test_history_projection_drops_content_under_both_schemas():
+    results = AsyncMongoMockClient()["test"]["results"]
+    await results.insert_many([to_storage(result_doc(), compact=True), to_storage(result_doc(), compact=False)])
+    for doc in await results.find({}, WITHOUT_CONTENT).to_list(length=None):
+        assert not {"content", "content_id", "h"} & set(doc)
@@ -0,0 +1,119 @@
+import pytest
+from bson import ObjectId
+from bson.errors import InvalidDocument
+from pymongo.errors import AutoReconnect, DuplicateKeyError
+
+import core.result_writer
+from core.config import settings
+from core.result_writer import ResultWriter
+
+
+class FakeResults:
+    """results collection whose writes fail for documents listed in `poisoned`"""
+
+    def __init__(self):
+        self.docs = {}
+        self.poisoned = set()
+        self.insert_many_calls = 0
+
+    async def insert_many(self, docs, ordered=True):
+        self.insert_many_calls += 1
+        if any(doc["_id"] in self.poisoned for doc in docs):
+            raise AutoReconnect("connection reset")
+        for doc in docs:
+            self.docs[doc["_id"]] = doc
+
+    async def insert_one(self, doc):
+        if doc["_id"] in self.poisoned:
+            raise AutoReconnect("connection reset")
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("duplicate _id")
+        self.docs[doc["_id"]] = doc
+
+
+@pytest.fixture
+def results(monkeypatch):
+    results = FakeResults()
+    monkeypatch.setattr(core.result_writer, "get_database", lambda: {"results": results})
+    monkeypatch.setattr(core.result_writer, "FLUSH_RETRIES", 1)
+    monkeypatch.setattr(settings, "RESULTS_COMPACT_SCHEMA", False)
+    monkeypatch.setattr(settings, "RESULT_WRITE_BEHIND", True)
+    monkeypatch.setattr(settings, "RESULT_FLUSH_INTERVAL", 0.01)
+    return results
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    writer = ResultWriter()
+    writer.persisted = []
+
+    async def persisted(docs):
+        writer.persisted.extend(doc["_id"] for doc in docs)
+
+    monkeypatch.setattr(writer, "_persisted", persisted)
+    return writer
+
+
+def result(**fields):
+    return {"user_id": ObjectId(), "type": "text", "result": True, "confidence": 0.9, **fields}
+
+
+@pytest.mark.asyncio
+async def test_writes_synchronously_when_not_running(results, writer):
+    result_id = await writer.submit(result())
+    assert result_id in results.docs
+    assert writer.persisted == [result_id]
+
+
+@pytest.mark.asyncio
+async def test_buffered_results_are_flushed_in_one_batch_on_stop(results, writer):
+    await writer.start()
+    ids = [await writer.submit(result()) for _ in range(5)]
+    assert writer.pending == 5 and not results.docs
+    await writer.stop()
+    assert set(results.docs) == set(ids)
+    assert results.insert_many_calls == 1
+    assert sorted(writer.persisted) == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_falls_back_to_synchronous_writes(results, writer, monkeypatch):
+    monkeypatch.setattr(settings, "RESULT_BUFFER_MAX_SIZE", 2)
+    await writer.start()
+    ids = [await writer.submit(result()) for _ in range(3)]
+    # The third did not fit and was written before submit returned
+    assert list(results.docs) == [ids[2]]
+    await writer.stop()
+    assert set(results.docs) == set(ids)
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_one_by_one_and_only_loses_the_bad_document(results, writer):
+    await writer.start()
+    bad = ObjectId()
+    results.poisoned.add(bad)
+    ids = [await writer.submit(result()) for _ in range(2)]
+    await writer.submit(result(_id=bad))
+    ids.append(await writer.submit(result()))
+    await writer.stop()
+
+    assert set(results.docs) == set(ids)
+    assert sorted(writer.persisted) == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_documents_landed_by_a_failed_attempt_count_as_persisted(results, writer):
+    landed, fresh = result(_id=ObjectId()), result(_id=ObjectId())
+    results.docs[landed["_id"]] = landed  # Written, but the attempt reported a failure
+    await writer._flush_each([landed, fresh])
+    assert writer.persisted == [landed["_id"], fresh["_id"]]
+    assert len(results.docs) == 2
+
+
+@pytest.mark.asyncio
+async def test_unencodable_results_fail_at_submit(results, writer):
+    await writer.start()
+    with pytest.raises(InvalidDocument):
+        await writer.submit(result(content=object()))
+    await writer.stop()
+    assert writer.pending == 0 and not results.docs
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+
+import routers.results
+from core.cache import TTLCache
+from core.database import mongodb
+from models.result_model import to_storage
+from routers.auth import get_current_user
+from routers.results import router
+
+
+@pytest.fixture
+def databases(monkeypatch):
+    """A primary, and a secondary that never catches up with it"""
+    client = AsyncMongoMockClient()
+    primary, lagging = client["primary"], client["lagging"]
+    monkeypatch.setattr(mongodb, "database", primary)
+    monkeypatch.setattr(routers.results, "get_read_collection", lambda name: lagging[name])
+    monkeypatch.setattr(routers.results, "response_cache", TTLCache(ttl=60, max_entries=100))
+    return primary
+
+
+@pytest.fixture
+def app(databases):
+    app = FastAPI()
+    app.include_router(router)
+
+    async def current_user():
+        return await databases["users"].find_one({"email": "user@example.com"})
+
+    app.dependency_overrides[get_current_user] = current_user
+    return app
+
+
+@pytest.mark.asyncio
+async def test_version_bump_is_not_cached_from_a_lagging_read(app, databases):
+    user_id = (await databases["users"].insert_one({"email": "user@example.com"})).inserted_id
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        before = await client.get("/api/results/stats")
+        assert before.json()["total_verifications"] == 0
+
+        result = {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "type": "text",
+            "result": True,
+            "confidence": 0.9,
+            "content": "some text",
+            "timestamp": datetime.utcnow(),
+        }
+        await databases["results"].insert_one(to_storage(dict(result)))
+        # What bump_results_versions does; mongomock rejects its bulk UpdateOne
+        await databases["users"].update_one({"_id": user_id}, {"$inc": {"results_version": 1}})
+
+        stats = await client.get("/api/results/stats")
+        history = await client.get("/api/results/")
+
+    assert stats.headers["etag"] != before.headers["etag"]
+    assert stats.json()["total_verifications"] == 1
+    assert [row["id"] for row in history.json()] == [str(result["_id"])]
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from core.scheduler import FairScheduler, SchedulerFull
+
+
+def test_finish_tags_advance_each_flow_by_cost_over_weight():
+    scheduler = FairScheduler(slots=1, max_queue=10)
+    assert scheduler._tag("video", weight=1.0, cost=1.0) == (0.0, 1.0)
+    assert scheduler._tag("video", weight=1.0, cost=1.0) == (1.0, 2.0)
+    assert scheduler._tag("text", weight=4.0, cost=1.0) == (0.0, 0.25)
+    assert scheduler._tag("text", weight=4.0, cost=2.0) == (0.25, 0.75)
+
+
+def test_idle_flows_restart_at_the_virtual_time():
+    scheduler = FairScheduler(slots=1, max_queue=10)
+    scheduler._tag("a", weight=1.0, cost=1.0)
+    scheduler._virtual_time = 5.0
+    # No credit is banked for time spent idle
+    assert scheduler._tag("a", weight=1.0, cost=1.0) == (5.0, 6.0)
+
+
+async def run_jobs(scheduler, jobs, order):
+    async def job(name, flow, weight):
+        async with scheduler.slot(flow, weight):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    holder = asyncio.Event()
+
+    async def hold():
+        async with scheduler.slot("holder", 1.0):
+            await holder.wait()
+
+    holding = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    tasks = []
+    for name, flow, weight in jobs:
+        tasks.append(asyncio.create_task(job(name, flow, weight)))
+        await asyncio.sleep(0)  # Queue in submission order
+    holder.set()
+    await asyncio.gather(holding, *tasks)
+
+
+@pytest.mark.asyncio
+async def test_a_flood_from_one_flow_does_not_starve_another():
+    scheduler = FairScheduler(slots=1, max_queue=10)
+    order = []
+    jobs = [(f"a{i}", "user-a", 1.0) for i in range(4)] + [("b0", "user-b", 1.0)]
+    await run_jobs(scheduler, jobs, order)
+    assert order.index("b0") == 1
+
+
+@pytest.mark.asyncio
+async def test_heavier_flows_get_proportionally_more_slots():
+    scheduler = FairScheduler(slots=1, max_queue=20)
+    order = []
+    jobs = [(f"video{i}", "video", 1.0) for i in range(4)] + [(f"text{i}", "text", 4.0) for i in range(8)]
+    await run_jobs(scheduler, jobs, order)
+    # Finish tags: text every 0.25, video every 1.0, so four text jobs per video job
+    # while both are backlogged (ties go to the earlier submission)
+    assert order[:10] == ["text0", "text1", "text2", "video0", "text3",
+                          "text4", "text5", "text6", "video1", "text7"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_without_tagging():
+    scheduler = FairScheduler(slots=1, max_queue=1)
+    release = asyncio.Event()
+
+    async def job():
+        async with scheduler.slot("a", 1.0):
+            await release.wait()
+
+    tasks = [asyncio.create_task(job()) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert scheduler.active == 1 and scheduler.queued == 1
+
+    tags = dict(scheduler._last_finish)
+    with pytest.raises(SchedulerFull):
+        async with scheduler.slot("b", 1.0):
+            pass
+    assert scheduler._last_finish == tags
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.active == 0 and scheduler.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_give_up_their_place():
+    scheduler = FairScheduler(slots=1, max_queue=10)
+    release = asyncio.Event()
+    order = []
+
+    async def job(name):
+        async with scheduler.slot(name, 1.0):
+            order.append(name)
+            await release.wait()
+
+    first = asyncio.create_task(job("first"))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(job("cancelled"))
+    last = asyncio.create_task(job("last"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    release.set()
+    await asyncio.gather(first, last)
+    assert order == ["first", "last"]
+    assert scheduler.active == 0
@@ -0,0 +1,83 @@
+import random
+
+import numpy as np
+import pytest
+
+from services.text_dedup import MinHashIndex, NUM_PERMUTATIONS, minhash, shingles
+
+TEXT = (
+    "The committee met on Tuesday to review the quarterly budget and agreed to postpone "
+    "the decision on the new library wing until the auditors have finished their report "
+    "on last year's spending, which is expected early next month"
+)
+
+
+def jaccard(a: str, b: str, size: int = 5) -> float:
+    first, second = set(shingles(a, size)), set(shingles(b, size))
+    return len(first & second) / len(first | second)
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("One, two THREE four!", 2) == ["one two", "two three", "three four"]
+    assert shingles("Too short", 5) == ["too short"]
+    assert shingles("...", 5) == []
+
+
+def test_minhash_is_deterministic_and_estimates_jaccard():
+    signature = minhash(TEXT, 5)
+    assert signature.dtype == np.uint32 and signature.shape == (NUM_PERMUTATIONS,)
+    assert np.array_equal(signature, minhash(TEXT.upper(), 5))
+    assert minhash("!!!", 5) is None
+
+    edited = TEXT.replace("Tuesday", "Wednesday")
+    estimate = (minhash(edited, 5) == signature).mean()
+    assert estimate == pytest.approx(jaccard(TEXT, edited), abs=0.15)
+
+
+def test_minhash_permutations_are_independent():
+    # Correlated permutations still average out, but scatter far beyond
+    # the sqrt(J(1 - J) / 128) ~ 0.04 of independent ones
+    rng = random.Random(3)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    errors = []
+    for _ in range(100):
+        words = [rng.choice(vocabulary) for _ in range(60)]
+        original = " ".join(words)
+        for _ in range(rng.randrange(1, 10)):
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        edited = " ".join(words)
+        errors.append((minhash(original, 5) == minhash(edited, 5)).mean() - jaccard(original, edited))
+    assert np.std(errors) < 0.06
+
+
+def test_lsh_finds_near_duplicates_but_not_unrelated_text():
+    index = MinHashIndex(bands=32, capacity=100)
+    index._insert("original", minhash(TEXT, 5), {"result": True})
+    index._insert("other", minhash("A completely different sentence about cooking pasta at home tonight", 5),
+                  {"result": False})
+
+    matches = index.query(minhash(TEXT.replace("Tuesday", "Wednesday"), 5), 0.5)
+    assert [verdict for _, verdict in matches] == [{"result": True}]
+    assert index.query(minhash("Nothing like either of the indexed texts, honestly", 5), 0.5) == []
+
+
+def test_ring_evicts_the_oldest_signature_past_capacity():
+    index = MinHashIndex(bands=32, capacity=3)
+    texts = [f"document {i} " + " ".join(f"token{i}x{j}" for j in range(20)) for i in range(4)]
+    for i, text in enumerate(texts):
+        index._insert(f"key-{i}", minhash(text, 5), {"id": i})
+
+    assert len(index) == 3
+    assert index.query(minhash(texts[0], 5), 0.99) == []
+    assert [verdict for _, verdict in index.query(minhash(texts[3], 5), 0.99)] == [{"id": 3}]
+    # Buckets no longer point at the evicted slot's old signature
+    assert all(len(bucket) == 1 for buckets in index._buckets for bucket in buckets.values())
+
+
+def test_reinserting_a_key_only_updates_its_verdict():
+    index = MinHashIndex(bands=32, capacity=10)
+    signature = minhash(TEXT, 5)
+    index._insert("same", signature, {"result": True})
+    index._insert("same", signature, {"result": False})
+    assert len(index) == 1
+    assert index.query(signature, 1.0) == [(1.0, {"result": False})]
@@ -0,0 +1,85 @@
+from io import BytesIO
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from core.config import settings
+from core.uploads import image_dimensions, read_upload, sniff_media_type
+
+
+def encode(format: str, size=(37, 21), **options) -> bytes:
+    output = BytesIO()
+    Image.new("RGB", size, (200, 30, 90)).save(output, format=format, **options)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("format, media_type", [
+    ("JPEG", "image/jpeg"),
+    ("PNG", "image/png"),
+    ("GIF", "image/gif"),
+    ("BMP", "image/bmp"),
+    ("TIFF", "image/tiff"),
+    ("WEBP", "image/webp"),
+])
+def test_images_are_recognized_with_their_header_dimensions(format, media_type):
+    data = encode(format)
+    assert sniff_media_type(data) == media_type
+    if format != "TIFF":  # Left to PIL's own limit
+        assert tuple(image_dimensions(data)) == (37, 21)
+
+
+def test_lossless_webp_and_jpeg_metadata_are_parsed():
+    assert image_dimensions(encode("WEBP", lossless=True)) == (37, 21)
+    # A large EXIF segment ahead of the frame header
+    assert image_dimensions(encode("JPEG", exif=b"Exif\x00\x00" + b"\x00" * 5000)) == (37, 21)
+    assert image_dimensions(encode("JPEG")[:10]) is None
+
+
+@pytest.mark.parametrize("head, media_type", [
+    (b"\x00\x00\x00\x20ftypisom\x00\x00\x02\x00", "video/mp4"),
+    (b"\x00\x00\x00\x14ftypqt  \x00\x00\x00\x00", "video/quicktime"),
+    (b"\x00\x00\x00\x08wide\x00\x00\x00\x00", "video/quicktime"),
+    (b"RIFF\x00\x00\x00\x00AVI LIST", "video/x-msvideo"),
+    (b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81", "video/webm"),
+    (b"\x00\x00\x00\x1cftypheic\x00\x00\x00\x00", None),  # Still image in an ISO container
+    (b"<!DOCTYPE html><html>", None),
+    (b"%PDF-1.7", None),
+    (b"", None),
+])
+def test_video_and_unsupported_signatures(head, media_type):
+    assert sniff_media_type(head) == media_type
+
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(file=BytesIO(data), filename="upload.jpg")
+
+
+@pytest.mark.asyncio
+async def test_read_upload_ignores_the_claimed_type(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_READ_CHUNK_SIZE", 1024)
+    png = encode("PNG")
+    assert await read_upload(upload(png), "image") == png
+    with pytest.raises(HTTPException) as error:
+        await read_upload(upload(b"<html>not an image</html>"), "image")
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException):
+        await read_upload(upload(png), "video")
+
+
+@pytest.mark.asyncio
+async def test_read_upload_stops_at_the_size_limit(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_READ_CHUNK_SIZE", 1024)
+    monkeypatch.setattr(settings, "UPLOAD_LIMITS", {**settings.UPLOAD_LIMITS, "image": 4096})
+    with pytest.raises(HTTPException) as error:
+        await read_upload(upload(encode("BMP", size=(64, 64))), "image")
+    assert error.value.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_read_upload_refuses_decompression_bombs_from_the_header(monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_MAX_PIXELS", 1000)
+    with pytest.raises(HTTPException) as error:
+        await read_upload(upload(encode("PNG", size=(100, 100))), "image")
+    assert error.value.status_code == 413
+    assert "100x100" in error.value.detail
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+import services.video_detector
+from core.config import settings
+from core.deadline import Deadline
+from services.video_detector import (
+    VideoReader, _analyze_frames, _match_stored_frames, frame_budget, score_interval
+)
+
+
+class FakeReader(VideoReader):
+    """A 100 s, 30 fps video whose frame payloads are just their index"""
+
+    def open(self) -> bool:
+        self.total_frames, self.fps = 3000, 30.0
+        return True
+
+    def read_frame(self, frame_idx: int) -> bytes:
+        return str(frame_idx).encode()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def video(monkeypatch):
+    """Frames score video.scores(frame index) as their AI probability"""
+    monkeypatch.setattr(services.video_detector, "VideoReader", FakeReader)
+    monkeypatch.setattr(settings, "VIDEO_MIN_FRAMES", 4)
+    monkeypatch.setattr(settings, "VIDEO_BASE_FRAME_BUDGET", 8)
+    monkeypatch.setattr(settings, "VIDEO_FRAMES_PER_MINUTE", 4.0)
+    monkeypatch.setattr(settings, "VIDEO_MAX_FRAMES", 32)
+    monkeypatch.setattr(settings, "VIDEO_CONFIDENCE_Z", 1.96)
+    monkeypatch.setattr(settings, "VIDEO_SCORE_SIGMA_FLOOR", 0.1)
+    monkeypatch.setattr(settings, "VIDEO_INFERENCE_WORKERS", 1)
+
+    video = SimpleNamespace(scores=lambda frame_idx: 0.5, scored=[])
+
+    async def detect_ai_image(frame_bytes, deadline):
+        frame_idx = int(frame_bytes)
+        video.scored.append(frame_idx)
+        ai = video.scores(frame_idx)
+        return {"ai_score": ai, "real_score": 1 - ai}
+
+    monkeypatch.setattr(services.video_detector, "detect_ai_image", detect_ai_image)
+    return video
+
+
+def test_score_interval_narrows_with_more_frames():
+    mean, low, high = score_interval([0.9, 0.8, 0.85, 0.95], 1.96)
+    assert mean == pytest.approx(0.875)
+    assert low > 0.5
+    _, wide_low, wide_high = score_interval([0.9, 0.8], 1.96)
+    assert wide_high - wide_low > high - low
+
+
+def test_score_interval_floors_the_spread(monkeypatch):
+    monkeypatch.setattr(settings, "VIDEO_SCORE_SIGMA_FLOOR", 0.1)
+    mean, low, high = score_interval([0.6] * 4, 1.96)
+    # Identical frames still leave 1.96 * 0.1 / 2 either side
+    assert (low, high) == (pytest.approx(0.502), pytest.approx(0.698))
+    assert score_interval([1.0], 1.96)[2] == 1.0
+
+
+def test_frame_budget_grows_with_duration_up_to_the_cap(video):
+    assert frame_budget(10) == 8
+    assert frame_budget(180) == 12
+    assert frame_budget(3600) == 32
+
+
+@pytest.mark.asyncio
+async def test_clear_videos_stop_after_the_minimum_frames(video):
+    video.scores = lambda frame_idx: 0.95
+    analysis = await _analyze_frames(b"video", 8, Deadline.unbounded(), adaptive=True)
+    assert analysis["budget"] == 8
+    assert len(analysis["frames"]) == settings.VIDEO_MIN_FRAMES
+    # Coarse to fine: the prefix spans the whole video
+    assert [idx for idx, _ in analysis["frames"]] == [0, 856, 1713, 2570]
+
+
+@pytest.mark.asyncio
+async def test_borderline_videos_use_the_whole_budget(video):
+    video.scores = lambda frame_idx: 0.4 if frame_idx % 2 else 0.6
+    analysis = await _analyze_frames(b"video", 8, Deadline.unbounded(), adaptive=True)
+    assert len(analysis["frames"]) == analysis["budget"] == 8
+
+
+@pytest.mark.asyncio
+async def test_stored_frames_count_towards_the_stopping_rule(video):
+    video.scores = lambda frame_idx: 0.95
+    stored = {0: (0.9, 0.1), 1713: (0.9, 0.1), 856: (0.95, 0.05)}
+    analysis = await _analyze_frames(b"video", 8, Deadline.unbounded(), adaptive=True, stored=stored)
+    assert len(analysis["frames"]) == 4
+    assert video.scored == [2570]
+
+
+def test_stored_frames_are_matched_within_the_tolerance():
+    plan = [0, 1000, 2000]
+    stored = {5: (0.9, 0.1), 1400: (0.9, 0.1), 2100: (0.9, 0.1)}
+    # Tolerance: 0.25 * 3000 / 3 = 250 frames
+    reused, to_decode = _match_stored_frames(plan, stored, 3000)
+    assert reused == [5, 2100]
+    assert to_decode == [1000]